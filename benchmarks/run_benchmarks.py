@@ -0,0 +1,223 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from synthetic_repo import REPO_DIR, SIZES, SyntheticRepo, generate_rotation_payload, generate_synthetic_repo
+
+DEFAULT_BASELINE_PATH = f"{REPO_DIR}/benchmarks/baseline.json"
+DEFAULT_TOLERANCE = 0.25
+BENCHMARKS = ["build_environment", "generate_effective_set", "cred_rotation", "build_pipeline", "handle_sd"]
+
+
+def add_sys_path(*paths):
+    for p in paths:
+        sys.path.insert(0, f"{REPO_DIR}/{p}")
+
+
+def get_benchmark_environ(name, repo: SyntheticRepo) -> dict:
+    # envgenehelper reads CI_PROJECT_DIR on import, so variables are set before benchmark process is started
+    env_names = "\n".join(f"{repo.cluster_name}/{env_name}" for env_name in repo.env_names)
+    if name == "build_environment":
+        return {"CI_PROJECT_DIR": os.path.dirname(repo.instances_dir)}
+    if name == "build_pipeline":
+        return {
+            "CI_PROJECT_DIR": repo.rendered_dir,
+            "JSON_SCHEMAS_DIR": f"{REPO_DIR}/schemas",
+            "CI_COMMIT_REF_NAME": "feature/benchmark",
+            "ENV_NAMES": env_names,
+            "ENV_TEMPLATE_VERSION": "synthetic:1.0.0",
+            "ENV_BUILDER": "true",
+            "GENERATE_EFFECTIVE_SET": "true",
+            "GET_PASSPORT": "false",
+        }
+    if name == "handle_sd":
+        return {"CI_PROJECT_DIR": repo.rendered_dir, "CLUSTER_NAME": repo.cluster_name,
+                "ENVIRONMENT_NAME": repo.env_names[0]}
+    return {"CI_PROJECT_DIR": repo.rendered_dir}
+
+
+def bench_build_environment(repo: SyntheticRepo):
+    os.chdir(REPO_DIR)
+    add_sys_path("scripts/build_env")
+    from main import render_environments
+    env_names = "\n".join(f"{repo.cluster_name}/{env_name}" for env_name in repo.env_names)
+    return lambda: render_environments(env_names, repo.templates_dir, repo.instances_dir, f"{repo.base_dir}/output",
+                                       "synthetic", os.path.dirname(repo.instances_dir))
+
+
+def bench_generate_effective_set(repo: SyntheticRepo):
+    os.chdir(repo.rendered_dir)
+    add_sys_path("build_effective_set_generator/scripts")
+    from main import generate_effective_set_for_env
+
+    def run():
+        for env_name in repo.env_names:
+            generate_effective_set_for_env(repo.cluster_name, env_name, repo.rendered_instances_dir)
+    return run
+
+
+def bench_cred_rotation(repo: SyntheticRepo):
+    # cred_rotation itself always decrypts the payload with SOPS, so the phases after
+    # payload decryption are measured: reading files, indexing and processing payload entries
+    os.chdir(repo.rendered_dir)
+    add_sys_path("creds_rotation/scripts")
+    from core_rotation import process_entry_in_payload
+    from models import PayloadEntry
+    from utils.cred_utils import collect_shared_credentials, read_env_cred_files, read_shared_cred_files
+    from utils.file_utils import scan_and_get_yaml_files
+    from utils.search_utils import build_cred_reference_index
+    payload = generate_rotation_payload(repo)
+    cluster_path = f"{repo.rendered_instances_dir}/{repo.cluster_name}"
+
+    def run():
+        entity_files_map, env_files_map, env_creds_files = scan_and_get_yaml_files(cluster_path)
+        shared_creds = collect_shared_credentials(env_files_map)
+        shared_content_map = read_shared_cred_files(shared_creds, cluster_path, repo.rendered_dir, False, "")
+        env_cred_map = read_env_cred_files(env_creds_files, False, "")
+        cred_reference_index = build_cred_reference_index(entity_files_map)
+        processed_cred_and_files = {}
+        for entry in payload["rotation_items"]:
+            process_entry_in_payload(PayloadEntry.from_dict(entry), repo.env_names[0], repo.cluster_name,
+                                     shared_content_map, env_cred_map, entity_files_map, cred_reference_index,
+                                     processed_cred_and_files)
+    return run
+
+
+def bench_build_pipeline(repo: SyntheticRepo):
+    # generated-config.yml is written to the working directory
+    os.chdir(repo.rendered_dir)
+    add_sys_path("build_pipegene/scripts")
+    from gitlab_ci import build_pipeline
+    from pipeline_parameters import PipelineParametersHandler
+    from validations import validate_pipeline
+
+    def run():
+        params = PipelineParametersHandler().params
+        # normally provided by pipeline parameters plugins
+        params.setdefault("DEPLOYMENT_SESSION_ID", "")
+        validate_pipeline(params)
+        build_pipeline(params)
+    return run
+
+
+def bench_handle_sd(repo: SyntheticRepo):
+    from synthetic_repo import generate_sd
+    os.chdir(repo.rendered_dir)
+    add_sys_path("scripts/build_env")
+    from envgenehelper.env_helper import Environment
+    from handle_sd import handle_sd
+    env_name = repo.env_names[0]
+    sd_data = json.dumps([generate_sd(repo.size, sd_idx) for sd_idx in range(repo.size.sd_entries)])
+    return lambda: handle_sd(Environment(repo.rendered_dir, repo.cluster_name, env_name), "json", None, sd_data,
+                             None, "basic-merge")
+
+
+def run_benchmark(name, repo: SyntheticRepo, queue):
+    # executed in a separate process: every benchmark gets clean module state and its own peak RSS
+    import logging
+    from envgenehelper import logger
+    logger.setLevel(logging.WARNING)
+    try:
+        func = globals()[f"bench_{name}"](repo)
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        queue.put({
+            "seconds": round(seconds, 3),
+            # ru_maxrss is in kilobytes on Linux
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "children_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        })
+    except BaseException as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_benchmarks(repo: SyntheticRepo, names):
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for name in names:
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_benchmark, args=(name, repo, queue))
+        saved_environ = dict(os.environ)
+        os.environ.update(get_benchmark_environ(name, repo))
+        process.start()
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        result = queue.get()
+        process.join()
+        results[name] = result
+        print(f"{name}: {json.dumps(result)}", flush=True)
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get("results", {}).get(name)
+        if not expected or "error" in expected:
+            continue
+        if "error" in result:
+            regressions.append(f"{name}: failed with {result['error']}")
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            if result[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {result[metric]} exceeds baseline {expected[metric]} "
+                                   f"by more than {int(tolerance * 100)}%")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Performance benchmarks over synthetic environments")
+    parser.add_argument("-s", "--size", choices=SIZES.keys(), default="small", help="Size of synthetic repository")
+    parser.add_argument("-b", "--benchmark", action="append", choices=BENCHMARKS,
+                        help="Benchmark to run, can be repeated. All benchmarks are run by default")
+    parser.add_argument("-d", "--work_dir", help="Directory for synthetic repository, temporary by default")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline file with previous results")
+    parser.add_argument("--update_baseline", action="store_true", help="Store results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative growth of time and memory compared to baseline")
+    parser.add_argument("-o", "--output", help="File to store results of this run")
+    args = parser.parse_args()
+
+    base_dir = args.work_dir or tempfile.mkdtemp(prefix="envgene-benchmark-")
+    size = SIZES[args.size]
+    print(f"Generating synthetic repository of size '{args.size}' in {base_dir}", flush=True)
+    repo = generate_synthetic_repo(base_dir, size)
+    results = run_benchmarks(repo, args.benchmark or BENCHMARKS)
+    report = {
+        "size": args.size,
+        "parameters": repo.size.__dict__,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if not args.work_dir:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline is stored in {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("size") != args.size:
+            print(f"Baseline {args.baseline} is measured for size '{baseline.get('size')}', skipping comparison")
+            sys.exit(0)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("Performance regressions:\n" + "\n".join(regressions))
+            sys.exit(1)
+        print("No performance regressions compared to baseline")
+    if any("error" in r for r in results.values()):
+        sys.exit(1)
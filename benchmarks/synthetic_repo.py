@@ -0,0 +1,207 @@
+import os
+import shutil
+from dataclasses import dataclass, field
+
+from envgenehelper import openFileAsString, openYaml, writeYamlToFile, writeToFile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_DATA_DIR = f"{REPO_DIR}/test_data"
+# rendered environment used as a layout for synthetic rendered environments
+BASE_ENV_DIR = f"{TEST_DATA_DIR}/test_environments/cluster-01/env-04"
+SYNTHETIC_TEMPLATE_NAME = "synthetic"
+SYNTHETIC_CLUSTER_NAME = "cluster-synthetic"
+SYNTHETIC_TEMPLATE_VERSION = "deployment-configuration-env-templates:synthetic"
+
+
+@dataclass
+class SyntheticRepoSize:
+    environments: int
+    namespaces: int  # per environment
+    applications: int  # per namespace
+    paramsets: int
+    parameters: int  # per paramset and per entity
+    credentials: int  # per environment
+    sd_entries: int  # number of SDs, applications of environment are split between them
+
+
+SIZES = {
+    "small": SyntheticRepoSize(environments=1, namespaces=3, applications=5, paramsets=5, parameters=20,
+                               credentials=10, sd_entries=2),
+    "medium": SyntheticRepoSize(environments=3, namespaces=15, applications=10, paramsets=30, parameters=50,
+                                credentials=50, sd_entries=5),
+    "large": SyntheticRepoSize(environments=10, namespaces=60, applications=14, paramsets=100, parameters=100,
+                               credentials=200, sd_entries=12),
+}
+
+
+@dataclass
+class SyntheticRepo:
+    base_dir: str
+    size: SyntheticRepoSize
+    env_names: list[str] = field(default_factory=list)
+    cluster_name: str = SYNTHETIC_CLUSTER_NAME
+
+    @property
+    def templates_dir(self):
+        return f"{self.base_dir}/templates"
+
+    @property
+    def instances_dir(self):
+        # inventories only, input for build_environment
+        return f"{self.base_dir}/instances/environments"
+
+    @property
+    def rendered_dir(self):
+        # already rendered environments, input for effective set, cred rotation, SD handling and pipeline
+        return f"{self.base_dir}/rendered"
+
+    @property
+    def rendered_instances_dir(self):
+        return f"{self.rendered_dir}/environments"
+
+
+def ns_name(idx):
+    return f"ns-{idx:03}"
+
+
+def app_name(idx):
+    return f"app-{idx:03}"
+
+
+def paramset_name(idx):
+    return f"synthetic-ps-{idx:03}"
+
+
+def cred_id(idx):
+    return f"synthetic-cred-{idx:03}"
+
+
+def cred_macro(idx, field_name="password"):
+    return f'${{creds.get("{cred_id(idx)}").{field_name}}}'
+
+
+def generate_params(prefix, count, credentials=0, cred_offset=0):
+    # every 5th parameter is a cred macro when credentials are given
+    params = {}
+    for i in range(count):
+        if credentials and i % 5 == 0:
+            params[f"{prefix}_CRED_{i:03}"] = cred_macro((cred_offset + i) % credentials, ("username", "password")[i % 2])
+        else:
+            params[f"{prefix}_PARAM_{i:03}"] = f"{prefix.lower()}-value-{i}"
+    return params
+
+
+def generate_templates(repo: SyntheticRepo):
+    size = repo.size
+    shutil.copytree(f"{TEST_DATA_DIR}/test_templates", repo.templates_dir)
+    env_templates_dir = f"{repo.templates_dir}/env_templates"
+    namespace_template_str = openFileAsString(f"{env_templates_dir}/simple/billing.yml.j2")
+    template = {
+        "tenant": "{{ templates_dir }}/env_templates/simple/tenant.yml.j2",
+        "cloud": "{{ templates_dir }}/env_templates/simple/cloud.yml.j2",
+        "namespaces": [],
+    }
+    for ns_idx in range(size.namespaces):
+        paramsets = [paramset_name((ns_idx + i) % size.paramsets) for i in range(min(3, size.paramsets))]
+        ns_template = namespace_template_str.replace("{{current_env.name}}-billing",
+                                                     f"{{{{current_env.name}}}}-{ns_name(ns_idx)}")
+        ns_template = ns_template.replace("deployParameterSets: []", f"deployParameterSets: {paramsets}")
+        template_path = f"{env_templates_dir}/{SYNTHETIC_TEMPLATE_NAME}/{ns_name(ns_idx)}.yml.j2"
+        writeToFile(template_path, ns_template)
+        template["namespaces"].append(
+            {"template_path": f"{{{{ templates_dir }}}}/env_templates/{SYNTHETIC_TEMPLATE_NAME}/{ns_name(ns_idx)}.yml.j2"})
+    writeYamlToFile(f"{env_templates_dir}/{SYNTHETIC_TEMPLATE_NAME}.yaml", template)
+    for ps_idx in range(size.paramsets):
+        paramset = {
+            "version": 1,
+            "name": paramset_name(ps_idx),
+            "parameters": generate_params("PS", size.parameters),
+            "applications": [{"appName": app_name(app_idx), "parameters": generate_params("APP", size.parameters // 4)}
+                             for app_idx in range(ps_idx % size.applications, size.applications, 3)],
+        }
+        writeYamlToFile(f"{repo.templates_dir}/parameters/{SYNTHETIC_TEMPLATE_NAME}/{paramset_name(ps_idx)}.yaml",
+                        paramset)
+
+
+def generate_env_definition(env_name):
+    env_definition = openYaml(f"{BASE_ENV_DIR}/Inventory/env_definition.yml")
+    env_definition["inventory"]["environmentName"] = env_name
+    env_definition["envTemplate"]["name"] = SYNTHETIC_TEMPLATE_NAME
+    env_definition["envTemplate"]["artifact"] = SYNTHETIC_TEMPLATE_VERSION
+    env_definition.pop("generatedVersions", None)
+    return env_definition
+
+
+def generate_sd(size: SyntheticRepoSize, sd_idx=None):
+    applications = []
+    for ns_idx in range(size.namespaces):
+        for app_idx in range(size.applications):
+            if sd_idx is None or (ns_idx * size.applications + app_idx) % size.sd_entries == sd_idx:
+                applications.append({"version": f"{app_name(app_idx)}:1.0.{sd_idx or 0}", "deployPostfix": ns_name(ns_idx)})
+    return {"version": 2.1, "type": "solutionDeploy", "deployMode": "composite", "applications": applications}
+
+
+def generate_rendered_env(repo: SyntheticRepo, env_name):
+    size = repo.size
+    env_dir = f"{repo.rendered_instances_dir}/{repo.cluster_name}/{env_name}"
+    writeYamlToFile(f"{env_dir}/Inventory/env_definition.yml", generate_env_definition(env_name))
+    writeYamlToFile(f"{env_dir}/Inventory/solution-descriptor/sd.yaml", generate_sd(size))
+    for entity in ("tenant", "cloud"):
+        entity_yaml = openYaml(f"{BASE_ENV_DIR}/{entity}.yml")
+        entity_yaml["deployParameters"] = generate_params(entity.upper(), size.parameters, size.credentials)
+        entity_yaml["technicalConfigurationParameters"] = generate_params(f"{entity.upper()}_TECH", size.parameters)
+        writeYamlToFile(f"{env_dir}/{entity}.yml", entity_yaml)
+    base_namespace = openYaml(f"{BASE_ENV_DIR}/Namespaces/billing/namespace.yml")
+    for ns_idx in range(size.namespaces):
+        ns_dir = f"{env_dir}/Namespaces/{ns_name(ns_idx)}"
+        base_namespace["name"] = f"{env_name}-{ns_name(ns_idx)}"
+        base_namespace["deployParameters"] = generate_params("NS", size.parameters, size.credentials, ns_idx)
+        base_namespace["e2eParameters"] = generate_params("NS_E2E", size.parameters // 4, size.credentials, ns_idx)
+        base_namespace["technicalConfigurationParameters"] = generate_params("NS_TECH", size.parameters)
+        writeYamlToFile(f"{ns_dir}/namespace.yml", base_namespace)
+        for app_idx in range(size.applications):
+            application = {
+                "name": app_name(app_idx),
+                "deployParameters": generate_params("APP", size.parameters // 2, size.credentials, app_idx),
+                "technicalConfigurationParameters": generate_params("APP_TECH", size.parameters // 4),
+            }
+            writeYamlToFile(f"{ns_dir}/Applications/{app_name(app_idx)}.yml", application)
+    credentials = {cred_id(i): {"type": "usernamePassword", "data": {"username": f"user-{i}", "password": f"pass-{i}"}}
+                   for i in range(size.credentials)}
+    writeYamlToFile(f"{env_dir}/Credentials/credentials.yml", credentials)
+
+
+def generate_rotation_payload(repo: SyntheticRepo, entries=None):
+    # every entry rotates a cred used by namespace level parameter of the first environment
+    size = repo.size
+    entries = entries or size.credentials
+    env_name = repo.env_names[0]
+    items = []
+    for i in range(entries):
+        ns_idx = i % size.namespaces
+        params = generate_params("NS", size.parameters, size.credentials, ns_idx)
+        cred_keys = [k for k in params if "_CRED_" in k]
+        items.append({
+            "namespace": f"{env_name}-{ns_name(ns_idx)}",
+            "context": "deployment",
+            "parameter_key": cred_keys[(i // size.namespaces) % len(cred_keys)],
+            "parameter_value": f"rotated-{i}",
+        })
+    return {"rotation_items": items}
+
+
+def generate_synthetic_repo(base_dir, size: SyntheticRepoSize) -> SyntheticRepo:
+    if os.path.exists(base_dir):
+        shutil.rmtree(base_dir)
+    repo = SyntheticRepo(base_dir=base_dir, size=size)
+    repo.env_names = [f"env-{i:03}" for i in range(size.environments)]
+    generate_templates(repo)
+    shutil.copytree(f"{TEST_DATA_DIR}/configuration", f"{base_dir}/instances/configuration")
+    shutil.copytree(f"{TEST_DATA_DIR}/configuration", f"{repo.rendered_dir}/configuration")
+    # schemas are resolved relative to the working directory
+    os.symlink(f"{REPO_DIR}/schemas", f"{repo.rendered_dir}/schemas")
+    for env_name in repo.env_names:
+        writeYamlToFile(f"{repo.instances_dir}/{repo.cluster_name}/{env_name}/Inventory/env_definition.yml",
+                        generate_env_definition(env_name))
+        generate_rendered_env(repo, env_name)
+    return repo
@@ -1,5 +1,4 @@
 from envgenehelper import *
-import copy
 import re
 
 # const
@@ -12,6 +11,7 @@ def get_app_name_from_app_vers(app_vers):
     #getting the first element of splitting
     return app_vers.split(':')[0]
 
+@timed()
 def get_application_dict_from_sd(env_name, env_dir):
     result = {}
     sd_path = f"{env_dir}/Inventory/solution-descriptor/sd.yaml"
@@ -21,7 +21,7 @@ def get_application_dict_from_sd(env_name, env_dir):
         raise ReferenceError(f"Can't generate effective set. Solution Descriptor file is not found. See logs above.")
     sd = openYaml(sd_path)
     for app in sd["applications"]:
-        logger.info(f"Processin application from sd: \n{dump_as_yaml_format(app)}")
+        logger.info("Processin application from sd: \n%s", lazy_dump_as_yaml_format(app))
         app_vers = app["version"]
         app_name = get_app_name_from_app_vers(app_vers)
         if not "deployPostfix" in app:
@@ -32,9 +32,10 @@ def get_application_dict_from_sd(env_name, env_dir):
         if not deploy_postfix in result:
             result[deploy_postfix] = []
         result[deploy_postfix].append(app_name)
-    logger.info(f"List of applications got from SD {sd_path} is:\n{dump_as_yaml_format(result)}")
+    logger.info("List of applications got from SD %s is:\n%s", sd_path, lazy_dump_as_yaml_format(result))
     return result
 
+@timed()
 def get_and_check_env_creds_or_fail(env_dir):
     envCredPath = getEnvCredentialsPath(env_dir)
     envCreds = getEnvCredentials(env_dir)
@@ -145,24 +146,21 @@ def apply_parameters_from_template(resultYaml, templateYaml, parameters_tag, cre
         templateResult = templateYaml[parameters_tag]
         apply_parameters_from_dict_recursive(templateResult, resultYaml, credentials_yaml, env_creds, comment)
 
-def get_namespace_level_parameters(env_dir, namespace, parameters_tag, credentials_yaml, env_creds):
+def get_namespace_level_parameters(env_dir, namespace, parameters_tag, credentials_yaml, env_creds, tenant_yaml, cloud_yaml, namespace_yaml):
     logger.info(f"Processing {parameters_tag} for namespace {namespace} in {env_dir}")
     result = empty_yaml()
-    tenant_yaml = openYaml(f"{env_dir}/tenant.yml")
     apply_parameters_from_template(result, tenant_yaml, parameters_tag, credentials_yaml, env_creds, "from tenant level")
-    cloud_yaml = openYaml(f"{env_dir}/cloud.yml")
     apply_parameters_from_template(result, cloud_yaml, parameters_tag, credentials_yaml, env_creds, "from cloud level")
-    namespace_yaml = openYaml(f"{env_dir}/Namespaces/{namespace}/namespace.yml")
     apply_parameters_from_template(result, namespace_yaml, parameters_tag, credentials_yaml, env_creds, "from namespace level")
     return result
 
-def getNamespaceName(env_dir, namespacePostfix):
-    namespace_yaml = openYaml(f"{env_dir}/Namespaces/{namespacePostfix}/namespace.yml")
+def getNamespaceName(namespace_yaml):
     if "name" in namespace_yaml:
         return namespace_yaml["name"]
     else:
         return None
 
+@timed()
 def generate_effective_set(env_name, env_dir, output_dir, apps_dict, env_creds):
     logger.info(f"Generating effective set for {env_name}. Environment directory is {env_dir}, output dir is {output_dir}")
     envDefinitionYaml = getEnvDefinition(env_dir)
@@ -171,44 +169,47 @@ def generate_effective_set(env_name, env_dir, output_dir, apps_dict, env_creds):
     generated_header_text = GENERATED_HEADER % templateArtifactName
     mapping_file = f"{output_dir}/mapping.yml"
     mapping_dict = {}
+    tenant_yaml = openYaml(f"{env_dir}/tenant.yml")
+    cloud_yaml = openYaml(f"{env_dir}/cloud.yml")
     for namespacePostfix in apps_dict:
         logger.info(f"Processing namespace postfix {namespacePostfix}")
+        namespace_yaml = openYaml(f"{env_dir}/Namespaces/{namespacePostfix}/namespace.yml")
         namespaceCredentialsYaml = empty_yaml()
-        namespaceDeployParameters = get_namespace_level_parameters(env_dir, namespacePostfix, "deployParameters", namespaceCredentialsYaml, env_creds)
-        namespaceTechnicalConfigurationParameters = get_namespace_level_parameters(env_dir, namespacePostfix, "technicalConfigurationParameters", namespaceCredentialsYaml, env_creds)
-        mapping_dict = {**mapping_dict, getNamespaceName(env_dir, namespacePostfix): f"{env_dir[env_dir.find('/environments'):len(env_dir)]}/{namespacePostfix}"}
+        with span("namespace_level_parameters"):
+            namespaceDeployParameters = get_namespace_level_parameters(env_dir, namespacePostfix, "deployParameters", namespaceCredentialsYaml, env_creds, tenant_yaml, cloud_yaml, namespace_yaml)
+            namespaceTechnicalConfigurationParameters = get_namespace_level_parameters(env_dir, namespacePostfix, "technicalConfigurationParameters", namespaceCredentialsYaml, env_creds, tenant_yaml, cloud_yaml, namespace_yaml)
+        mapping_dict = {**mapping_dict, getNamespaceName(namespace_yaml): f"{env_dir[env_dir.find('/environments'):len(env_dir)]}/{namespacePostfix}"}
         for app_name in apps_dict[namespacePostfix]:
             logger.info(f"Processing application {app_name}")
             application_yaml_path = f"{env_dir}/Namespaces/{namespacePostfix}/Applications/{app_name}.yml"
-            applicationCredentialsYaml = copy.deepcopy(namespaceCredentialsYaml)
-            outputDeployParamsYaml = copy.deepcopy(namespaceDeployParameters)
-            outputTechnicalConfigurationParamsYaml = copy.deepcopy(namespaceTechnicalConfigurationParameters)
+            # application level only replaces top level keys of namespace level
+            # parameters, so the namespace level values are shared, not copied
+            applicationCredentialsYaml = layer_yaml(namespaceCredentialsYaml)
+            outputDeployParamsYaml = layer_yaml(namespaceDeployParameters)
+            outputTechnicalConfigurationParamsYaml = layer_yaml(namespaceTechnicalConfigurationParameters)
             if check_file_exists(application_yaml_path):
-                appYaml = openYaml(application_yaml_path)
-                apply_parameters_from_template(outputDeployParamsYaml, appYaml, "deployParameters", applicationCredentialsYaml, env_creds, "from application level")
-                apply_parameters_from_template(outputTechnicalConfigurationParamsYaml, appYaml, "technicalConfigurationParameters", applicationCredentialsYaml, env_creds, "from application level")
+                with span("application_level_parameters"):
+                    appYaml = openYaml(application_yaml_path)
+                    apply_parameters_from_template(outputDeployParamsYaml, appYaml, "deployParameters", applicationCredentialsYaml, env_creds, "from application level")
+                    apply_parameters_from_template(outputTechnicalConfigurationParamsYaml, appYaml, "technicalConfigurationParameters", applicationCredentialsYaml, env_creds, "from application level")
                 logger.info(f"Application level parameters for {app_name} are merged from {application_yaml_path}.")
             else:
                 logger.info(f"File with parameters for application {app_name} is not found in {application_yaml_path}. Skipping application level parameters...")
             # writing deploy parameters
             deploy_params_file = f"{output_dir}/{namespacePostfix}/{app_name}/deployment-parameters.yaml"
-            writeYamlToFile(deploy_params_file, copy_yaml_and_remove_empty_dicts(outputDeployParamsYaml))
-            beautifyYaml(deploy_params_file, schema_path=EFFECTIVE_SET_SCHEMA_PATH, header_text=generated_header_text)
+            write_beautified_yaml(deploy_params_file, copy_yaml_and_remove_empty_dicts(outputDeployParamsYaml), schema_path=EFFECTIVE_SET_SCHEMA_PATH, header_text=generated_header_text)
             logger.info(f"Deployment parameters effective set stored in: {deploy_params_file}")
             # writing technical configuration parameters
             technical_params_file = f"{output_dir}/{namespacePostfix}/{app_name}/technical-configuration-parameters.yaml"
-            writeYamlToFile(technical_params_file, copy_yaml_and_remove_empty_dicts(outputTechnicalConfigurationParamsYaml))
-            beautifyYaml(technical_params_file, schema_path=EFFECTIVE_SET_SCHEMA_PATH, header_text=generated_header_text)
+            write_beautified_yaml(technical_params_file, copy_yaml_and_remove_empty_dicts(outputTechnicalConfigurationParamsYaml), schema_path=EFFECTIVE_SET_SCHEMA_PATH, header_text=generated_header_text)
             logger.info(f"Technical configuration parameters effective set stored in: {technical_params_file}")
             # writing credentials
             creds_params_file = f"{output_dir}/{namespacePostfix}/{app_name}/credentials.yaml"
-            writeYamlToFile(creds_params_file, copy_yaml_and_remove_empty_dicts(applicationCredentialsYaml))
-            beautifyYaml(creds_params_file, schema_path=EFFECTIVE_SET_SCHEMA_PATH, header_text=generated_header_text)
+            write_beautified_yaml(creds_params_file, copy_yaml_and_remove_empty_dicts(applicationCredentialsYaml), schema_path=EFFECTIVE_SET_SCHEMA_PATH, header_text=generated_header_text)
             logger.info(f"Credentials effective set stored in: {creds_params_file}")
     if mapping_dict:
         mappingYaml = convert_dict_to_yaml(mapping_dict)
-        writeYamlToFile(mapping_file, mappingYaml)
-        beautifyYaml(mapping_file, schema_path=EFFECTIVE_SET_MAPPING_SCHEMA_PATH, header_text="<namespace-name>: <path to namespace folder>")
+        write_beautified_yaml(mapping_file, mappingYaml, schema_path=EFFECTIVE_SET_MAPPING_SCHEMA_PATH, header_text="<namespace-name>: <path to namespace folder>")
         logger.info(f"Mapping file is generated: {mapping_dict}, path: {mapping_file}")
     else:
         logger.error("Failed to generate mapping file")
@@ -2,7 +2,7 @@
 from os import listdir
 
 from envgenehelper.plugin_engine import PluginEngine
-from envgenehelper import logger, get_cluster_name_from_full_name, get_environment_name_from_full_name, getEnvDefinition, get_env_instances_dir
+from envgenehelper import logger, get_cluster_name_from_full_name, get_environment_name_from_full_name, getEnvDefinition, get_env_instances_dir, span, timed, count_event, FILES_WRITTEN
 from gcip import Pipeline
 import pipeline_helper
 from pipeline_helper import get_gav_coordinates_from_build, find_predecessor_job
@@ -19,6 +19,7 @@
 
 logger.info(f"Detected environment - GitLab: {is_gitlab}, GitHub: {is_github}")
 
+@timed()
 def build_pipeline(params: dict):
     # if we are in template testing during template build
     tags=params['GITLAB_RUNNER_TAG_NAME']
@@ -65,7 +66,8 @@ def build_pipeline(params: dict):
             if params['ENV_INVENTORY_GENERATION_PARAMS']['ENV_INVENTORY_INIT']:
                 env_definition = None
             else:
-                env_definition = getEnvDefinition(get_env_instances_dir(environment_name, cluster_name, f"{ci_project_dir}/environments"))
+                with span("read_env_definition"):
+                    env_definition = getEnvDefinition(get_env_instances_dir(environment_name, cluster_name, f"{ci_project_dir}/environments"))
 
         # trigger_passport_job ->
         # get_passport_job (commit if not is_offsite) ->
@@ -130,7 +132,8 @@ def build_pipeline(params: dict):
         plugin_params['env_name'] = environment_name
         plugin_params['cluster_name'] = cluster_name
         plugin_params['full_env'] = env
-        per_env_plugin_engine.run(params=plugin_params, pipeline=pipeline, pipeline_helper=pipeline_helper)
+        with span("per_env_plugins"):
+            per_env_plugin_engine.run(params=plugin_params, pipeline=pipeline, pipeline_helper=pipeline_helper)
 
         for job in job_sequence:
             if job not in jobs_map.keys():
@@ -144,4 +147,6 @@ def build_pipeline(params: dict):
 
         logger.info(f'----------------end processing for {env}---------------------')
 
-    sorted_pipeline.write_yaml()
+    with span("write_pipeline"):
+        count_event(FILES_WRITTEN)
+        sorted_pipeline.write_yaml()
@@ -1,7 +1,7 @@
 import click
 import re
 
-from envgenehelper import logger
+from envgenehelper import logger, span
 from gitlab_ci import build_pipeline
 from validations import validate_pipeline
 from pipeline_parameters import PipelineParametersHandler
@@ -24,7 +24,8 @@ def generate_pipeline():
 
 def perform_generation():
     params = prepare_input_params()
-    validate_pipeline(params)
+    with span("validate_pipeline"):
+        validate_pipeline(params)
     build_pipeline(params)
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 import os
 from os import getenv
 
-from envgenehelper import check_for_cyrillic, logger, findAllYamlsInDir, openYaml, check_dir_exists, get_cluster_name_from_full_name, get_environment_name_from_full_name, check_environment_is_valid_or_fail, check_file_exists, validate_yaml_by_scheme_or_fail
+from envgenehelper import check_for_cyrillic, logger, findAllYamlsInDir, openYaml, openYamlReadOnly, check_dir_exists, get_cluster_name_from_full_name, get_environment_name_from_full_name, check_environment_is_valid_or_fail, check_file_exists, validate_yaml_by_scheme_or_fail
 
 project_dir = os.getenv('CI_PROJECT_DIR') or os.getenv('GITHUB_WORKSPACE')
 logger.info(f"Info about project_dir: {project_dir}")
@@ -30,7 +30,7 @@ def template_test_checks():
     yaml_files = findAllYamlsInDir(templates_dir)
     errorFound = False
     for yaml_file in yaml_files:
-      content = openYaml(yaml_file)
+      content = openYamlReadOnly(yaml_file)
       if content and check_for_cyrillic(content, yaml_file):
           logger.error(f"Cyrillic characters found in '{yaml_file}'")
           errorFound = True
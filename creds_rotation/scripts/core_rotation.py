@@ -1,11 +1,13 @@
 from typing import Optional, Dict, List, Any
 from models import PayloadEntry, RotationResult, ParameterReference, CredMap
-from utils.search_utils import get_ns_content, get_app_content, resolve_param, search_yaml_files
+from utils.search_utils import CredReferenceIndex, get_ns_content, get_app_content, resolve_param, search_yaml_files
 from utils.cred_utils import extract_credential
 from utils.error_constants import  *
 import envgenehelper.logger as logger
 from envgenehelper.errors import ValidationError, ReferenceError
+from envgenehelper.timing_helper import timed
 
+@timed()
 def process_entry_in_payload(
     entry: PayloadEntry,
     env: str,
@@ -13,6 +15,7 @@ def process_entry_in_payload(
     shared_cred_content: Dict[str, Any],
     env_cred_content: Dict[str, Any],
     entity_files_map: Dict[str, Dict[str, Any]],
+    cred_reference_index: CredReferenceIndex,
     processed_cred_and_files: Dict[str, List[CredMap]]
 ) -> Optional[RotationResult]:
 
@@ -63,6 +66,7 @@ def process_entry_in_payload(
     # Collect affected parameters
     affected = search_yaml_files(
         value_to_search,
+        cred_reference_index,
         entity_files_map,
         cred_id,
         cluster_name,
@@ -5,7 +5,7 @@
 
 import envgenehelper.logger as logger
 from core_rotation import process_entry_in_payload
-from envgenehelper import crypt, getenv_with_error
+from envgenehelper import crypt, getenv_with_error, span, timed
 from envgenehelper.errors import RuntimeError, ValidationError, ValueError
 from models import PayloadEntry, RotationResult
 from utils.cred_utils import (
@@ -18,6 +18,7 @@
 )
 from utils.error_constants import *
 from utils.file_utils import scan_and_get_yaml_files, write_cred_file_path
+from utils.search_utils import build_cred_reference_index
 from utils.yaml_utils import convert_json_to_yaml, write_yaml_to_file
 
 
@@ -65,6 +66,7 @@ def load_payload(payload: str):
         )
 
 
+@timed()
 def cred_rotation():
     start = time.time()
     logger.info(f"CPU cores available: {os.cpu_count()}")
@@ -102,28 +104,32 @@ def cred_rotation():
     convert_json_to_yaml(creds_path, cred_payload)
 
     # Decrypt the Payload file if encrypted
-    payload_data = decrypt_file(
-        envgene_age_public_key,
-        creds_path,
-        True,
-        "SOPS",
-        ErrorMessages.PAYLOAD_DECRYPT_ERROR,
-        ErrorCodes.INVALID_CONFIG_CODE,
-    )
+    with span("decrypt_payload"):
+        payload_data = decrypt_file(
+            envgene_age_public_key,
+            creds_path,
+            True,
+            "SOPS",
+            ErrorMessages.PAYLOAD_DECRYPT_ERROR,
+            ErrorCodes.INVALID_CONFIG_CODE,
+        )
 
     fileread = time.time()
     # Scan and read all required files
-    entity_files_map, env_files_map, env_creds_files = scan_and_get_yaml_files(
-        cluster_path
-    )
-    shared_creds = collect_shared_credentials(env_files_map)
-    shared_content_map = read_shared_cred_files(
-        shared_creds, cluster_path, work_dir, is_encrypted, envgene_age_public_key
-    )
-    env_cred_map = read_env_cred_files(
-        env_creds_files, is_encrypted, envgene_age_public_key
-    )
+    with span("read_files"):
+        entity_files_map, env_files_map, env_creds_files = scan_and_get_yaml_files(
+            cluster_path
+        )
+        shared_creds = collect_shared_credentials(env_files_map)
+        shared_content_map = read_shared_cred_files(
+            shared_creds, cluster_path, work_dir, is_encrypted, envgene_age_public_key
+        )
+        env_cred_map = read_env_cred_files(
+            env_creds_files, is_encrypted, envgene_age_public_key
+        )
     logger.info(f"✅ Fileread Completed in {round(time.time() - fileread, 2)} seconds.")
+    with span("build_cred_reference_index"):
+        cred_reference_index = build_cred_reference_index(entity_files_map)
 
     payload_raw = payload_data.get("rotation_items", [])
     payload_objects: List[PayloadEntry] = [
@@ -142,6 +148,7 @@ def cred_rotation():
                 shared_content_map,
                 env_cred_map,
                 entity_files_map,
+                cred_reference_index,
                 processed_cred_and_files,
             )
             if result:
@@ -164,15 +171,16 @@ def cred_rotation():
             error_code=ErrorCodes.INVALID_STATE_CODE,
         )
     if processed_cred_and_files:
-        updated_content, original_content = update_cred_content(
-            processed_cred_and_files
-        )
-        write_updated_cred_into_file(
-            updated_content, original_content, is_encrypted, envgene_age_public_key
-        )
-        write_cred_file_path(
-            list(processed_cred_and_files.keys()), f"{work_dir}/environments"
-        )
+        with span("update_cred_files"):
+            updated_content, original_content = update_cred_content(
+                processed_cred_and_files
+            )
+            write_updated_cred_into_file(
+                updated_content, original_content, is_encrypted, envgene_age_public_key
+            )
+            write_cred_file_path(
+                list(processed_cred_and_files.keys()), f"{work_dir}/environments"
+            )
     else:
         logger.error(
             "Credential IDs are not found in environment and shared credential files. Please check the files"
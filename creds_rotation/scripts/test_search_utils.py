@@ -0,0 +1,166 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from models import AffectedParameter
+from utils.file_utils import load_yaml_files_parallel
+from utils.search_utils import CONTEXT_MAP, build_cred_reference_index, find_in_index, get_affected_param_map, \
+    search_yaml_files
+
+CLUSTER_NAME = "cluster-01"
+SHARED_CRED_FILES = ["/repo/environments/credentials/shared-creds.yml"]
+ENV_CRED_FILE = "/repo/environments/cluster-01/env-01/Credentials/credentials.yml"
+
+DB_USER = '${creds.get("db-cred").username}'
+DB_PASSWORD = '${creds.get("db-cred").password}'
+TOKEN = "${creds.get('token').secret}"
+
+FIXTURE_FILES = {
+    "env-01/Namespaces/core/namespace.yml": f"""
+name: env-01-core
+deployParameters:
+  DB_USER: '{DB_USER}'
+  DB_URL: 'postgres://{DB_USER}:{DB_PASSWORD}@db:5432'
+  PLAIN: value
+e2eParameters:
+  nested:
+    token: "{TOKEN}"
+    list:
+      - "{TOKEN}"
+      - plain
+      - inner: '{DB_USER}'
+""",
+    "env-01/Namespaces/core/Applications/app-1.yml": f"""
+name: app-1
+deployParameters:
+  APP_DB_USER: '{DB_USER}'
+  APP_TOKEN: "{TOKEN}"
+technicalconfigurationparameters:
+  RUNTIME_PASSWORD: '{DB_PASSWORD}'
+  QUOTED: 'value with ''{DB_USER}'' and "quotes"'
+""",
+    "env-01/Namespaces/core/Applications/app-no-refs.yml": """
+name: app-no-refs
+deployParameters:
+  PLAIN: value
+  NUMBER: 1
+e2eParameters: {}
+""",
+    "env-01/Namespaces/billing/namespace.yml": """
+name: env-01-billing
+deployParameters:
+  PLAIN: value
+""",
+    "env-01/Namespaces/billing/Applications/app-2.yml": f"""
+name: app-2
+e2eParameters:
+  - '{DB_USER}'
+  - plain
+technicalconfigurationparameters:
+  RUNTIME_TOKEN: "{TOKEN}"
+""",
+    "env-02/Namespaces/core/namespace.yml": f"""
+name: env-02-core
+deployParameters:
+  DB_USER: '{DB_USER}'
+""",
+}
+
+
+def _find_matching_keys(data, search_pattern, is_target, context, target_key, target_context) -> List[str]:
+    # per file scan used before the cred reference index
+    results: List[str] = []
+
+    def recurse(obj, path):
+        if isinstance(obj, dict):
+            for k, v in obj.items():
+                recurse(v, path + [k])
+        elif isinstance(obj, list):
+            for idx, item in enumerate(obj):
+                if path:
+                    recurse(item, path[:-1] + [f"{path[-1]}[{idx}]"])
+                else:
+                    recurse(item, [f"[{idx}]"])
+        elif isinstance(obj, str) and search_pattern in obj:
+            final_key = ".".join(path)
+            if not (is_target and context == target_context and final_key == target_key):
+                results.append(final_key)
+    recurse(data, [])
+    return results
+
+
+def _scan_yaml_files(search_string, entity_files_map, target_key, target_context, target_file) -> List[AffectedParameter]:
+    affected: List[AffectedParameter] = []
+    for filename, content in entity_files_map.items():
+        matches = {}
+        for context in CONTEXT_MAP.values():
+            params = content.get(context, {})
+            if params and search_string in str(params):
+                affected_params = _find_matching_keys(params, search_string, filename == target_file, context,
+                                                      target_key, target_context)
+                if affected_params:
+                    matches[context] = affected_params
+        if matches:
+            affected.extend(get_affected_param_map(
+                "db-cred", CLUSTER_NAME, SHARED_CRED_FILES, ENV_CRED_FILE, filename, content, matches, entity_files_map))
+    return affected
+
+
+@pytest.fixture
+def entity_files_map(tmp_path) -> Dict[str, Dict[str, Any]]:
+    paths = []
+    for rel_path, content in FIXTURE_FILES.items():
+        path = tmp_path / "environments" / CLUSTER_NAME / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        paths.append(str(path))
+    return asyncio.run(load_yaml_files_parallel(paths))
+
+
+def _get_target_file(entity_files_map, rel_path):
+    return next(filename for filename in entity_files_map if filename.endswith(rel_path))
+
+
+@pytest.mark.parametrize("search_string", [DB_USER, DB_PASSWORD, TOKEN, '${creds.get("missing").secret}'])
+@pytest.mark.parametrize("target_rel_path, target_key, target_context", [
+    ("env-01/Namespaces/core/namespace.yml", "DB_USER", "deployParameters"),
+    ("env-01/Namespaces/core/namespace.yml", "nested.list[0]", "e2eParameters"),
+    ("env-01/Namespaces/core/Applications/app-1.yml", "RUNTIME_PASSWORD", "technicalconfigurationparameters"),
+    ("env-01/Namespaces/billing/Applications/app-2.yml", "[0]", "e2eParameters"),
+    ("env-01/Namespaces/core/Applications/app-no-refs.yml", "PLAIN", "deployParameters"),
+])
+def test_search_yaml_files_matches_per_file_scan(entity_files_map, search_string, target_rel_path, target_key,
+                                                 target_context):
+    cred_reference_index = build_cred_reference_index(entity_files_map)
+    target_file = _get_target_file(entity_files_map, target_rel_path)
+    affected = search_yaml_files(search_string, cred_reference_index, entity_files_map, "db-cred", CLUSTER_NAME,
+                                 SHARED_CRED_FILES, ENV_CRED_FILE, target_key, target_context, target_file)
+    assert affected == _scan_yaml_files(search_string, entity_files_map, target_key, target_context, target_file)
+
+
+def test_cred_reference_index_content(entity_files_map):
+    cred_reference_index = build_cred_reference_index(entity_files_map)
+    assert set(cred_reference_index) == {DB_USER, DB_PASSWORD, TOKEN}
+    db_user_files = [filename.split(f"/{CLUSTER_NAME}/")[1] for filename in cred_reference_index[DB_USER]]
+    assert db_user_files == [
+        "env-01/Namespaces/core/namespace.yml",
+        "env-01/Namespaces/core/Applications/app-1.yml",
+        "env-01/Namespaces/billing/Applications/app-2.yml",
+        "env-02/Namespaces/core/namespace.yml",
+    ]
+    # files without cred references are not indexed
+    assert not any(filename.endswith(("app-no-refs.yml", "billing/namespace.yml"))
+                   for files in cred_reference_index.values() for filename in files)
+    core_ns_file = _get_target_file(entity_files_map, "env-01/Namespaces/core/namespace.yml")
+    assert cred_reference_index[DB_USER][core_ns_file] == {
+        "deployParameters": ["DB_USER", "DB_URL"],
+        "e2eParameters": ["nested.list[2].inner"],
+    }
+    assert find_in_index(cred_reference_index, core_ns_file, DB_USER, True, "DB_URL", "deployParameters") == {
+        "deployParameters": ["DB_USER"],
+        "e2eParameters": ["nested.list[2].inner"],
+    }
+    assert find_in_index(cred_reference_index, core_ns_file, TOKEN, False, "", "") == {
+        "e2eParameters": ["nested.token", "nested.list[0]"],
+    }
@@ -8,13 +8,14 @@
 from .yaml_utils import get_nested_target_key
 from .file_utils import openJson
 from pathlib import Path
-from envgenehelper import crypt, writeYamlToFile, openYaml, dump_as_yaml_format
+from envgenehelper import crypt, writeYamlToFile, openYaml, lazy_dump_as_yaml_format
 import envgenehelper.logger as logger
 from utils.error_constants import  *
+from utils.search_utils import CRED_MACRO_PATTERN
 from envgenehelper.errors import ValidationError, ValueError
 from multiprocessing import Pool, cpu_count
 
-pattern  = re.compile(r"\$\{creds\.get\([\"']([^\"']+)[\"']\)\.(username|password|secret)\}")
+pattern = CRED_MACRO_PATTERN
 
 def collect_shared_credentials(env_files_map: Dict[str, Any]) -> Set[str]:
     shared_cred_names: Set[str] = set()
@@ -24,7 +25,7 @@ def collect_shared_credentials(env_files_map: Dict[str, Any]) -> Set[str]:
             shared_cred_names.update(creds)
     
     if shared_cred_names:
-        logger.info(f"✅ Inventory shared master creds list collected from all envs:\n{dump_as_yaml_format(sorted(shared_cred_names))}")
+        logger.info("✅ Inventory shared master creds list collected from all envs:\n%s", lazy_dump_as_yaml_format(sorted(shared_cred_names)))
     
     return shared_cred_names
 
@@ -8,6 +8,7 @@
 from utils.search_utils import trim_path_from_environments
 import envgenehelper.logger as logger
 from envgenehelper.errors import  ValidationError
+from envgenehelper.timing_helper import count_event, FILES_READ
 try:
     logger.info("Loading CLoader")
     from yaml import CLoader as Loader
@@ -17,6 +18,7 @@
 
 async def read_yaml_file(path: str) -> tuple[str, dict]:
     try:
+        count_event(FILES_READ)
         async with aiofiles.open(path, mode='r') as f:
             content = await f.read()
         data = yaml.load(content, Loader=Loader)
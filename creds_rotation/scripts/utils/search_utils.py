@@ -28,9 +28,15 @@ def resolve_context(context: str) -> str:
     return REVERSE_CONTEXT_MAP.get(context.lower(), "")
 
 
-def find_matching_keys(data: dict, search_pattern: str, is_target: bool,
-                       context: str, target_key: str, target_context: str) -> list[str]:
-    results: List[str] = []
+CRED_MACRO_PATTERN = re.compile(r"\$\{creds\.get\([\"']([^\"']+)[\"']\)\.(username|password|secret)\}")
+
+# cred macro -> entity file -> context -> parameter keys referencing the macro
+CredReferenceIndex = Dict[str, Dict[str, Dict[str, List[str]]]]
+
+
+def collect_cred_references(data: dict) -> Dict[str, List[str]]:
+    """Returns parameter keys of data for every cred macro used in its values"""
+    results: Dict[str, List[str]] = {}
 
     def recurse(obj, path):
         if isinstance(obj, dict):
@@ -44,24 +50,40 @@ def recurse(obj, path):
                     recurse(item, base_path + [last_key_with_index])
                else:
                     recurse(item, [f"[{idx}]"])
-        elif isinstance(obj, str) and search_pattern in obj:
-            final_key = ".".join(path)
-            if  is_target and context == target_context and final_key == target_key:
-                logger.debug("skipping target param")
-            else:
-                results.append(final_key)
+        elif isinstance(obj, str) and "${creds.get(" in obj:
+            final_key = ".".join(map(str, path))
+            for macro in dict.fromkeys(m.group(0) for m in CRED_MACRO_PATTERN.finditer(obj)):
+                results.setdefault(macro, []).append(final_key)
     recurse(data, [])
     return results
 
 
-def find_in_yaml(data: dict, search_pattern: str, is_target: bool, target_key: str, target_context: str) -> Dict[str, List[str]]:
+def build_cred_reference_index(entity_files_map: Dict[str, Dict[str, Any]]) -> CredReferenceIndex:
+    """Scans all entity files once, so every payload entry is resolved with a single lookup"""
+    index: CredReferenceIndex = {}
+    for filename, content in entity_files_map.items():
+        for context in CONTEXT_MAP.values():
+            params = content.get(context, {})
+            if not params:
+                continue
+            for macro, param_keys in collect_cred_references(params).items():
+                index.setdefault(macro, {}).setdefault(filename, {})[context] = param_keys
+    logger.info(f"Cred reference index built: {len(index)} cred macros in {len(entity_files_map)} files")
+    return index
+
+
+def find_in_index(cred_reference_index: CredReferenceIndex, filename: str, search_pattern: str, is_target: bool,
+                  target_key: str, target_context: str) -> Dict[str, List[str]]:
     matches = {}
-    for context in CONTEXT_MAP.values():
-        params = data.get(context, {})
-        if params and search_pattern in str(params):
-            affected_params = find_matching_keys(params, search_pattern, is_target, context, target_key, target_context)
-            if affected_params:
-                matches[context] = affected_params
+    for context, param_keys in cred_reference_index.get(search_pattern, {}).get(filename, {}).items():
+        affected_params = []
+        for key in param_keys:
+            if is_target and context == target_context and key == target_key:
+                logger.debug("skipping target param")
+            else:
+                affected_params.append(key)
+        if affected_params:
+            matches[context] = affected_params
     return matches
 
 
@@ -174,16 +196,15 @@ def get_affected_param_map(
     return result
 
 
-def search_yaml_files(search_string: str, entity_files_map: Dict[str, Dict[str, Any]], cred_id: str, cluster_name: str, shared_cred_files: List[str], env_cred_file: str, target_key: str,
+def search_yaml_files(search_string: str, cred_reference_index: CredReferenceIndex, entity_files_map: Dict[str, Dict[str, Any]], cred_id: str, cluster_name: str, shared_cred_files: List[str], env_cred_file: str, target_key: str,
  target_context: str, target_file: str) -> List[AffectedParameter]:
     affected: List[AffectedParameter] = []
 
-    for filename, content in entity_files_map.items():
-
+    for filename in cred_reference_index.get(search_string, {}):
         is_target = filename == target_file
-        matches = find_in_yaml(content, search_string, is_target, target_key, target_context)
+        matches = find_in_index(cred_reference_index, filename, search_string, is_target, target_key, target_context)
         if matches:
             affected.extend(get_affected_param_map(
-            cred_id, cluster_name, shared_cred_files, env_cred_file, filename, content, matches, entity_files_map
+            cred_id, cluster_name, shared_cred_files, env_cred_file, filename, entity_files_map[filename], matches, entity_files_map
             ))
     return affected
@@ -5,21 +5,29 @@
 import envgenehelper.logger as logger
 from utils.error_constants import  *
 from envgenehelper.errors import ValidationError, ValueError
+from envgenehelper.timing_helper import count_event, FILES_READ, FILES_WRITTEN
+from envgenehelper.file_helper import invalidate_dir_index
 
 def write_yaml_to_file(file_path: str, contents: Any) -> None:
     logger.debug(f"Writing YAML to file: {file_path}")
+    if not os.path.exists(file_path):
+        invalidate_dir_index(file_path)
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    count_event(FILES_WRITTEN)
     with open(file_path, "w") as f:
         yaml.safe_dump(contents, f, sort_keys=False)
 
 def convert_json_to_yaml(file_path: str, json_data: Any):
     # Convert and write to a YAML file
+    if not os.path.exists(file_path):
+        invalidate_dir_index(file_path)
     with open(file_path, "w") as yaml_file:
         yaml.dump(json_data, yaml_file, sort_keys=False)
 
 
 def get_content_form_file(file: str) -> Any:
         try:
+            count_event(FILES_READ)
             with open(file, "r", encoding="utf-8") as f:
                 return yaml.safe_load(f)
         except FileNotFoundError as e:
@@ -15,6 +15,7 @@
 from artifact_searcher.utils.models import Registry, Application, FileExtension, Credentials, ArtifactInfo
 
 DEFAULT_REQUEST_TIMEOUT = 30
+DEFAULT_CONCURRENCY_LIMIT = 10
 WORKSPACE = limit = os.getenv("WORKSPACE", Path(tempfile.gettempdir()) / "zips")
 
 
@@ -124,7 +125,7 @@ async def check_artifact_by_full_url_async(app: Application, version: str, repo,
         except Exception as e:
             logger.warning(f"Failed while checking if artifact is present with URL {full_url}, {e}")
     else:
-        logger.warning(f"Repository {repo_pointer} is not configured for registry {app.registry.registry_name}")
+        logger.warning(f"Repository {repo_pointer} is not configured for registry {app.registry.name}")
 
 
 def get_repo_value_pointer_dict(registry: Registry):
@@ -153,21 +154,66 @@ async def check_artifact_async(app: Application, artifact_extension: FileExtensi
             - tuple[str, str]: A pair of (repository name, repository pointer/alias in CMDB).
             Returns None if the artifact could not be resolved
     """
+    async with aiohttp.ClientSession() as session:
+        return await check_artifact_in_session_async(session, app, artifact_extension, version)
+
 
+async def check_artifact_in_session_async(session, app: Application, artifact_extension: FileExtension,
+                                          version: str) -> Optional[tuple[str, tuple[str, str]]]:
+    """Same as check_artifact_async, but uses the given session"""
     folder = version_to_folder_name(version)
     stop_event = asyncio.Event()
 
     repos_dict = get_repo_value_pointer_dict(app.registry)
 
-    async with aiohttp.ClientSession() as session:
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(
+            check_artifact_by_full_url_async(app, version, repo, artifact_extension, folder,
+                                             stop_event, session)) for repo in repos_dict.items()]
+    for task in tasks:
+        result = task.result()
+        if result is not None:
+            return result
+
+
+async def download_json_content_async(session, url: str) -> dict[str, Any]:
+    async with session.get(url) as response:
+        response.raise_for_status()
+        json_data = await response.json(content_type=None)
+    logger.debug(f'Got the json data by url {url}')
+    return json_data
+
+
+async def resolve_and_download_json_async(session, semaphore: asyncio.Semaphore, app: Application,
+                                          artifact_extension: FileExtension, version: str) -> dict[str, Any] | None:
+    async with semaphore:
+        artifact_info = await check_artifact_in_session_async(session, app, artifact_extension, version)
+        if not artifact_info:
+            return None
+        url, _ = artifact_info
+        return await download_json_content_async(session, url)
+
+
+async def download_all_json_async(artifacts: list[tuple[Application, str]], artifact_extension: FileExtension,
+                                  concurrency_limit: int | None = None) -> list[dict[str, Any] | None]:
+    """
+    Resolves and downloads json content of all artifacts concurrently in one pooled session.
+    At most concurrency_limit artifacts are processed at the same time.
+
+    Returns:
+        list: json content for every (application, version) pair in the same order,
+        None for artifacts that were not found in any repository
+    """
+    if concurrency_limit is None:
+        concurrency_limit = int(os.getenv("CONCURRENCY_LIMIT", DEFAULT_CONCURRENCY_LIMIT))
+    semaphore = asyncio.Semaphore(max(concurrency_limit, 1))
+    connector = aiohttp.TCPConnector(limit=int(os.getenv("TCP_CONNECTION_LIMIT", 100)))
+    timeout = aiohttp.ClientTimeout(total=float(os.getenv("REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)))
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
         async with asyncio.TaskGroup() as tg:
-            tasks = [tg.create_task(
-                check_artifact_by_full_url_async(app, version, repo, artifact_extension, folder,
-                                                 stop_event, session)) for repo in repos_dict.items()]
-        for task in tasks:
-            result = task.result()
-            if result is not None:
-                return result
+            tasks = [tg.create_task(resolve_and_download_json_async(session, semaphore, app, artifact_extension, version))
+                     for app, version in artifacts]
+    return [task.result() for task in tasks]
 
 
 def unzip_file(artifact_id: str, app_name: str, app_version: str, zip_url: str):
@@ -0,0 +1,41 @@
+from aiohttp import web
+
+from artifact_searcher import artifact
+from artifact_searcher.utils.models import Application, FileExtension, Registry
+
+SD_CONTENT = {"version": "2.1", "type": "solutionDeploy", "applications": []}
+RELEASE_REPO = "releases"
+
+
+def create_app(name: str, domain: str) -> Application:
+    registry = Registry.model_validate({
+        "name": "local",
+        "mavenConfig": {"targetSnapshot": "snapshots", "targetStaging": "staging", "targetRelease": RELEASE_REPO,
+                        "repositoryDomainName": domain},
+        "dockerConfig": {},
+    })
+    return Application(name=name, artifact_id=name, group_id="org.qubership", registry=registry,
+                       solution_descriptor=True)
+
+
+async def test_download_all_json_async(aiohttp_server):
+    requested = []
+
+    async def handle(request):
+        requested.append((request.method, request.path))
+        if request.path.startswith(f"/{RELEASE_REPO}/") and "missing" not in request.path:
+            return web.json_response({**SD_CONTENT, "name": request.path.split("/")[-3]})
+        return web.Response(status=404)
+
+    server_app = web.Application()
+    server_app.router.add_route("*", "/{tail:.*}", handle)
+    server = await aiohttp_server(server_app)
+    domain = str(server.make_url("/"))
+
+    artifacts = [(create_app(f"sd-{i}", domain), "1.0.0") for i in range(5)]
+    artifacts.append((create_app("missing", domain), "1.0.0"))
+    results = await artifact.download_all_json_async(artifacts, FileExtension.JSON, concurrency_limit=2)
+
+    assert [r["name"] if r else None for r in results] == ["sd-0", "sd-1", "sd-2", "sd-3", "sd-4", None]
+    assert ("GET", "/releases/org/qubership/sd-0/1.0.0/sd-0-1.0.0.json") in requested
+    assert not any(method == "GET" and "missing" in path for method, path in requested)
@@ -4,9 +4,11 @@
 from .business_helper import *
 from .config_helper import get_envgene_config_yaml
 from .json_helper import *
+from .schema_helper import get_schema_data, get_schema_validator, validate_by_schema_path, clear_schema_registry
 from .collections_helper import *
-from .logger import logger
+from .logger import logger, collect_log_records, LazyLogValue
 from .creds_helper import *
 from .sd_merge_helper import *
 from .yaml_validator import checkByWhiteList, checkByBlackList, checkSchemaValidationFailed, getSchemaValidationErrorMessage
 from .crypt import decrypt_file, encrypt_file, decrypt_all_cred_files_for_env, encrypt_all_cred_files_for_env, is_encrypted
+from .timing_helper import span, timed, count_event, enable_timing, is_timing_enabled, get_timing_report, format_timing_report, FILES_READ, FILES_WRITTEN, SUBPROCESSES
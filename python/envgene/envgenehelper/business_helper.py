@@ -5,8 +5,8 @@
 from .collections_helper import merge_lists
 from .yaml_helper import findYamls, openYaml, yaml, writeYamlToFile, store_value_to_yaml, validate_yaml_by_scheme_or_fail
 from .json_helper import findJsons
-from .file_helper import getAbsPath, extractNameFromFile, check_file_exists, check_dir_exists, getParentDirName, extractNameFromDir
-from .collections_helper import dump_as_yaml_format
+from .file_helper import getAbsPath, extractNameFromFile, check_file_exists, check_dir_exists, getParentDirName, extractNameFromDir, get_dir_index, is_path_matching, find_in_dir
+from .collections_helper import dump_as_yaml_format, lazy_dump_as_yaml_format
 from .logger import logger
 from ruyaml.scalarstring import DoubleQuotedScalarString
 
@@ -20,13 +20,15 @@
 DEFAULT_PASSPORT_NAME = "passport"
 DEFAULT_PASSPORT_DIR_NAME = "cloud-passport"
 INV_GEN_CREDS_PATH = "Inventory/credentials/inventory_generation_creds.yml"
+RESOURCE_EXTENSIONS = (".yml", ".yaml")
+JSON_RESOURCE_EXTENSIONS = (".json",)
 
 
 def find_env_instances_dir(env_name, instances_dir) :
     logger.debug(f"Searching for directory {env_name} in {instances_dir}")
-    dirPointer = pathlib.Path(instances_dir)
-    dirList = list(dirPointer.rglob(f"{env_name}/Inventory"))
-    logger.debug(f"Search results: {dump_as_yaml_format(dirList)}")
+    dirList = [pathlib.Path(path) for path in find_in_dir(instances_dir, "Inventory")
+               if f"/{path}".endswith(f"/{env_name}/Inventory")]
+    logger.debug("Search results: %s", lazy_dump_as_yaml_format(dirList))
     if len(dirList) > 1:
         logger.error(f"Duplicate directories for {env_name} found in {instances_dir}: \n\t" + ",\n\t".join(str(x) for x in dirList))
         raise ReferenceError(f"Duplicate directories for {env_name} found. Please specify env name with environment folder e.g. sdp-dev/{env_name}.")
@@ -88,30 +90,51 @@ def findResourcesBottomTop(sourceDir, stopParentDir, pattern, notPattern="", add
     if parentPath not in sourcePath.parents:
         logger.error(f"Error while finding resources. {stopParentDirAbs} is not in parents of {sourceDirAbs}.")
         raise ReferenceError(f"Error while finding resources. {stopParentDirAbs} is not in parents of {sourceDirAbs}. See logs above.")
-    return __findResourcesBottomTop__(sourceDir, stopParentDir, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern, searchJsons, result, foundMap)
-
-def __findResourcesBottomTop__(sourceDir, stopParentDir, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern, searchJsons, result, foundMap):
-    logger.debug(f"Searching files in {sourceDir}. Pattern:{pattern}\nNotPattern:{notPattern}\nResult:\n{dump_as_yaml_format(result)}. foundMap:\n{foundMap}")
-    findResults = findYamls(sourceDir, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern)
-    if searchJsons:
-        findResults = merge_lists(findResults, findJsons(sourceDir, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern))
-    for foundFile in findResults:
-        fileName = extractNameFromFile(foundFile)
-        if fileName not in foundMap:
-            foundMap[fileName] = foundFile
-            if len(findResults) == 1:
-                yamlPath = findResults[0]
-                result.append(yamlPath)
-                logger.debug(f"Resource added from: {yamlPath}")
-            elif len(findResults) > 1:
-                logger.error(f"Duplicate resource file with pattern {pattern} found in {sourceDir}: \n\t" + ",\n\t".join(str(x) for x in findResults))
-                raise ReferenceError(f"Duplicate resource file with pattern {pattern} found. See logs above.")
-    if getAbsPath(sourceDir) == getAbsPath(stopParentDir):
-        logger.debug(f"Reached parent dir {stopParentDir}. Stopping.")
-        return result
-    else:
-        parentEnvDirPath = str(pathlib.Path(sourceDir).parent)
-        return __findResourcesBottomTop__(parentEnvDirPath, stopParentDir, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern, searchJsons, result, foundMap)
+    # directories from sourceDir up to stopParentDir, paths are relative to stopParentDir
+    levels = []
+    levelDir = sourceDir
+    while getAbsPath(levelDir) != stopParentDirAbs:
+        levels.append((levelDir, str(pathlib.Path(getAbsPath(levelDir)).relative_to(parentPath))))
+        levelDir = str(pathlib.Path(levelDir).parent)
+    levels.append((levelDir, ""))
+    resources = __findResourcesInIndex__(levelDir, stopParentDirAbs, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern, searchJsons)
+    for levelDir, levelRelPath in levels:
+        logger.debug("Searching files in %s. Pattern:%s\nNotPattern:%s\nResult:\n%s. foundMap:\n%s", levelDir, pattern, notPattern, lazy_dump_as_yaml_format(result), foundMap)
+        prefix = levelRelPath + "/" if levelRelPath else ""
+        findResults = [filePath for relPath, filePath in resources if relPath.startswith(prefix)]
+        for foundFile in findResults:
+            fileName = extractNameFromFile(foundFile)
+            if fileName not in foundMap:
+                foundMap[fileName] = foundFile
+                if len(findResults) == 1:
+                    yamlPath = findResults[0]
+                    result.append(yamlPath)
+                    logger.debug(f"Resource added from: {yamlPath}")
+                elif len(findResults) > 1:
+                    logger.error(f"Duplicate resource file with pattern {pattern} found in {levelDir}: \n\t" + ",\n\t".join(str(x) for x in findResults))
+                    raise ReferenceError(f"Duplicate resource file with pattern {pattern} found. See logs above.")
+    logger.debug(f"Reached parent dir {stopParentDir}. Stopping.")
+    return result
+
+def __findResourcesInIndex__(topDir, topDirAbs, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern, searchJsons):
+    # Returns (path relative to topDir, path as found by findYamls/findJsons) for all matching resources under topDir.
+    # File paths built from any level between sourceDir and topDir are the same strings, so patterns are
+    # checked only once against the whole tree and the result is cached until the index is invalidated.
+    index = get_dir_index(topDirAbs)
+    topDirStr = str(pathlib.Path(topDir))
+    cacheKey = ("resources", topDirStr, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern, searchJsons)
+    if cacheKey in index.lookup_cache:
+        return index.lookup_cache[cacheKey]
+    extensions = RESOURCE_EXTENSIONS + (JSON_RESOURCE_EXTENSIONS if searchJsons else ())
+    resources = []
+    for relPath in index.find_in_subdir():
+        if not relPath.endswith(extensions):
+            continue
+        filePath = relPath if topDirStr == "." else f"{topDirStr.rstrip('/')}/{relPath}"
+        if is_path_matching(filePath, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern):
+            resources.append((relPath, filePath))
+    index.lookup_cache[cacheKey] = resources
+    return resources
 
 def getTemplateArtifactName(env_definition_yaml):
     if "artifact" in env_definition_yaml["envTemplate"]:
@@ -227,6 +250,20 @@ def get_cluster_name_from_full_name(env):
 def get_environment_name_from_full_name(env):
     return env.split('/')[1].strip()
 
+def parse_env_names(env_names):
+    # ENV_NAMES format: <cluster-name>/<env-name> separated by new lines or commas
+    result = []
+    for full_env_name in env_names.replace(",", "\n").split("\n"):
+        full_env_name = full_env_name.strip()
+        if not full_env_name:
+            continue
+        if full_env_name.count("/") != 1:
+            logger.error(f"Invalid environment name '{full_env_name}'. Expected '<cluster-name>/<env-name>'")
+            raise ReferenceError(f"Invalid environment names list. See logs above.")
+        cluster_name, env_name = full_env_name.split("/")
+        result.append((cluster_name, env_name))
+    return result
+
 def find_cloud_passport_definition(env_instances_dir, instances_dir) :
     # trying to get explicit passport name from env_definition
     inventoryYaml = getEnvDefinition(env_instances_dir)
@@ -1,6 +1,7 @@
 from io import StringIO
 from pprint import pformat
 from .yaml_helper import yaml
+from .logger import LazyLogValue
 import copy
 
 def merge_lists(list1, list2) :
@@ -22,6 +23,10 @@ def dump_as_yaml_format(collection) :
     else:
         return pformat(collection)
 
+def lazy_dump_as_yaml_format(collection):
+    # for log messages: logger.info("Result: \n%s", lazy_dump_as_yaml_format(result))
+    return LazyLogValue(dump_as_yaml_format, collection)
+
 def get_merged_param_value(key, source_dict, override_dict):
     if isinstance(override_dict[key], dict):
         # if source_dict has the same key
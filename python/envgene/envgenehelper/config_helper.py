@@ -2,7 +2,7 @@
 import json
 
 from envgenehelper import openYaml, get_empty_yaml
-import jsonschema
+from .schema_helper import validate_by_schema_path
 from .logger import logger
 
 base_dir = getenv('CI_PROJECT_DIR', '')
@@ -16,15 +16,13 @@
 FERNET_ID = "Fernet"
 SOPS_ID = "SOPS"
 
-def get_schema(schema_name):
+def get_schema_path(schema_name):
     schemas_folder = "schemas"
     potential_paths = ['module', 'build_env', '']
     for pp in potential_paths:
         filepath = path.join(pp, schemas_folder, schema_name)
-        if not path.isfile(filepath):
-            continue
-        with open(filepath) as f:
-            return json.load(f)
+        if path.isfile(filepath):
+            return filepath
     return None
 
 def validate_config_file(config_yaml):
@@ -36,10 +34,10 @@ def validate_config_file(config_yaml):
     crypt_backend = config_yaml.get('crypt_backend', 'Fernet')
     crypt_enabled = config_yaml.get('crypt', 'true')
     schema_name = 'config.schema.json'
-    schema_data = get_schema(schema_name)
+    schema_path = get_schema_path(schema_name)
     logger.debug(f'Checking yaml with schema: {schema_name}')
-    if schema_data:
-        jsonschema.validate(config_yaml, schema_data)
+    if schema_path:
+        validate_by_schema_path(config_yaml, schema_path)
     else:
         logger.info(f'Failed to find schema: {schema_name}')
 
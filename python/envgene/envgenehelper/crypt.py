@@ -1,15 +1,19 @@
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from os import getenv, path
 from typing import Callable
 
+from .business_helper import getenv_with_error, parse_env_names
 from .config_helper import get_envgene_config_yaml
-from .yaml_helper import openYaml, get_empty_yaml
+from .yaml_helper import openYaml, openYamlReadOnly, get_empty_yaml
 from .file_helper import check_file_exists, get_files_with_filter
 from .logger import logger
+from .timing_helper import timed
 
-from .crypt_backends.fernet_handler import crypt_Fernet, extract_value_Fernet, is_encrypted_Fernet
-from .crypt_backends.sops_handler import crypt_SOPS, extract_value_SOPS, is_encrypted_SOPS
+from .crypt_backends.fernet_handler import crypt_Fernet_with_status, extract_value_Fernet, is_encrypted_Fernet
+from .crypt_backends.sops_handler import crypt_SOPS_with_status, crypt_SOPS_in_place, extract_value_SOPS, is_encrypted_SOPS
 
 
 config = get_envgene_config_yaml()
@@ -23,8 +27,8 @@
 TARGET_PARENT_DIRS = re.compile(r'/(configuration|environments)(/|$)')
 
 CRYPT_FUNCTIONS = {
-    'SOPS': crypt_SOPS,
-    'Fernet': crypt_Fernet
+    'SOPS': crypt_SOPS_with_status,
+    'Fernet': crypt_Fernet_with_status
 }
 
 IS_ENCRYPTED_FUNCTIONS = {
@@ -47,20 +51,32 @@ def _handle_missing_file(file_path, default_yaml, allow_default):
         raise FileNotFoundError(f"{file_path} not found or is not a file")
     return default_yaml()
 
-def decrypt_file(file_path, *, secret_key=None, in_place=True, public_key=None, crypt_backend=None, ignore_is_crypt=False,
-                 default_yaml: Callable = get_empty_yaml, allow_default=False, is_crypt=None, **kwargs):
+def decrypt_file(file_path, **kwargs):
+    return decrypt_file_with_status(file_path, **kwargs)[0]
+
+def decrypt_file_with_status(file_path, *, secret_key=None, in_place=True, public_key=None, crypt_backend=None, ignore_is_crypt=False,
+                             default_yaml: Callable = get_empty_yaml, allow_default=False, is_crypt=None, **kwargs):
+    """
+    Returns decrypted content and whether the file was decrypted or skipped
+    """
     res = _handle_missing_file(file_path, default_yaml, allow_default)
     if res != 0:
-        return res
+        return res, False
     crypt_backend = crypt_backend if crypt_backend else CRYPT_BACKEND
     is_crypt = is_crypt if is_crypt is not None else IS_CRYPT
     if not ignore_is_crypt and not is_crypt:
         logger.info("'crypt' is set to 'false', skipping decryption")
-        return openYaml(file_path)
+        return openYaml(file_path), False
     return CRYPT_FUNCTIONS[crypt_backend](file_path=file_path, secret_key=secret_key, in_place=in_place, public_key=public_key, mode='decrypt')
 
-def encrypt_file(file_path, *, secret_key=None, in_place=True, public_key=None, crypt_backend=None, ignore_is_crypt=False, is_crypt=None,
-                 minimize_diff=False, old_file_path=None, default_yaml: Callable = get_empty_yaml, allow_default=False, **kwargs):
+def encrypt_file(file_path, **kwargs):
+    return encrypt_file_with_status(file_path, **kwargs)[0]
+
+def encrypt_file_with_status(file_path, *, secret_key=None, in_place=True, public_key=None, crypt_backend=None, ignore_is_crypt=False, is_crypt=None,
+                             minimize_diff=False, old_file_path=None, default_yaml: Callable = get_empty_yaml, allow_default=False, **kwargs):
+    """
+    Returns encrypted content and whether the file was encrypted or skipped
+    """
     if minimize_diff:
         if not old_file_path:
             raise ValueError('minimize_diff was set to true but old_file_path was not specified')
@@ -72,12 +88,12 @@ def encrypt_file(file_path, *, secret_key=None, in_place=True, public_key=None,
             logger.warning(f"Cred file at {old_file_path} is not encrypted, minimize_diff parameter is ignored")
     res = _handle_missing_file(file_path, default_yaml, allow_default)
     if res != 0:
-        return res
+        return res, False
     crypt_backend = crypt_backend if crypt_backend else CRYPT_BACKEND
     is_crypt = is_crypt if is_crypt is not None else IS_CRYPT
     if not ignore_is_crypt and not is_crypt:
         logger.info("'crypt' is set to 'false', skipping encryption")
-        return openYaml(file_path)
+        return openYaml(file_path), False
     return CRYPT_FUNCTIONS[crypt_backend](file_path=file_path, secret_key=secret_key, in_place=in_place, public_key=public_key, mode='encrypt', minimize_diff=minimize_diff, old_file_path=old_file_path)
 
 def extract_encrypted_data(file_path, attribute_str):
@@ -101,22 +117,25 @@ def is_cred_file(fp: str) -> bool:
         return True
     return False
 
-def get_all_necessary_cred_files() -> set[str]:
-    env_names = getenv("ENV_NAMES", None)
-    if not env_names:
-        logger.info("ENV_NAMES not set, running in test mode")
-        return get_files_with_filter(BASE_DIR, is_cred_file)
-    if env_names == "env_template_test":
-        logger.info("Running in env_template_test mode")
-        return get_files_with_filter(BASE_DIR, is_cred_file)
-    env_names_list = env_names.split("\n")
+def get_all_necessary_cred_files(environments=None) -> set[str]:
+    """
+    @param environments: list of (cluster name, env name), environments from ENV_NAMES are used if it is not set
+    """
+    if environments is None:
+        env_names = getenv("ENV_NAMES", None)
+        if not env_names:
+            logger.info("ENV_NAMES not set, running in test mode")
+            return get_files_with_filter(BASE_DIR, is_cred_file)
+        if env_names == "env_template_test":
+            logger.info("Running in env_template_test mode")
+            return get_files_with_filter(BASE_DIR, is_cred_file)
+        environments = parse_env_names(env_names)
 
     sources = set()
     sources.add("configuration")
     sources.add(path.join("environments", "credentials"))
 
-    for env_name in env_names_list:
-        cluster, env = env_name.strip().split("/")
+    for cluster, env in environments:
         env_specific_source_locations = ["credentials", "cloud-passport", "cloud-passports", env] # relative to BASE_DIR/<cluster_name>/
         for location in env_specific_source_locations:
             sources.add(path.join("environments", cluster, location))
@@ -140,20 +159,84 @@ def check_for_encrypted_files(files):
         if is_encrypted(f):
             raise ValueError(err_msg.format(f))
 
-def decrypt_all_cred_files_for_env(**kwargs):
-    files = get_all_necessary_cred_files()
+CRYPT_STATUS_PROCESSED = "processed"
+CRYPT_STATUS_SKIPPED = "skipped"
+CRYPT_STATUS_FAILED = "failed"
+
+@dataclass
+class CryptResult:
+    file_path: str
+    status: str
+    error: Exception = None
+
+def _get_crypt_workers_count(files_count, max_workers=None):
+    max_workers = max_workers if max_workers else (os.cpu_count() or 1)
+    return max(1, min(files_count, max_workers))
+
+def _crypt_file_for_batch(file_path, mode, crypt_backend, sops_public_key, kwargs):
+    try:
+        if sops_public_key:
+            # single parse of the file is used both for the state check and the emptiness check
+            is_processed = crypt_SOPS_in_place(file_path, openYamlReadOnly(file_path), sops_public_key, mode)
+        else:
+            crypt_func = encrypt_file_with_status if mode == "encrypt" else decrypt_file_with_status
+            _, is_processed = crypt_func(file_path, crypt_backend=crypt_backend, **kwargs)
+    except Exception as e:
+        return CryptResult(file_path, CRYPT_STATUS_FAILED, e)
+    return CryptResult(file_path, CRYPT_STATUS_PROCESSED if is_processed else CRYPT_STATUS_SKIPPED)
+
+def crypt_files(files, mode, max_workers=None, **kwargs) -> dict[str, CryptResult]:
+    """
+    Encrypts or decrypts files in place with bounded parallelism (CPU count by default).
+    Returns result for every file, keyed by file path. Errors are not raised, they are reported in results.
+    """
+    crypt_backend = kwargs.pop('crypt_backend', None) or CRYPT_BACKEND
+    sops_public_key = None
+    # SOPS files are processed by direct sops invocation, unless caller needs behaviour of encrypt_file/decrypt_file
+    is_plain_in_place = kwargs.get('in_place', True) and not kwargs.get('minimize_diff', False)
+    is_crypt = kwargs.get('is_crypt')
+    is_crypt = is_crypt if is_crypt is not None else IS_CRYPT
+    if crypt_backend == 'SOPS' and is_plain_in_place and (kwargs.get('ignore_is_crypt') or is_crypt):
+        secret_key = kwargs.get('secret_key') or getenv_with_error("ENVGENE_AGE_PRIVATE_KEY")
+        sops_public_key = kwargs.get('public_key') or getenv_with_error("PUBLIC_AGE_KEYS")
+        os.environ['SOPS_AGE_KEY'] = secret_key
+    files = sorted(files)
+    results = {}
+    if not files:
+        return results
+    workers_count = _get_crypt_workers_count(len(files), max_workers)
+    logger.debug(f"Starting {mode} of {len(files)} files with {workers_count} workers")
+    with ThreadPoolExecutor(max_workers=workers_count) as executor:
+        futures = [executor.submit(_crypt_file_for_batch, f, mode, crypt_backend, sops_public_key, kwargs) for f in files]
+        for future in futures:
+            result = future.result()
+            results[result.file_path] = result
+    return results
+
+def _check_crypt_results(results, mode):
+    failed = [r for r in results.values() if r.status == CRYPT_STATUS_FAILED]
+    for r in failed:
+        logger.error(f"Failed to {mode} file {r.file_path}: {r.error!r}")
+    if failed:
+        raise failed[0].error
+
+@timed()
+def decrypt_all_cred_files_for_env(environments=None, **kwargs):
+    files = get_all_necessary_cred_files(environments)
     if not IS_CRYPT:
         check_for_encrypted_files(files)
     else:
-        for f in files:
-            decrypt_file(f, **kwargs)
+        results = crypt_files(files, "decrypt", **kwargs)
+        _check_crypt_results(results, "decrypt")
         logger.debug("Decrypted next cred files:")
         logger.debug(files)
+        return results
 
-def encrypt_all_cred_files_for_env(**kwargs):
-    files = get_all_necessary_cred_files()
+@timed()
+def encrypt_all_cred_files_for_env(environments=None, **kwargs):
+    files = get_all_necessary_cred_files(environments)
     logger.debug("Attempting to encrypt(if crypt is true) next files:")
     logger.debug(files)
-    for f in files:
-        encrypt_file(f, **kwargs)
-
+    results = crypt_files(files, "encrypt", **kwargs)
+    _check_crypt_results(results, "encrypt")
+    return results
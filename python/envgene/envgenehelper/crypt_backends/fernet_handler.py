@@ -3,7 +3,7 @@
 from cryptography.fernet import Fernet
 
 from ..business_helper import getenv_with_error
-from ..yaml_helper import openYaml, writeYamlToFile, get_or_create_nested_yaml_attribute
+from ..yaml_helper import openYaml, openYamlReadOnly, writeYamlToFile, get_or_create_nested_yaml_attribute
 from ..logger import logger
 
 from .constants import *
@@ -53,23 +53,29 @@ def extract_value_Fernet(file_path: str, attribute_str: str) -> Any:
     return value
 
 def crypt_Fernet(file_path, secret_key, in_place, mode, minimize_diff=None, old_file_path=None, *args, **kwargs):
+    return crypt_Fernet_with_status(file_path, secret_key, in_place, mode, minimize_diff, old_file_path)[0]
+
+def crypt_Fernet_with_status(file_path, secret_key, in_place, mode, minimize_diff=None, old_file_path=None, *args, **kwargs):
+    # returns resulting content and whether the file content was encrypted or decrypted
     if not secret_key:
         secret_key = getenv_with_error("SECRET_KEY")
     data = openYaml(file_path)
     fernet = Fernet(secret_key)
     fernet_func = _decrypt_Fernet if mode == "decrypt" else _encrypt_Fernet
     if isinstance(data, dict):
+        is_processed = bool(data) and (mode != "decrypt" or _is_encrypted_Fernet(data))
         new_data = _apply_Fernet_to_dict(data, fernet, fernet_func)
     else:
+        is_processed = False
         new_data = {}
     if minimize_diff and old_file_path and mode != "decrypt":
         _remove_unnecessary_changes(new_data, old_file_path, fernet)
     if in_place:
         writeYamlToFile(file_path, new_data)
-    return new_data
+    return new_data, is_processed
 
 def is_encrypted_Fernet(file_path):
-    content = openYaml(file_path)
+    content = openYamlReadOnly(file_path)
     return _is_encrypted_Fernet(content)
 
 def _is_encrypted_Fernet(data):
@@ -4,14 +4,18 @@
 import shutil
 
 from ..business_helper import getenv_with_error
-from ..yaml_helper import openYaml, readYaml, get_or_create_nested_yaml_attribute, writeYamlToFile, dumpYamlToStr
+from ..file_helper import invalidate_document_cache
+from ..yaml_helper import openYaml, openYamlReadOnly, readYaml, get_or_create_nested_yaml_attribute, writeYamlToFile, dumpYamlToStr
 from ..logger import logger
+from ..timing_helper import count_event, timed, SUBPROCESSES
 
 from .constants import *
 
+@timed("sops")
 def _run_SOPS(arg_str, return_codes_to_ignore=None):
     return_codes_to_ignore = return_codes_to_ignore if return_codes_to_ignore else []
     sops_command = f'sops {arg_str}'
+    count_event(SUBPROCESSES)
     result = subprocess.run(sops_command, shell=True, capture_output=True, text=True, timeout=5)
     if "metadata not found" in result.stderr:
         raise ValueError('File was already decrypted')
@@ -51,6 +55,7 @@ def _sops_edit(file_path, new_content, public_key):
         os.environ['EDITOR'] = editor_path
         sops_args = f'edit --age {public_key} {file_path}'
         _run_SOPS(sops_args, [200]) # 200 is FileHasNotBeenModified error code
+        invalidate_document_cache(file_path)
     finally:
         if os.path.exists(editor_path):
             os.remove(editor_path)
@@ -70,6 +75,11 @@ def _get_minimized_diff(file_path, old_file_path, public_key):
     return content_with_minimized_diff
 
 def crypt_SOPS(file_path, secret_key, in_place, public_key, mode, minimize_diff=False, old_file_path=None, *args, **kwargs):
+    return crypt_SOPS_with_status(file_path, secret_key, in_place, public_key, mode, minimize_diff, old_file_path)[0]
+
+def crypt_SOPS_with_status(file_path, secret_key, in_place, public_key, mode, minimize_diff=False, old_file_path=None,
+                           *args, **kwargs):
+    # returns resulting content and whether the file was encrypted or decrypted
     if not secret_key:
         secret_key = getenv_with_error("ENVGENE_AGE_PRIVATE_KEY")
     if not public_key:
@@ -79,37 +89,65 @@ def crypt_SOPS(file_path, secret_key, in_place, public_key, mode, minimize_diff=
     file_content = openYaml(file_path)
     if file_content == {}:
         logger.info(f'File is empty, skipping de/encryption. Path: {file_path}')
-        return file_content
+        return file_content, False
 
     is_encrypted = is_encrypted_SOPS(file_path)
     if is_encrypted and mode == "encrypt":
         logger.warning(f'File is already encrypted. Path: {file_path}')
-        return openYaml(file_path)
+        return openYaml(file_path), False
     if not is_encrypted and mode == "decrypt":
         logger.warning(f'File is not encrypted. Path: {file_path}')
-        return openYaml(file_path)
+        return openYaml(file_path), False
 
     if minimize_diff and mode != "decrypt":
         result = _get_minimized_diff(file_path, old_file_path, public_key)
         if in_place:
             writeYamlToFile(file_path, result)
     else:
-        sops_args = f' --{SOPS_MODES[mode]} '
-        if mode != "decrypt":
-            sops_args += f' --unencrypted-regex "{UNENCRYPTED_REGEX_STR}"'
-        if in_place:
-            sops_args += ' --in-place'
-        sops_args += f' -age {public_key} {file_path}'
+        sops_args = _get_SOPS_crypt_args(file_path, public_key, mode, in_place)
         try:
             result = _run_SOPS(sops_args).stdout
+            if in_place:
+                invalidate_document_cache(file_path)
         except ValueError as e:
             logger.warning(f'{str(e)}. Path: {file_path}')
-            return openYaml(file_path)
+            return openYaml(file_path), False
 
     logger.info(f'The file has been {mode}ed. Path: {file_path}')
     if not in_place:
-        return readYaml(result)
-    return openYaml(file_path)
+        return readYaml(result), True
+    return openYaml(file_path), True
+
+def _get_SOPS_crypt_args(file_path, public_key, mode, in_place):
+    sops_args = f' --{SOPS_MODES[mode]} '
+    if mode != "decrypt":
+        sops_args += f' --unencrypted-regex "{UNENCRYPTED_REGEX_STR}"'
+    if in_place:
+        sops_args += ' --in-place'
+    sops_args += f' -age {public_key} {file_path}'
+    return sops_args
+
+def crypt_SOPS_in_place(file_path, file_content, public_key, mode):
+    # expects that SOPS age key is set in environment variables and
+    # file_content is the already parsed content of file_path
+    if file_content == {}:
+        logger.info(f'File is empty, skipping de/encryption. Path: {file_path}')
+        return False
+    is_encrypted = 'sops' in file_content.keys()
+    if is_encrypted and mode == "encrypt":
+        logger.warning(f'File is already encrypted. Path: {file_path}')
+        return False
+    if not is_encrypted and mode == "decrypt":
+        logger.warning(f'File is not encrypted. Path: {file_path}')
+        return False
+    try:
+        _run_SOPS(_get_SOPS_crypt_args(file_path, public_key, mode, in_place=True))
+        invalidate_document_cache(file_path)
+    except ValueError as e:
+        logger.warning(f'{str(e)}. Path: {file_path}')
+        return False
+    logger.info(f'The file has been {mode}ed. Path: {file_path}')
+    return True
 
 def extract_value_SOPS(file_path, attribute_str):
     attribute_list = attribute_str.split('.')
@@ -123,7 +161,7 @@ def extract_value_SOPS(file_path, attribute_str):
     return result
 
 def is_encrypted_SOPS(file_path):
-    content = openYaml(file_path)
+    content = openYamlReadOnly(file_path)
     if 'sops' in content.keys():
         return True
     return False
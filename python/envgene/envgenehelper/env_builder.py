@@ -0,0 +1,692 @@
+import ast
+import base64
+import datetime
+import fnmatch
+import json
+import os
+import re
+import shlex
+import socket
+import shutil
+from urllib.parse import urlsplit
+
+import yaml as pyyaml
+from jinja2 import ChainableUndefined, FileSystemLoader, StrictUndefined, TemplateAssertionError, TemplateRuntimeError, \
+    Undefined
+from jinja2.nativetypes import NativeEnvironment, NativeTemplate
+
+from .file_helper import deleteFile, invalidate_dir_index, openFileAsString, writeToFile
+from .logger import logger
+from .timing_helper import timed
+
+# In-process implementation of env-builder playbook (env-builder/main.yaml and its roles).
+# Templates are rendered with Jinja2 configured as Ansible does it: blocks are trimmed, trailing
+# newlines of templates are preserved, undefined variables fail rendering, results of variables
+# and lookups which look like python literals are converted to them. Files are written with the
+# same markers as ansible.builtin.blockinfile, so rendering result is the same as with ansible.
+
+BLOCK_BEGIN_MARKER = "# BEGIN ANSIBLE MANAGED BLOCK\n"
+BLOCK_END_MARKER = "# END ANSIBLE MANAGED BLOCK\n"
+APPREGDEF_PATTERNS = ["*.yaml.j2", "*.yml.j2", "*.j2", "*.yaml", "*.yml"]
+PARAMSET_TEMPLATE_PATTERNS = ["*.yml.j2", "*.yaml.j2"]
+# values which are passed to env-builder playbook as environment variables
+RENDER_VARS = ["env", "cluster_name", "templates_dir", "env_instances_dir", "render_dir", "template_version",
+               "cloud_passport_file_path", "cmdb_url", "output_dir", "render_parameters_dir"]
+_SAFE_LOADER = getattr(pyyaml, "CSafeLoader", pyyaml.SafeLoader)
+# messages of jinja errors for filters and tests which are not provided by in-process rendering
+UNSUPPORTED_JINJA_ERROR = re.compile(r"^No (filter|test) named ")
+
+
+class UnsupportedFeatureError(ReferenceError):
+    # templates use ansible feature which is not implemented by in-process rendering,
+    # they can be rendered with env-builder playbook
+    pass
+
+
+class AnsibleUndefined(ChainableUndefined, StrictUndefined):
+    # attributes of undefined values are undefined too, usage of undefined value in output fails
+    __slots__ = ()
+
+
+class Json2Python(ast.NodeTransformer):
+    def visit_Name(self, node):
+        if node.id not in ("true", "false", "null"):
+            return node
+        return ast.Constant(value={"true": True, "false": False, "null": None}[node.id])
+
+
+def _ansible_eval(text):
+    # the same conversion as ansible applies to templating results when convert_data is enabled
+    if not isinstance(text, str) or not (text.startswith(("{", "[")) or text in ("True", "False")):
+        return text
+    try:
+        return ast.literal_eval(ast.fix_missing_locations(Json2Python().visit(ast.parse(text, mode="eval"))))
+    except (TypeError, ValueError, SyntaxError, MemoryError):
+        return text
+
+
+def _to_text(value):
+    return value if isinstance(value, str) else str(value)
+
+
+def _text_concat(nodes):
+    return "".join(_to_text(v) for v in nodes)
+
+
+def _eval_concat(nodes):
+    nodes = list(nodes)
+    if not nodes:
+        return ""
+    return _ansible_eval(_to_text(nodes[0]) if len(nodes) == 1 else _text_concat(nodes))
+
+
+def _fail_on_undefined(value):
+    # undefined values nested into dicts and lists fail rendering too
+    if isinstance(value, dict):
+        for v in value.values():
+            _fail_on_undefined(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _fail_on_undefined(v)
+    elif isinstance(value, Undefined):
+        value._fail_with_undefined_error()
+    return value
+
+
+def _finalize(value):
+    return "" if _fail_on_undefined(value) is None else value
+
+
+def _count_newlines_from_end(text):
+    i = len(text)
+    while i > 0 and text[i - 1] == "\n":
+        i -= 1
+    return len(text) - i
+
+
+# filters and tests of ansible.builtin collection used in templates
+def _to_yaml(a, **kw):
+    default_flow_style = kw.pop("default_flow_style", None)
+    return pyyaml.dump(a, Dumper=pyyaml.SafeDumper, allow_unicode=True, default_flow_style=default_flow_style, **kw)
+
+
+def _to_nice_yaml(a, indent=4, sort_keys=True, **kw):
+    return pyyaml.dump(a, Dumper=pyyaml.SafeDumper, indent=indent, allow_unicode=True, default_flow_style=False,
+                       sort_keys=sort_keys, **kw)
+
+
+def _from_yaml(data):
+    if isinstance(data, str):
+        return pyyaml.load(data, Loader=_SAFE_LOADER)
+    return data
+
+
+def _from_yaml_all(data):
+    if isinstance(data, str):
+        return list(pyyaml.load_all(data, Loader=_SAFE_LOADER))
+    return data
+
+
+def _to_json(a, **kw):
+    return json.dumps(a, **kw)
+
+
+def _to_nice_json(a, indent=4, sort_keys=True, **kw):
+    return json.dumps(a, indent=indent, sort_keys=sort_keys, separators=(",", ": "), **kw)
+
+
+def _to_bool(a):
+    if a is None or isinstance(a, bool):
+        return a
+    if isinstance(a, str):
+        a = a.lower()
+    return a in ("yes", "on", "1", "true", 1)
+
+
+def _combine(*terms, recursive=False, list_merge="replace"):
+    result = {}
+    for term in terms:
+        for dictionary in (term if isinstance(term, list) else [term]):
+            result = _merge_hash(result, dictionary, recursive)
+    return result
+
+
+def _merge_hash(x, y, recursive=True):
+    result = x.copy()
+    for key, value in y.items():
+        if recursive and isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _merge_hash(result[key], value, recursive)
+        else:
+            result[key] = value
+    return result
+
+
+def _regex_flags(ignorecase=False, multiline=False):
+    flags = 0
+    if ignorecase:
+        flags |= re.I
+    if multiline:
+        flags |= re.M
+    return flags
+
+
+def _regex_replace(value="", pattern="", replacement="", ignorecase=False, multiline=False, count=0):
+    return re.compile(pattern, flags=_regex_flags(ignorecase, multiline)).sub(replacement, _to_text(value), count)
+
+
+def _regex_findall(value, regex, multiline=False, ignorecase=False):
+    return re.findall(regex, _to_text(value), _regex_flags(ignorecase, multiline))
+
+
+def _regex_search(value, regex, *args, ignorecase=False, multiline=False):
+    match = re.search(regex, _to_text(value), _regex_flags(ignorecase, multiline))
+    if not match:
+        return None
+    if not args:
+        return match.group()
+    items = []
+    for arg in args:
+        if arg.startswith("\\g<"):
+            items.append(match.group(arg[3:-1]))
+        else:
+            items.append(match.group(int(arg[1:])))
+    return items
+
+
+def _ternary(value, true_val, false_val, none_val=None):
+    if value is None and none_val is not None:
+        return none_val
+    return true_val if value else false_val
+
+
+def _mandatory(a, msg=None):
+    if isinstance(a, Undefined):
+        raise ReferenceError(msg or "Mandatory variable not defined.")
+    return a
+
+
+def _dict2items(mydict, key_name="key", value_name="value"):
+    return [{key_name: k, value_name: v} for k, v in mydict.items()]
+
+
+def _items2dict(mylist, key_name="key", value_name="value"):
+    return dict((item[key_name], item[value_name]) for item in mylist)
+
+
+def _flatten(mylist, levels=None, skip_nulls=True):
+    result = []
+    for element in mylist:
+        if skip_nulls and element in (None, "None", "null"):
+            continue
+        if isinstance(element, list):
+            if levels is None:
+                result.extend(_flatten(element, skip_nulls=skip_nulls))
+            elif levels >= 1:
+                result.extend(_flatten(element, levels=levels - 1, skip_nulls=skip_nulls))
+            else:
+                result.append(element)
+        else:
+            result.append(element)
+    return result
+
+
+def _urlsplit(value, query=""):
+    parts = urlsplit(value)
+    results = {"fragment": parts.fragment, "hostname": parts.hostname, "netloc": parts.netloc,
+               "password": parts.password, "path": parts.path, "port": parts.port, "query": parts.query,
+               "scheme": parts.scheme, "username": parts.username}
+    if query:
+        if query not in results:
+            raise ReferenceError(f"urlsplit: unknown URL component: {query}")
+        return results[query]
+    return results
+
+
+def _b64encode(string, encoding="utf-8"):
+    return base64.b64encode(string.encode(encoding)).decode(encoding)
+
+
+def _b64decode(string, encoding="utf-8"):
+    return base64.b64decode(string.encode(encoding)).decode(encoding)
+
+
+def _match(value, pattern="", ignorecase=False, multiline=False):
+    return re.match(pattern, _to_text(value), _regex_flags(ignorecase, multiline)) is not None
+
+
+def _search(value, pattern="", ignorecase=False, multiline=False):
+    return re.search(pattern, _to_text(value), _regex_flags(ignorecase, multiline)) is not None
+
+
+FILTERS = {
+    "to_yaml": _to_yaml,
+    "to_nice_yaml": _to_nice_yaml,
+    "from_yaml": _from_yaml,
+    "from_yaml_all": _from_yaml_all,
+    "to_json": _to_json,
+    "to_nice_json": _to_nice_json,
+    "from_json": json.loads,
+    "bool": _to_bool,
+    "combine": _combine,
+    "regex_replace": _regex_replace,
+    "regex_findall": _regex_findall,
+    "regex_search": _regex_search,
+    "regex_escape": re.escape,
+    "ternary": _ternary,
+    "mandatory": _mandatory,
+    "dict2items": _dict2items,
+    "items2dict": _items2dict,
+    "flatten": _flatten,
+    "type_debug": lambda o: o.__class__.__name__,
+    "urlsplit": _urlsplit,
+    "b64encode": _b64encode,
+    "b64decode": _b64decode,
+    "basename": os.path.basename,
+    "dirname": os.path.dirname,
+    "expanduser": os.path.expanduser,
+    "realpath": os.path.realpath,
+    "splitext": os.path.splitext,
+    "quote": lambda a: shlex.quote(_to_text(a)),
+    "split": lambda a, sep=None, maxsplit=-1: _to_text(a).split(sep, maxsplit),
+    "zip": lambda *args: list(zip(*args)),
+}
+TESTS = {
+    "match": _match,
+    "search": _search,
+    "regex": lambda value, pattern="", ignorecase=False, multiline=False, match_type="search":
+        (_match if match_type == "match" else _search)(value, pattern, ignorecase, multiline),
+    "file": os.path.isfile,
+    "directory": os.path.isdir,
+    "exists": lambda p: os.path.exists(os.path.expanduser(p)),
+    "abs": os.path.isabs,
+    "truthy": lambda value, convert_bool=False: bool(_to_bool(value) if convert_bool else value),
+    "falsy": lambda value, convert_bool=False: not (_to_bool(value) if convert_bool else value),
+    "subset": lambda a, b: set(a) <= set(b),
+    "superset": lambda a, b: set(a) >= set(b),
+    "contains": lambda seq, value: value in seq,
+}
+
+
+class EnvBuilderTemplate(NativeTemplate):
+    def render(self, *args, **kwargs):
+        # concat of the environment is used instead of the one of NativeEnvironment
+        ctx = self.new_context(dict(*args, **kwargs))
+        try:
+            return self.environment.concat(self.root_render_func(ctx))
+        except Exception:
+            return self.environment.handle_exception()
+
+
+class EnvBuilderEnvironment(NativeEnvironment):
+    # results of variables and lookups are converted as ansible does it for templated values
+    template_class = EnvBuilderTemplate
+    concat = staticmethod(_eval_concat)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, trim_blocks=True, undefined=AnsibleUndefined, finalize=_finalize, **kwargs)
+        for name, func in FILTERS.items():
+            self.filters[name] = self.filters[f"ansible.builtin.{name}"] = func
+        for name, func in TESTS.items():
+            self.tests[name] = self.tests[f"ansible.builtin.{name}"] = func
+
+
+class EnvBuilderTextEnvironment(EnvBuilderEnvironment):
+    # template files written by ansible.builtin.template are not converted
+    concat = staticmethod(_text_concat)
+
+
+class EnvBuilderRenderer:
+    def __init__(self, variables):
+        self.variables = variables
+        self._environments = {}
+
+    def get_environment(self, searchpath="", text=False):
+        key = (searchpath, text)
+        if key not in self._environments:
+            env_class = EnvBuilderTextEnvironment if text else EnvBuilderEnvironment
+            env = env_class(loader=FileSystemLoader(searchpath or "."))
+            env.globals["lookup"] = self.lookup
+            env.globals["query"] = env.globals["q"] = lambda name, *terms, **kwargs: self.lookup(name, *terms, wantlist=True, **kwargs)
+            self._environments[key] = env
+        return self._environments[key]
+
+    def render_string(self, data, variables=None, searchpath="", text=False):
+        env = self.get_environment(searchpath, text)
+        try:
+            result = env.from_string(data).render({**self.variables, **(variables or {})})
+        except (TemplateAssertionError, TemplateRuntimeError) as e:
+            if UNSUPPORTED_JINJA_ERROR.match(str(e)):
+                raise UnsupportedFeatureError(f"{e} Not supported by in-process rendering") from e
+            raise
+        if isinstance(result, str):
+            # jinja removes single trailing newline of template, it is returned as ansible does it
+            missing_newlines = _count_newlines_from_end(data) - _count_newlines_from_end(result)
+            if missing_newlines > 0:
+                result += "\n" * missing_newlines
+        return result
+
+    def template(self, value, variables=None):
+        # templating of variable value, nested values of dicts and lists are templated too
+        if isinstance(value, str):
+            if "{{" not in value and "{%" not in value and "{#" not in value:
+                return value
+            return self.render_string(value, variables)
+        if isinstance(value, dict):
+            return {k: self.template(v, variables) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.template(v, variables) for v in value]
+        return value
+
+    def render_template_file(self, path, variables=None, text=False):
+        template_vars = get_template_vars(path)
+        template_vars.update(variables or {})
+        return self.render_string(openFileAsString(path), template_vars, os.path.dirname(path), text)
+
+    def lookup(self, name, *terms, wantlist=False, **kwargs):
+        name = name.replace("ansible.builtin.", "")
+        if name == "file":
+            result = [lookup_file(term, kwargs.get("rstrip", True), kwargs.get("lstrip", False)) for term in terms]
+        elif name == "env":
+            result = [os.getenv(term, kwargs.get("default", "")) for term in terms]
+        elif name == "template":
+            result = [self.render_template_file(term, kwargs.get("template_vars")) for term in terms]
+        else:
+            raise UnsupportedFeatureError(f"Lookup plugin '{name}' is not supported by in-process rendering")
+        if wantlist:
+            return result
+        return ",".join(_to_text(r) for r in result) if len(result) != 1 else result[0]
+
+
+def get_template_vars(path):
+    stat = os.stat(path)
+    return {
+        "template_host": socket.gethostname(),
+        "template_path": path,
+        "template_fullpath": os.path.abspath(path),
+        "template_mtime": datetime.datetime.fromtimestamp(stat.st_mtime),
+        "template_uid": stat.st_uid,
+        "template_run_date": datetime.datetime.now(),
+        "template_destpath": None,
+    }
+
+
+def lookup_file(path, rstrip=True, lstrip=False):
+    content = openFileAsString(path)
+    if rstrip:
+        content = content.rstrip()
+    if lstrip:
+        content = content.lstrip()
+    return content
+
+
+def to_block(value):
+    # non string values of module parameters are converted to string by ansible
+    if value is None:
+        return ""
+    return _to_text(value)
+
+
+def write_block_to_file(path, block):
+    # ansible.builtin.blockinfile with default markers, block is inserted at the end of file
+    # or replaces the block which is already in file
+    lines = []
+    if os.path.exists(path):
+        lines = openFileAsString(path).splitlines(True)
+    block_lines = []
+    if block:
+        if not block.endswith("\n"):
+            block += "\n"
+        block_lines = [BLOCK_BEGIN_MARKER] + block.splitlines(True) + [BLOCK_END_MARKER]
+    begin = end = None
+    for i, line in enumerate(lines):
+        if line == BLOCK_BEGIN_MARKER:
+            begin = i
+        if line == BLOCK_END_MARKER:
+            end = i
+    if begin is None or end is None:
+        begin = len(lines)
+    elif begin < end:
+        lines[begin:end + 1] = []
+    else:
+        lines[end:begin + 1] = []
+        begin = end
+    if begin > 0 and not lines[begin - 1].endswith("\n"):
+        lines[begin - 1] += "\n"
+    lines[begin:begin] = block_lines
+    writeToFile(path, "".join(lines))
+
+
+def find_files(path, patterns):
+    # ansible.builtin.find with recursion, patterns are matched against file names
+    result = []
+    if not os.path.isdir(path):
+        logger.debug(f"Directory {path} does not exist, no files found")
+        return result
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                result.append(os.path.join(root, name))
+    return result
+
+
+def strip_template_extension(path):
+    return os.path.basename(path).replace(".yml.j2", "").replace(".yaml.j2", "")
+
+
+def load_yaml_file(path):
+    return _from_yaml(openFileAsString(path))
+
+
+def create_solution_structure(renderer: EnvBuilderRenderer, template_name, current_env_dir, templates_dir):
+    # generate_solution_structure role
+    sd_files = [f"{current_env_dir}/Inventory/solution-descriptor/sd.{ext}" for ext in ("yaml", "yml")]
+    sd_files = [f for f in sd_files if os.path.exists(f)]
+    if not sd_files:
+        return None
+    sd_config = load_yaml_file(sd_files[0])
+    if not isinstance(sd_config, dict) or not isinstance(sd_config.get("applications"), list):
+        raise ReferenceError(f"Missing or invalid 'applications' key in root of {sd_files[0]}")
+    for item in sd_config["applications"]:
+        if not isinstance(item, dict) or not isinstance(item.get("version"), str) or not isinstance(item.get("deployPostfix"), str):
+            raise ReferenceError(f"Invalid application entry: {_to_nice_json(item)}")
+    # the last found descriptor is used, as in the role
+    descriptors = [f"{templates_dir}/env_templates/{template_name}.{ext}" for ext in ("yml", "yaml")]
+    descriptors = [f for f in descriptors if os.path.exists(f)]
+    if not descriptors:
+        raise ReferenceError(f"Template descriptor was not found in {templates_dir}/env_templates")
+    env_template_data = load_yaml_file(descriptors[-1])
+    if "namespaces" not in env_template_data:
+        raise ReferenceError(f"Namespaces are not defined in template descriptor {descriptors[-1]}")
+    namespace_template_paths = [ns["template_path"] for ns in env_template_data["namespaces"]]
+    namespace_template_paths = renderer.render_string(json.dumps(namespace_template_paths))
+    logger.info(f"Namespace templates: {namespace_template_paths}")
+    postfix_template_map = dict(zip([os.path.basename(p).split(".")[0] for p in namespace_template_paths],
+                                    namespace_template_paths))
+
+    solution_structure = {}
+    for item in sd_config["applications"]:
+        version_full = item["version"]
+        solution = version_full.split(":")[0]
+        version = version_full.split(":")[1]
+        postfix = item["deployPostfix"]
+        ns_val = None
+        path = postfix_template_map.get(postfix)
+        if path:
+            name_lines = [line for line in lookup_file(path).split("\n") if re.match(r"^\s*name:", line)]
+            if not name_lines:
+                raise ReferenceError(f"Name of namespace is not found in namespace template {path}")
+            ns_val = name_lines[0].split(":", 1)[1].strip().replace('"', "")
+        solution_structure = _combine(solution_structure, {solution: {postfix: {"version": version, "namespace": ns_val}}},
+                                      recursive=True)
+    # macros in namespace names are rendered as a template with formatting of the role
+    solution_structure = _ansible_eval(_regex_replace(solution_structure, r"({{)\s*([^}\s]+)\s*(}})", r"\1 \2 \3"))
+    if isinstance(solution_structure, (dict, list)):
+        solution_structure = json.dumps(solution_structure)
+    solution_structure = renderer.render_string(solution_structure)
+    logger.info(f"Solution structure: {solution_structure}")
+    return solution_structure
+
+
+def render_namespaces(renderer: EnvBuilderRenderer, namespaces, current_env_dir):
+    # generate_namespaces role
+    for namespace in namespaces:
+        if namespace.get("deploy_postfix"):
+            namespace_template_name = namespace["deploy_postfix"]
+        else:
+            namespace_template_name = strip_template_extension(namespace["template_path"])
+        namespace_dir = f"{current_env_dir}/Namespaces/{namespace_template_name}"
+        logger.info(f"Generating namespace {namespace_template_name} from {namespace['template_path']}")
+        template_override = namespace.get("template_override", "")
+        role_vars = {"namespace": namespace, "_namespace_template_name": namespace_template_name,
+                     "template_override": template_override}
+        write_block_to_file(f"{namespace_dir}/namespace.yml",
+                            to_block(renderer.lookup("template", namespace["template_path"], template_vars=role_vars)))
+        if template_override != "":
+            write_block_to_file(f"{namespace_dir}/namespace.yml_override", to_block(template_override))
+
+
+def render_paramsets(renderer: EnvBuilderRenderer, render_parameters_dir):
+    # generate_paramsets role
+    for paramset_path in find_files(render_parameters_dir, PARAMSET_TEMPLATE_PATTERNS):
+        paramset_template_name = strip_template_extension(paramset_path)
+        paramset_target_path = paramset_path.replace(".yml.j2", ".yml").replace(".yaml.j2", ".yml")
+        try:
+            content = renderer.render_template_file(paramset_path, {
+                "_paramset_path": paramset_path,
+                "_paramset_template_name": paramset_template_name,
+                "_paramset_target_path": paramset_target_path}, text=True)
+            writeToFile(paramset_target_path, content)
+            logger.info(f"Successfully generated paramset: {paramset_template_name}")
+        except UnsupportedFeatureError:
+            raise
+        except Exception as e:
+            logger.info(f"Skipped paramset {paramset_template_name} - template variables not available in current environment: {e}")
+            if os.path.exists(paramset_target_path):
+                deleteFile(paramset_target_path)
+        deleteFile(paramset_path)
+
+
+def get_appregdef_config(output_dir, cluster_name):
+    candidates = [f"{output_dir}/{cluster_name}/configuration/appregdef_config.yaml",
+                  f"{output_dir}/{cluster_name}/configuration/appregdef_config.yml",
+                  f"{os.path.dirname(output_dir)}/configuration/appregdef_config.yaml",
+                  f"{os.path.dirname(output_dir)}/configuration/appregdef_config.yml"]
+    for path in candidates:
+        if os.path.exists(path):
+            try:
+                return load_yaml_file(path)
+            except Exception as e:
+                logger.warning(f"Failed to load {path}, no overrides are used for appdefs and regdefs: {e}")
+                return {}
+    return {}
+
+
+def get_overrides(appregdef_config, key):
+    overrides = appregdef_config.get(key) if isinstance(appregdef_config, dict) else None
+    if not isinstance(overrides, dict) or "overrides" not in overrides:
+        return {}
+    return overrides["overrides"]
+
+
+def render_appregdefs(renderer: EnvBuilderRenderer, templates_dir, current_env_dir, output_dir, cluster_name):
+    # generate_appregdefs role
+    appdef_templates = find_files(f"{templates_dir}/appdefs", APPREGDEF_PATTERNS)
+    regdef_templates = find_files(f"{templates_dir}/regdefs", APPREGDEF_PATTERNS)
+    logger.info(f"AppDefs Found: {len(appdef_templates)}, RegDefs Found: {len(regdef_templates)}")
+    if not appdef_templates and not regdef_templates:
+        return
+    appregdef_config = get_appregdef_config(output_dir, cluster_name)
+    appdefs = {"overrides": get_overrides(appregdef_config, "appdefs")}
+    regdefs = {"overrides": get_overrides(appregdef_config, "regdefs")}
+    for path in appdef_templates:
+        appdef_meta = dict(re.findall(r'^\s*(name|artifactId|groupId):\s*"([^"]+)"', lookup_file(path), re.M))
+        if not appdef_meta.get("name"):
+            raise ReferenceError(f"Template {path} is missing name metadata")
+        variables = {"appdefs": appdefs}
+        for key in ("artifactId", "groupId"):
+            if key in appdef_meta:
+                variables[key] = appdef_meta[key]
+        if "artifactId" in appdef_meta and "groupId" in appdef_meta:
+            variables["app_lookup_key"] = f"{appdef_meta['groupId']}:{appdef_meta['artifactId']}"
+        content = renderer.render_template_file(path, variables, text=True)
+        writeToFile(f"{current_env_dir}/AppDefs/{appdef_meta['name']}.yml", content)
+    for path in regdef_templates:
+        content = renderer.render_template_file(path, {"regdefs": regdefs}, text=True)
+        regdef_content = _from_yaml(content)
+        if not isinstance(regdef_content, dict) or not regdef_content.get("name"):
+            raise ReferenceError(f"Rendered RegDef from {path} is missing a name field")
+        writeToFile(f"{current_env_dir}/RegDefs/{regdef_content['name']}.yml", content)
+
+
+@timed()
+def render_env_templates(render_vars: dict, env_config_template: str):
+    # values are strings as playbook gets them from environment variables
+    variables = {key: str(render_vars[key]) if key in render_vars else "" for key in RENDER_VARS}
+    renderer = EnvBuilderRenderer(variables)
+    env = variables["env"]
+    templates_dir = variables["templates_dir"]
+    logger.info(f"Building environment {env} from templates dir {templates_dir} and instances dir {variables['env_instances_dir']}")
+    variables["env_definition"] = _from_yaml(lookup_file(f"{variables['env_instances_dir']}/Inventory/env_definition.yml"))
+    if variables["cloud_passport_file_path"].strip() != "":
+        variables["cloud_passport"] = _from_yaml(lookup_file(variables["cloud_passport_file_path"]))
+    variables["config"] = _from_yaml(renderer.lookup("template", env_config_template))
+    current_env = variables["config"]["environment"]
+    variables["current_env"] = current_env
+    variables["cloud"] = current_env["cloud"]
+    variables["tenant"] = current_env.get("tenant", "")
+    variables["deployer"] = current_env.get("deployer", "")
+    variables["ND_CMDB_CONFIG_REF"] = os.getenv("CI_COMMIT_SHORT_SHA", "")
+    variables["ND_CMDB_CONFIG_REF_NAME"] = os.getenv("CI_COMMIT_REF_NAME", "")
+    variables["ND_CMDB_CONFIG_TAG"] = os.getenv("CI_COMMIT_TAG", "")
+    variables["ND_CDMB_REPOSITORY_URL"] = os.getenv("CI_REPOSITORY_URL", "")
+    variables["ND_CMDB_ENV_TEMPLATE"] = current_env["env_template"]
+    current_env_dir = f"{variables['render_dir']}/{env}"
+    variables["current_env_dir"] = current_env_dir
+    current_env_template = load_yaml_file(f"{templates_dir}/env_templates/{current_env['env_template']}.yaml")
+    variables["current_env_template"] = current_env_template
+    logger.info(f"current_env: {current_env}")
+
+    solution_structure = create_solution_structure(renderer, current_env["env_template"], current_env_dir, templates_dir)
+    if solution_structure is not None:
+        variables["current_env"] = current_env = _combine(current_env, {"solution_structure": solution_structure},
+                                                           recursive=True)
+    variables.update({"_env": env, "_tenant": variables["tenant"], "_cloud": current_env["cloud"],
+                      "_current_env_dir": current_env_dir})
+
+    # generate_tenant role
+    tenant_template = _ansible_eval(renderer.template(current_env_template["tenant"]))
+    write_block_to_file(f"{current_env_dir}/tenant.yml",
+                        to_block(renderer.lookup("template", tenant_template, template_vars={"_template": tenant_template})))
+    # generate_cloud role
+    cloud_template = _ansible_eval(renderer.template(current_env_template["cloud"]))
+    role_vars = {"_template": cloud_template, "is_old_format": not isinstance(cloud_template, dict)}
+    if not isinstance(cloud_template, dict):
+        write_block_to_file(f"{current_env_dir}/cloud.yml",
+                            to_block(renderer.lookup("template", cloud_template, template_vars=role_vars)))
+    else:
+        write_block_to_file(f"{current_env_dir}/cloud.yml",
+                            to_block(renderer.lookup("template", cloud_template["template_path"], template_vars=role_vars)))
+        if cloud_template.get("template_override", "") != "":
+            write_block_to_file(f"{current_env_dir}/cloud.yml_override",
+                                _to_nice_yaml(cloud_template["template_override"]))
+    render_namespaces(renderer, renderer.template(current_env_template["namespaces"]), current_env_dir)
+    # generate_profiles role
+    if "resourceProfiles" in current_env_template:
+        for profile in renderer.template(current_env_template["resourceProfiles"]):
+            profile_template_name = strip_template_extension(profile["template_path"])
+            role_vars = {"profile": profile, "_profile_template_name": profile_template_name}
+            write_block_to_file(f"{current_env_dir}/Profiles/{profile_template_name}.yml",
+                                to_block(renderer.lookup("template", profile["template_path"], template_vars=role_vars)))
+    # generate_composite_structure role
+    if "composite_structure" in current_env_template:
+        composite_template = _ansible_eval(renderer.template(current_env_template["composite_structure"]))
+        write_block_to_file(f"{current_env_dir}/composite_structure.yml",
+                            to_block(renderer.lookup("template", composite_template, template_vars={"_template": composite_template})))
+    if "envSpecificSchema" in current_env_template:
+        schema_path = renderer.template(current_env_template["envSpecificSchema"])
+        if not os.path.isfile(schema_path):
+            raise ReferenceError(f"Environment specific schema {schema_path} is not found")
+        invalidate_dir_index(f"{current_env_dir}/env-specific-schema.yml")
+        shutil.copyfile(schema_path, f"{current_env_dir}/env-specific-schema.yml")
+    render_paramsets(renderer, variables["render_parameters_dir"])
+    render_appregdefs(renderer, templates_dir, current_env_dir, variables["output_dir"], variables["cluster_name"])
@@ -1,10 +1,30 @@
 import pathlib
 import os
+import errno
 import glob
 import re
 import shutil
+import bisect
+import copy
+import fnmatch
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Callable
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 from .logger import logger
+from .timing_helper import count_event, FILES_READ, FILES_WRITTEN
+
+# ioctl request of linux for copy-on-write clone of file (reflink)
+FICLONE = 0x40049409
+# pairs of devices (source, target) where files can't be cloned
+_no_clone_devices = set()
+# number of parsed documents kept in cache, 0 disables the cache
+document_cache_size = int(os.getenv("ENVGENE_YAML_CACHE_SIZE", "0") or 0)
+# (size, modification time, document) by (absolute path, kind of parsing), least recently used first
+_document_cache = OrderedDict()
 
 def extractNameFromFile(filePath):
     return pathlib.Path(filePath).stem
@@ -39,16 +59,69 @@ def check_file_exists(file_path) :
 
 def check_dir_exist_and_create(dir_path) :
     logger.debug(f'Checking that dir exists or create dir in path: {dir_path}')
+    if not os.path.isdir(dir_path):
+        invalidate_dir_index(dir_path)
     os.makedirs(dir_path, exist_ok=True)
 
 def delete_dir(path) :
+    invalidate_dir_index(path)
+    invalidate_document_cache(path)
     try:
         shutil.rmtree(path)
     except:
         logger.info(f'{path} directory does not exist')
 
+def _clone_file(source_file, target_file, devices):
+    # copy-on-write clone shares data blocks of files where filesystem supports it (btrfs, xfs),
+    # regular copy is used otherwise
+    if fcntl and devices not in _no_clone_devices:
+        try:
+            with open(source_file, 'rb') as src, open(target_file, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return
+        except OSError:
+            _no_clone_devices.add(devices)
+    shutil.copyfile(source_file, target_file)
+
+def _copy_file(source_file, target_file):
+    # like 'cp -f', but files with the same size and modification time are not copied again,
+    # modification time of source is kept for that
+    source_stat = os.stat(source_file)
+    if os.path.lexists(target_file):
+        target_stat = os.lstat(target_file)
+        if os.path.islink(target_file) or not os.access(target_file, os.W_OK):
+            os.remove(target_file)
+        elif target_stat.st_size == source_stat.st_size and target_stat.st_mtime_ns == source_stat.st_mtime_ns:
+            return
+    target_dir_stat = os.stat(os.path.dirname(target_file) or ".")
+    is_new = not os.path.exists(target_file)
+    count_event(FILES_WRITTEN)
+    _clone_file(source_file, target_file, (source_stat.st_dev, target_dir_stat.st_dev))
+    if is_new:
+        shutil.copymode(source_file, target_file)
+    os.utime(target_file, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+
+def _copy_tree(source, target):
+    # like 'cp -rf': links are copied as links, directories are merged into existing ones
+    if os.path.islink(source):
+        if os.path.lexists(target):
+            os.remove(target)
+        os.symlink(os.readlink(source), target)
+    elif os.path.isdir(source):
+        os.makedirs(target, exist_ok=True)
+        for entry in os.scandir(source):
+            _copy_tree(entry.path, os.path.join(target, entry.name))
+    else:
+        _copy_file(source, target)
+
+def _get_target_for_source(source, target_path):
+    # as with 'cp' and 'mv', existing directory is a target for sources to be placed into
+    if os.path.isdir(target_path):
+        return os.path.join(target_path, os.path.basename(source.rstrip("/")))
+    return target_path
+
 def copy_path(source_path, target_path) :
-    # check that we are not trying to copy file to itself, or 'cp' will exit with error
+    # check that we are not trying to copy file to itself
     if getDirName(source_path) == getDirName(target_path) and (check_file_exists(source_path) and source_path == target_path + extractNameWithExtensionFromFile(source_path)):
         logger.info(f"Trying to copy {source_path} to itself (target path: {target_path}). Skipping...")
     elif glob.glob(source_path) :
@@ -61,10 +134,17 @@ def copy_path(source_path, target_path) :
                 dirPath = os.path.dirname(target_path)
             logger.debug(f'Creating dir {dirPath}')
             os.makedirs(dirPath, exist_ok=True)
-        exit_code = os.system(f"cp -rf {source_path} {target_path}")
-        if (exit_code) :
-            logger.error(f"Error during copying from {source_path} to {target_path}")
-            exit(1)
+        invalidate_dir_index(target_path)
+        invalidate_document_cache(target_path)
+        try:
+            for source in sorted(glob.glob(source_path)):
+                target = _get_target_for_source(source, target_path)
+                if os.path.isdir(source) and getAbsPath(target).startswith(getAbsPath(source) + "/"):
+                    raise OSError(f"Can't copy directory {source} into itself: {target}")
+                _copy_tree(source, target)
+        except OSError as e:
+            logger.error(f"Error during copying from {source_path} to {target_path}: {e}")
+            raise
     else :
         logger.info(f"Path {source_path} doesn't exist. Skipping...")
 
@@ -79,24 +159,50 @@ def move_path(source_path, target_path) :
                 dirPath = os.path.dirname(target_path)
             logger.debug(f'Creating dir {dirPath}')
             os.makedirs(dirPath, exist_ok=True)
-        exit_code = os.system(f"mv -f {source_path} {target_path}")
-        if (exit_code) :
-            logger.error(f"Error during Moving from {source_path} to {target_path}")
-            exit(1)
+        invalidate_dir_index(source_path)
+        invalidate_dir_index(target_path)
+        invalidate_document_cache(source_path)
+        invalidate_document_cache(target_path)
+        try:
+            for source in sorted(glob.glob(source_path)):
+                target = _get_target_for_source(source, target_path)
+                try:
+                    os.replace(source, target)
+                except OSError as e:
+                    # as with 'mv', not empty directory and directory replaced with file or file
+                    # replaced with directory are errors, only moving to another filesystem is done by copying
+                    if e.errno != errno.EXDEV:
+                        raise
+                    if os.path.isdir(target) and not os.path.islink(target):
+                        if not os.path.isdir(source):
+                            raise IsADirectoryError(errno.EISDIR, "Cannot overwrite directory with non-directory", target)
+                        # fails if the directory is not empty
+                        os.rmdir(target)
+                    shutil.move(source, target)
+        except (OSError, shutil.Error) as e:
+            logger.error(f"Error during moving from {source_path} to {target_path}: {e}")
+            raise
     else :
         logger.info(f"Path {source_path} doesn't exist. Skipping...")
 
 
 def openFileAsString(filePath):
+    count_event(FILES_READ)
     with open(filePath, 'r') as f:
         result = f.read()
     return result
 
 def deleteFile(filePath):
+    invalidate_dir_index(filePath)
+    invalidate_document_cache(filePath)
     os.remove(filePath)
 
 def writeToFile(filePath, contents):
+    if not os.path.exists(filePath):
+        invalidate_dir_index(filePath)
+    invalidate_document_cache(filePath)
     os.makedirs(os.path.dirname(filePath), exist_ok=True)
+    count_event(FILES_WRITTEN)
     with open(filePath, 'w+') as f:
         f.write(contents)
     return
@@ -129,22 +235,21 @@ def get_files_with_filter(path_to_filter: str, filter: Callable[[str], bool]) ->
     return matching_files
 
 def findAllFilesInDir(dir, pattern, notPattern="", additionalRegexpPattern="", additionalRegexpNotPattern=""):
-    result = []
-    dirPointer = pathlib.Path(dir)
-    fileList = list(dirPointer.rglob("*.*"))
-    for f in fileList:
-        result.append(str(f))
+    result = find_in_dir(dir, "*.*")
     return findFiles(result, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern)
 
+def is_path_matching(filePath, pattern, notPattern="", additionalRegexpPattern="", additionalRegexpNotPattern=""):
+    return bool(
+        pattern in filePath
+        and (notPattern=="" or notPattern not in filePath)
+        and (additionalRegexpPattern=="" or re.match(additionalRegexpPattern, filePath))
+        and (additionalRegexpNotPattern=="" or not re.match(additionalRegexpNotPattern, filePath))
+    )
+
 def findFiles(fileList, pattern, notPattern="", additionalRegexpPattern="", additionalRegexpNotPattern="") :
     result = []
     for filePath in fileList:
-        if (
-            pattern in filePath
-            and (notPattern=="" or notPattern not in filePath)
-            and (additionalRegexpPattern=="" or re.match(additionalRegexpPattern, filePath))
-            and (additionalRegexpNotPattern=="" or not re.match(additionalRegexpNotPattern, filePath))
-        ):
+        if is_path_matching(filePath, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern):
             result.append(filePath)
             logger.debug(f"Path {filePath} match pattern: {pattern} or notPattern: {notPattern} or additionalPattern: {additionalRegexpPattern}")
         else:
@@ -157,6 +262,9 @@ def removeAnsibleTrashFromFile(filePath) :
         "# END ANSIBLE MANAGED BLOCK",
         "# BEGIN ANSIBLE MANAGED BLOCK"
     ]
+    count_event(FILES_READ)
+    count_event(FILES_WRITTEN)
+    invalidate_document_cache(filePath)
     with open(filePath, 'r') as f:
         fileContent = f.read()
         for trash in ansible_trash:
@@ -175,3 +283,133 @@ def get_all_files_in_dir(dir, pathToRemove=""):
                  itemStr = itemStr.replace(pathToRemove, "")
              result.append(itemStr)
     return result
+
+
+class DirIndex:
+    """
+    Listing of all files and directories under root, collected with a single walk.
+    Paths are stored relative to root and sorted, so the content of any sub directory
+    is a contiguous slice of the listing. Results of repeated lookups can be kept in
+    lookup_cache, which lives as long as the index itself.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.lookup_cache = {}
+        paths = []
+        for dirPath, dirNames, fileNames in os.walk(root):
+            relDir = os.path.relpath(dirPath, root)
+            prefix = "" if relDir == "." else relDir + "/"
+            for name in dirNames + fileNames:
+                paths.append(prefix + name)
+        paths.sort()
+        self.paths = paths
+
+    def find_in_subdir(self, rel_dir=""):
+        if not rel_dir:
+            return self.paths
+        prefix = rel_dir + "/"
+        start = bisect.bisect_left(self.paths, prefix)
+        end = bisect.bisect_left(self.paths, prefix[:-1] + "0") # "0" is the next char after "/"
+        return self.paths[start:end]
+
+    def find_by_name(self, name_pattern, rel_dir=""):
+        # entries under rel_dir with names matching glob pattern, the same entries as rglob(name_pattern) finds
+        key = ("name", rel_dir, name_pattern)
+        if key not in self.lookup_cache:
+            regex = re.compile(fnmatch.translate(name_pattern))
+            start = len(rel_dir) + 1 if rel_dir else 0
+            self.lookup_cache[key] = [path[start:] for path in self.find_in_subdir(rel_dir)
+                                      if regex.match(path[path.rfind("/") + 1:])]
+        return self.lookup_cache[key]
+
+_dir_indexes: dict[str, DirIndex] = {}
+# number of active dir_index_scope, indexes are kept only while a scope is active
+_dir_index_scope_depth = 0
+
+@contextmanager
+def dir_index_scope():
+    """
+    Directory indexes built inside the scope are shared until the scope is exited. Files changed
+    outside of envgene are not seen by indexes, so a scope should cover one build step. Outermost
+    scope drops all indexes on enter and on exit. Can be used as a decorator.
+    """
+    global _dir_index_scope_depth
+    if _dir_index_scope_depth == 0:
+        invalidate_dir_index()
+    _dir_index_scope_depth += 1
+    try:
+        yield
+    finally:
+        _dir_index_scope_depth -= 1
+        if _dir_index_scope_depth == 0:
+            invalidate_dir_index()
+
+def get_dir_index(root) -> DirIndex:
+    root = getAbsPath(root)
+    if _dir_index_scope_depth == 0:
+        return DirIndex(root)
+    if root not in _dir_indexes:
+        logger.debug(f"Building directory index for {root}")
+        _dir_indexes[root] = DirIndex(root)
+    return _dir_indexes[root]
+
+def get_dir_index_containing(dir_path):
+    # index of dir_path or of any indexed dir containing it, with path of dir_path relative to the index root.
+    # Symlinked dirs are not walked into by index of parent dir, so parent index is used only for real paths
+    dir_path = getAbsPath(dir_path)
+    if dir_path not in _dir_indexes and _dir_indexes and os.path.realpath(dir_path) == dir_path:
+        for root, index in _dir_indexes.items():
+            if dir_path.startswith(root.rstrip("/") + "/"):
+                return index, os.path.relpath(dir_path, root)
+    return get_dir_index(dir_path), ""
+
+def find_in_dir(dir_path, name_pattern):
+    # paths of entries under dir_path with names matching glob pattern, the same as
+    # pathlib.Path(dir_path).rglob(name_pattern) returns, but sorted and found with directory index
+    index, rel_dir = get_dir_index_containing(dir_path)
+    base = str(pathlib.Path(dir_path))
+    if base == ".":
+        return list(index.find_by_name(name_pattern, rel_dir))
+    return [os.path.join(base, path) for path in index.find_by_name(name_pattern, rel_dir)]
+
+def invalidate_dir_index(path=None):
+    # dropping every index which can contain the path or be removed together with it
+    if not _dir_indexes:
+        return
+    if path is None:
+        _dir_indexes.clear()
+        return
+    path = getAbsPath(str(path).split("*")[0])
+    for root in list(_dir_indexes):
+        if path == root or path.startswith(root + "/") or root.startswith(path + "/"):
+            del _dir_indexes[root]
+
+def get_cached_document(file_path, kind, parse):
+    # result of parse(file_path) is cached until file size or modification time is changed or the file is
+    # written by envgene. Callers get their own copy of the document, so they can modify it
+    if document_cache_size <= 0:
+        return parse(file_path)
+    key = (getAbsPath(file_path), kind)
+    stat = os.stat(file_path)
+    cached = _document_cache.get(key)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        _document_cache.move_to_end(key)
+        return copy.deepcopy(cached[2])
+    document = parse(file_path)
+    _document_cache[key] = (stat.st_size, stat.st_mtime_ns, copy.deepcopy(document))
+    _document_cache.move_to_end(key)
+    if len(_document_cache) > document_cache_size:
+        _document_cache.popitem(last=False)
+    return document
+
+def invalidate_document_cache(path=None):
+    # dropping cached documents of the path and of all files under it
+    if not _document_cache:
+        return
+    if path is None:
+        _document_cache.clear()
+        return
+    path = getAbsPath(str(path).split("*")[0])
+    for key in list(_document_cache):
+        if key[0] == path or key[0].startswith(path + "/"):
+            del _document_cache[key]
@@ -1,22 +1,19 @@
 from os import path, makedirs
 import json
 import pathlib
-from .file_helper import findFiles
+from .file_helper import findFiles, find_in_dir, invalidate_dir_index
 from .logger import logger
+from .timing_helper import count_event, FILES_READ, FILES_WRITTEN
 
 def openJson(filePath):
     logger.debug(f"Open json file: {filePath}")
+    count_event(FILES_READ)
     with open(filePath, 'r') as f:
         resultJson = json.load(f)
     return resultJson
 
 def findAllJsonsInDir(dir) :
-    result = []
-    dirPointer = pathlib.Path(dir)
-    fileList = list(dirPointer.rglob("*.json"))
-    for f in fileList :
-        result.append(str(f))
-    return result
+    return find_in_dir(dir, "*.json")
 
 def findJsons(dir, pattern, notPattern="", additionalRegexpPattern="", additionalRegexpNotPattern="") :
     fileList = findAllJsonsInDir(dir)
@@ -24,7 +21,10 @@ def findJsons(dir, pattern, notPattern="", additionalRegexpPattern="", additiona
 
 def writeJsonToFile(file_path: str, content: dict):
     logger.debug(f"Writing json to file: {file_path}")
+    if not path.exists(file_path):
+        invalidate_dir_index(file_path)
     makedirs(path.dirname(file_path), exist_ok=True)
+    count_event(FILES_WRITTEN)
     with open(file_path, 'w+') as f:
         json.dump(content, f, indent=2, ensure_ascii=False)
     return
@@ -1,4 +1,5 @@
 from os import getenv
+from contextlib import contextmanager
 import logging
 
 class CustomFormatter(logging.Formatter):
@@ -34,3 +35,69 @@ def format(self, record):
 ch.setLevel(log_level)
 ch.setFormatter(CustomFormatter())
 logger.addHandler(ch)
+# collections with more items are truncated in log messages, 0 means no limit
+log_max_items = int(getenv('ENVGENE_LOG_MAX_ITEMS', '1000') or 0)
+
+def truncate_for_log(value, max_items=None):
+    # dicts and lists on every level are limited to first max_items items, the rest is replaced
+    # with the number of skipped items. Value is returned as is if nothing is truncated in it
+    max_items = log_max_items if max_items is None else max_items
+    if max_items <= 0 or not isinstance(value, (dict, list)):
+        return value
+    if isinstance(value, dict):
+        items = [(key, value[key]) for key, _ in zip(value, range(max_items))]
+    else:
+        items = list(enumerate(value[:max_items]))
+    truncated_items = [(key, truncate_for_log(item, max_items)) for key, item in items]
+    if len(value) <= max_items and all(truncated is item for (_, truncated), (_, item) in zip(truncated_items, items)):
+        return value
+    skipped = f"{len(value) - max_items} more items of {len(value)} are skipped" if len(value) > max_items else None
+    if isinstance(value, dict):
+        result = dict(truncated_items)
+        if skipped:
+            result["..."] = skipped
+        return result
+    result = [item for _, item in truncated_items]
+    if skipped:
+        result.append(f"... {skipped}")
+    return result
+
+class LazyLogValue:
+    # argument of log message which is formatted only when the record is emitted by a handler:
+    # logger.debug("Data: %s", LazyLogValue(json.dumps, data, indent=2))
+    def __init__(self, func, value, *args, **kwargs):
+        self.func = func
+        self.value = value
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+
+    def __str__(self):
+        if self.result is None:
+            self.result = str(self.func(truncate_for_log(self.value), *self.args, **self.kwargs))
+        return self.result
+
+class LogRecordCollector(logging.Handler):
+    # keeps log records of work done in worker process to emit them in the main process
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+@contextmanager
+def collect_log_records():
+    # records are collected instead of being emitted, emit them with logger.handle
+    collector = LogRecordCollector()
+    handlers = logger.handlers
+    logger.handlers = [collector]
+    try:
+        yield collector.records
+    finally:
+        logger.handlers = handlers
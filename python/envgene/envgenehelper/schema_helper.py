@@ -0,0 +1,58 @@
+import json
+import threading
+from os import path
+
+import jsonschema
+from jsonschema.exceptions import best_match
+
+from .logger import logger
+
+# Process-wide registry of parsed and compiled json schemas.
+# Every schema is read from disk, meta-validated and compiled into a validator
+# exactly once; callers must treat returned schema data as read-only.
+_schemas = {}
+_validators = {}
+_registry_lock = threading.Lock()
+
+def _get_schema_key(schema_path):
+    return path.realpath(schema_path)
+
+def get_schema_data(schema_path):
+    key = _get_schema_key(schema_path)
+    schema_data = _schemas.get(key)
+    if schema_data is not None:
+        return schema_data
+    with _registry_lock:
+        if key not in _schemas:
+            logger.debug(f"Loading schema to registry: {schema_path}")
+            with open(schema_path, 'r') as f:
+                _schemas[key] = json.load(f)
+        return _schemas[key]
+
+def get_schema_validator(schema_path):
+    key = _get_schema_key(schema_path)
+    validator = _validators.get(key)
+    if validator is not None:
+        return validator
+    schema_data = get_schema_data(schema_path)
+    with _registry_lock:
+        if key not in _validators:
+            cls = jsonschema.validators.validator_for(schema_data)
+            cls.check_schema(schema_data)
+            _validators[key] = cls(schema_data)
+        return _validators[key]
+
+def get_schema_validation_errors(data, schema_path):
+    validator = get_schema_validator(schema_path)
+    return sorted(validator.iter_errors(data), key=lambda e: e.path)
+
+def validate_by_schema_path(data, schema_path):
+    # same contract as jsonschema.validate, but with a precompiled validator
+    error = best_match(get_schema_validator(schema_path).iter_errors(data))
+    if error is not None:
+        raise error
+
+def clear_schema_registry():
+    with _registry_lock:
+        _schemas.clear()
+        _validators.clear()
@@ -115,8 +115,8 @@ def merge(full_sd, delta_sd):
 
 def extended_merge(data1, data2):
     logger.info(f"Inside extended_merge")
-    logger.info(f"Full SD: {data1}")
-    logger.info(f"Delta SD: {data2}")
+    logger.info("Full SD: %s", LazyLogValue(str, data1))
+    logger.info("Delta SD: %s", LazyLogValue(str, data2))
     if "deployGraph" in data2.keys() and "deployGraph" not in data1.keys():
         error(NO_DEPLOY_GRAPH_ERROR)
     counter_ = 0
@@ -174,8 +174,8 @@ def basic_merge(full_sd, delta_sd):
       4. Output contains only `applications` key
     """
     logger.info(f"Inside basic_merge")
-    logger.info(f"Full SD: {full_sd}")
-    logger.info(f"Delta SD: {delta_sd}")
+    logger.info("Full SD: %s", LazyLogValue(str, full_sd))
+    logger.info("Delta SD: %s", LazyLogValue(str, delta_sd))
     full_apps = full_sd.get("applications", [])
     delta_apps = delta_sd.get("applications", [])
     result_apps = []
@@ -218,8 +218,8 @@ def basic_exclusion_merge(full_sd, delta_sd):
       4. Output contains only `applications` key
     """
     logger.info(f"Inside basic_exclusion_merge")
-    logger.info(f"Full SD: {full_sd}")
-    logger.info(f"Delta SD: {delta_sd}")
+    logger.info("Full SD: %s", LazyLogValue(str, full_sd))
+    logger.info("Delta SD: %s", LazyLogValue(str, delta_sd))
     full_apps = full_sd.get("applications", [])
     delta_apps = delta_sd.get("applications", [])
     result_apps = []
@@ -1,4 +1,5 @@
 from .collections_helper import *
+from .logger import logger, LazyLogValue, truncate_for_log
 
 def convert_list_elements_to_strings_in_place(lst):
     for i in range(len(lst)):
@@ -59,3 +60,20 @@ def test_compare_dicts():
 
     assert len(s_diff) == len(diff) # no duplicates
     assert s_diff == set(expected_arr) and removed == [], f"Failed Test 8: {diff}, {removed}"
+
+def test_lazy_dump_as_yaml_format():
+    calls = []
+    value = LazyLogValue(lambda collection: calls.append(collection) or "dumped", {"a": 1})
+    logger.debug("Data: %s", value)
+    assert calls == []
+    assert str(value) == "dumped" and str(value) == "dumped"
+    assert calls == [{"a": 1}]
+    assert str(lazy_dump_as_yaml_format({"a": [1, 2]})) == dump_as_yaml_format({"a": [1, 2]})
+
+def test_truncate_for_log():
+    value = {"a": [1, 2, 3], "b": 1}
+    assert truncate_for_log(value, 3) is value
+    assert truncate_for_log(value, 0) is value
+    assert truncate_for_log(value, 2) == {"a": [1, 2, "... 1 more items of 3 are skipped"], "b": 1}
+    assert truncate_for_log(value, 1) == {"a": [1, "... 2 more items of 3 are skipped"],
+                                          "...": "1 more items of 2 are skipped"}
@@ -7,7 +7,8 @@
 
 from .collections_helper import compare_dicts
 
-from .crypt import decrypt_file, encrypt_file, is_encrypted
+from . import crypt
+from .crypt import decrypt_file, encrypt_file, is_encrypted, crypt_files, get_all_necessary_cred_files, CRYPT_STATUS_PROCESSED, CRYPT_STATUS_SKIPPED, CRYPT_STATUS_FAILED
 from .file_helper import check_file_exists, writeToFile
 from .yaml_helper import openYaml, set_nested_yaml_attribute, writeYamlToFile
 
@@ -178,3 +179,62 @@ def test_minimize_diff(crypt_kwargs):
     # test wrong parameter combination
     with pytest.raises(ValueError):
         encrypt_file(**crypt_kwargs, minimize_diff=True)
+
+def test_crypt_files(crypt_kwargs, tmp_path):
+    crypt_kwargs.pop('file_path')
+    files = []
+    for i in range(3):
+        file_path = str(tmp_path / f"creds-{i}.yml")
+        writeToFile(file_path, TEST_CONTENT)
+        files.append(file_path)
+    init_yaml = openYaml(files[0])
+
+    results = crypt_files(files, "encrypt", **crypt_kwargs)
+    assert all(r.status == CRYPT_STATUS_PROCESSED for r in results.values())
+    assert all(is_encrypted(f, crypt_kwargs['crypt_backend']) for f in files)
+
+    results = crypt_files(files + [NOT_EXISTING_TEST_FILE], "decrypt", max_workers=2, **crypt_kwargs)
+    assert results[NOT_EXISTING_TEST_FILE].status == CRYPT_STATUS_FAILED
+    assert all(results[f].status == CRYPT_STATUS_PROCESSED for f in files)
+    assert all(openYaml(f) == init_yaml for f in files)
+
+def test_crypt_files_reports_skipped_files(tmp_path):
+    crypt_kwargs = {'crypt_backend': 'Fernet', 'secret_key': crypt_test_data[1]['secret_key'], 'is_crypt': True}
+    files = []
+    for i in range(2):
+        file_path = str(tmp_path / f"creds-{i}.yml")
+        writeToFile(file_path, TEST_CONTENT)
+        files.append(file_path)
+    empty_file = str(tmp_path / "empty-creds.yml")
+    writeToFile(empty_file, "")
+    init_yaml = openYaml(files[0])
+
+    results = crypt_files(files, "decrypt", **crypt_kwargs)
+    assert all(r.status == CRYPT_STATUS_SKIPPED for r in results.values())
+    assert all(openYaml(f) == init_yaml for f in files)
+
+    results = crypt_files(files, "encrypt", **{**crypt_kwargs, 'is_crypt': False})
+    assert all(r.status == CRYPT_STATUS_SKIPPED for r in results.values())
+    assert not any(is_encrypted(f, 'Fernet') for f in files)
+
+    results = crypt_files(files + [empty_file], "encrypt", **crypt_kwargs)
+    assert results[empty_file].status == CRYPT_STATUS_SKIPPED
+    assert all(results[f].status == CRYPT_STATUS_PROCESSED for f in files)
+    assert all(is_encrypted(f, 'Fernet') for f in files)
+
+def test_get_all_necessary_cred_files(tmp_path, monkeypatch):
+    for rel_path in ["configuration/credentials/credentials.yml", "environments/credentials/shared-creds.yml",
+                     "environments/cluster-01/env-01/Credentials/credentials.yml",
+                     "environments/cluster-01/env-02/Credentials/credentials.yml",
+                     "environments/cluster-02/cloud-passport/cluster-02-creds.yml"]:
+        writeToFile(str(tmp_path / rel_path), "{}")
+    monkeypatch.setattr(crypt, "BASE_DIR", str(tmp_path))
+    expected = {str(tmp_path / rel_path) for rel_path in [
+        "configuration/credentials/credentials.yml", "environments/credentials/shared-creds.yml",
+        "environments/cluster-01/env-01/Credentials/credentials.yml",
+        "environments/cluster-02/cloud-passport/cluster-02-creds.yml"]}
+    monkeypatch.setenv("ENV_NAMES", "cluster-01/env-01, cluster-02/env-01\n")
+    assert get_all_necessary_cred_files() == expected
+    # passed environments are used instead of ENV_NAMES
+    monkeypatch.setenv("ENV_NAMES", "cluster-01/env-02")
+    assert get_all_necessary_cred_files([("cluster-01", "env-01"), ("cluster-02", "env-01")]) == expected
@@ -0,0 +1,60 @@
+import pytest
+from jinja2 import UndefinedError
+
+from .env_builder import *
+from .file_helper import openFileAsString, writeToFile
+
+@pytest.fixture
+def renderer():
+    return EnvBuilderRenderer({"name": "env-01", "config": {"a": 1}, "items": ["x", "y"]})
+
+#CONST
+render_string_test_data = [
+    ("{{ name }}", "env-01"),
+    ("{{ config }}", {"a": 1}),
+    ('{{ {"b": name} | combine(config) }}', {"b": "env-01", "a": 1}),
+    ("{{ items | length }}", "2"),
+    ("[{% for i in items %}'{{ i }}',{% endfor %}]", ["x", "y"]),
+    ("{{ name }}\n", "env-01\n"),
+    ("{{ name | regex_replace('-01$', '') }}", "env"),
+    ("{{ config | to_nice_yaml }}", "a: 1\n"),
+]
+
+@pytest.mark.parametrize("template, expected", render_string_test_data)
+def test_render_string(renderer, template, expected):
+    assert renderer.render_string(template) == expected
+
+def test_render_string_as_text(renderer):
+    assert renderer.render_string("{{ config }}", text=True) == "{'a': 1}"
+    assert renderer.render_string("[1, 2]", text=True) == "[1, 2]"
+
+def test_undefined_variable_fails_rendering(renderer):
+    with pytest.raises(UndefinedError):
+        renderer.render_string("{{ missing }}")
+    with pytest.raises(UndefinedError):
+        renderer.render_string("{{ {'a': missing} }}")
+    assert renderer.render_string("{{ missing.key | default('x') }}") == "x"
+
+@pytest.mark.parametrize("template", [
+    "{{ name | community.general.json_query('a') }}",
+    "{% if name is defined %}{{ name | missing_filter }}{% endif %}",
+    "{{ name is missing_test }}",
+    "{{ lookup('pipe', 'date') }}",
+])
+def test_unsupported_feature_fails_rendering(renderer, template):
+    with pytest.raises(UnsupportedFeatureError):
+        renderer.render_string(template)
+
+def test_template_nested_values(renderer):
+    value = {"env": "{{ name }}", "list": ["{{ items[0] }}", 1], "plain": "text"}
+    assert renderer.template(value) == {"env": "env-01", "list": ["x", 1], "plain": "text"}
+
+def test_write_block_to_file(tmp_path):
+    path = str(tmp_path / "file.yml")
+    writeToFile(path, "first: 1")
+    write_block_to_file(path, "a: 1")
+    assert openFileAsString(path) == f"first: 1\n{BLOCK_BEGIN_MARKER}a: 1\n{BLOCK_END_MARKER}"
+    write_block_to_file(path, "b: 2\n")
+    assert openFileAsString(path) == f"first: 1\n{BLOCK_BEGIN_MARKER}b: 2\n{BLOCK_END_MARKER}"
+    write_block_to_file(path, "")
+    assert openFileAsString(path) == "first: 1\n"
@@ -24,3 +24,114 @@ def test_get_parent_dir_for_dir(test_dir, expected_dir):
 @pytest.mark.parametrize("test_dir, expected_dir", getParentDirName_test_data)
 def test_getParentDirName(test_dir, expected_dir):
     assert getParentDirName(test_dir) == expected_dir, f"Calculated parent dir does not match expected: {expected_dir}"
+
+def test_dir_index_find_in_subdir(tmp_path):
+    for rel_path in ["a/b/file.yml", "a/b0.yml", "a/file.yml", "c/file.json"]:
+        writeToFile(str(tmp_path / rel_path), "")
+    index = get_dir_index(str(tmp_path))
+    assert index.find_in_subdir("a/b") == ["a/b/file.yml"]
+    assert index.find_in_subdir("a") == ["a/b", "a/b/file.yml", "a/b0.yml", "a/file.yml"]
+    assert len(index.find_in_subdir()) == 7
+
+def test_dir_index_is_invalidated_on_write(tmp_path):
+    with dir_index_scope():
+        writeToFile(str(tmp_path / "a/file.yml"), "")
+        index = get_dir_index(str(tmp_path))
+        assert get_dir_index(str(tmp_path)) is index
+        writeToFile(str(tmp_path / "a/new.yml"), "")
+        index = get_dir_index(str(tmp_path))
+        assert "a/new.yml" in index.find_in_subdir("a")
+        deleteFile(str(tmp_path / "a/new.yml"))
+        assert "a/new.yml" not in get_dir_index(str(tmp_path)).find_in_subdir("a")
+
+def test_dir_index_is_kept_only_in_scope(tmp_path):
+    writeToFile(str(tmp_path / "a/file.yml"), "")
+    assert get_dir_index(str(tmp_path)) is not get_dir_index(str(tmp_path))
+    with dir_index_scope():
+        index = get_dir_index(str(tmp_path))
+        with dir_index_scope():
+            assert get_dir_index(str(tmp_path)) is index
+        assert get_dir_index(str(tmp_path)) is index
+        # file is created not by envgene
+        (tmp_path / "a/new.yml").write_text("")
+        assert find_in_dir(str(tmp_path), "new.yml") == []
+    with dir_index_scope():
+        assert find_in_dir(str(tmp_path), "new.yml") == [str(tmp_path / "a/new.yml")]
+
+def test_find_in_dir_matches_rglob(tmp_path):
+    for rel_path in ["a/b/file.yml", "a/b.yml/c.yaml", "a/.hidden.yml", "a/file", "c/file.json"]:
+        writeToFile(str(tmp_path / rel_path), "")
+    for name_pattern in ["*.yml", "*.yaml", "*.*", "file*"]:
+        for dir_path in [str(tmp_path), str(tmp_path / "a") + "/", str(tmp_path / "missing")]:
+            expected = sorted(str(path) for path in pathlib.Path(dir_path).rglob(name_pattern))
+            assert find_in_dir(dir_path, name_pattern) == expected
+
+def test_find_in_dir_uses_index_of_parent_dir(tmp_path):
+    with dir_index_scope():
+        writeToFile(str(tmp_path / "a/b/file.yml"), "")
+        index = get_dir_index(str(tmp_path))
+        assert find_in_dir(str(tmp_path / "a"), "*.yml") == [str(tmp_path / "a/b/file.yml")]
+        assert get_dir_index_containing(str(tmp_path / "a/b")) == (index, "a/b")
+        check_dir_exist_and_create(str(tmp_path / "a/new"))
+        assert get_dir_index_containing(str(tmp_path / "a/new"))[0] is not index
+
+def test_copy_path_merges_into_existing_dir(tmp_path):
+    writeToFile(str(tmp_path / "src/dir/a.yml"), "a")
+    writeToFile(str(tmp_path / "src/b.yml"), "b")
+    writeToFile(str(tmp_path / "dst/dir/c.yml"), "c")
+    writeToFile(str(tmp_path / "dst/b.yml"), "old")
+    copy_path(str(tmp_path / "src/*"), str(tmp_path / "dst"))
+    assert openFileAsString(str(tmp_path / "dst/dir/a.yml")) == "a"
+    assert openFileAsString(str(tmp_path / "dst/dir/c.yml")) == "c"
+    assert openFileAsString(str(tmp_path / "dst/b.yml")) == "b"
+    copy_path(str(tmp_path / "src"), str(tmp_path / "dst"))
+    assert openFileAsString(str(tmp_path / "dst/src/b.yml")) == "b"
+    copy_path(str(tmp_path / "src/dir"), str(tmp_path / "new/dir"))
+    assert openFileAsString(str(tmp_path / "new/dir/a.yml")) == "a"
+
+def test_copy_path_skips_unchanged_files(tmp_path):
+    writeToFile(str(tmp_path / "src/a.yml"), "a")
+    copy_path(str(tmp_path / "src/a.yml"), str(tmp_path / "dst/a.yml"))
+    assert os.stat(tmp_path / "dst/a.yml").st_mtime_ns == os.stat(tmp_path / "src/a.yml").st_mtime_ns
+    writeToFile(str(tmp_path / "dst/a.yml"), "b")
+    copy_path(str(tmp_path / "src/a.yml"), str(tmp_path / "dst/a.yml"))
+    assert openFileAsString(str(tmp_path / "dst/a.yml")) == "a"
+
+def test_copy_path_fails_with_exception(tmp_path):
+    writeToFile(str(tmp_path / "src/a.yml"), "a")
+    writeToFile(str(tmp_path / "file"), "")
+    with pytest.raises(OSError):
+        copy_path(str(tmp_path / "src"), str(tmp_path / "file/src"))
+
+def test_move_path(tmp_path):
+    writeToFile(str(tmp_path / "src/a.yml"), "a")
+    writeToFile(str(tmp_path / "dst/a.yml"), "old")
+    move_path(str(tmp_path / "src/*"), str(tmp_path / "dst"))
+    assert openFileAsString(str(tmp_path / "dst/a.yml")) == "a"
+    assert not os.path.exists(tmp_path / "src/a.yml")
+
+def test_move_path_fails_for_not_empty_target_dir(tmp_path):
+    writeToFile(str(tmp_path / "src/name/a.yml"), "a")
+    writeToFile(str(tmp_path / "dst/name/b.yml"), "b")
+    with pytest.raises(OSError):
+        move_path(str(tmp_path / "src/name"), str(tmp_path / "dst"))
+    assert os.path.exists(tmp_path / "src/name/a.yml")
+    assert not os.path.exists(tmp_path / "dst/name/name")
+    # empty target dir is replaced
+    os.remove(tmp_path / "dst/name/b.yml")
+    move_path(str(tmp_path / "src/name"), str(tmp_path / "dst"))
+    assert openFileAsString(str(tmp_path / "dst/name/a.yml")) == "a"
+
+def test_move_path_to_another_filesystem(tmp_path, monkeypatch):
+    def replace_across_devices(source, target):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    monkeypatch.setattr(os, "replace", replace_across_devices)
+    writeToFile(str(tmp_path / "src/name/a.yml"), "a")
+    writeToFile(str(tmp_path / "dst/name/b.yml"), "b")
+    with pytest.raises(OSError):
+        move_path(str(tmp_path / "src/name"), str(tmp_path / "dst"))
+    assert not os.path.exists(tmp_path / "dst/name/name")
+    os.remove(tmp_path / "dst/name/b.yml")
+    move_path(str(tmp_path / "src/name"), str(tmp_path / "dst"))
+    assert openFileAsString(str(tmp_path / "dst/name/a.yml")) == "a"
+    assert not os.path.exists(tmp_path / "src/name")
@@ -0,0 +1,24 @@
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from .schema_helper import *
+
+# CONST
+PARAMSET_SCHEMA = "schemas/paramset.schema.json"
+
+@pytest.fixture(autouse=True)
+def change_test_dir(request, monkeypatch):
+    monkeypatch.chdir(request.fspath.dirname+"/../../..")
+    clear_schema_registry()
+
+def test_schema_is_loaded_once():
+    assert get_schema_data(PARAMSET_SCHEMA) is get_schema_data(f"./{PARAMSET_SCHEMA}")
+    assert get_schema_validator(PARAMSET_SCHEMA) is get_schema_validator(PARAMSET_SCHEMA)
+
+def test_validate_by_schema_path():
+    valid_paramset = {"version": 1, "name": "test", "parameters": {}, "applications": []}
+    validate_by_schema_path(valid_paramset, PARAMSET_SCHEMA)
+    assert get_schema_validation_errors(valid_paramset, PARAMSET_SCHEMA) == []
+    with pytest.raises(ValidationError):
+        validate_by_schema_path({"name": 1}, PARAMSET_SCHEMA)
+    assert len(get_schema_validation_errors({"name": 1}, PARAMSET_SCHEMA)) > 0
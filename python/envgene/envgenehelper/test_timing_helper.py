@@ -0,0 +1,70 @@
+import json
+import threading
+
+import pytest
+
+from . import timing_helper
+from .timing_helper import *
+
+@pytest.fixture
+def timing(monkeypatch):
+    monkeypatch.setattr(timing_helper, "_enabled", True)
+    reset_timing()
+    yield
+    reset_timing()
+
+@timed("decorated")
+def decorated_function(value):
+    count_event(FILES_WRITTEN)
+    return value
+
+def get_child(node, name):
+    return next(child for child in node["children"] if child["name"] == name)
+
+def test_spans_are_nested_and_aggregated(timing):
+    with span("build"):
+        count_event(FILES_READ, 2)
+        for i in range(3):
+            with span("namespace"):
+                assert decorated_function(i) == i
+        count_event(SUBPROCESSES)
+    report = get_timing_report()
+    build = get_child(report, "build")
+    namespace = get_child(build, "namespace")
+    assert build["calls"] == 1
+    assert namespace["calls"] == 3
+    assert get_child(namespace, "decorated")["calls"] == 3
+    assert build["counters"] == {FILES_READ: 2, FILES_WRITTEN: 3, SUBPROCESSES: 1}
+    assert namespace["counters"][FILES_WRITTEN] == 3
+    assert report["counters"] == build["counters"]
+    assert report["seconds"] >= build["seconds"] >= namespace["seconds"]
+    json.dumps(report)
+    summary = format_timing_report(report).splitlines()
+    assert summary[0].startswith("total:")
+    assert summary[1].startswith("  build:")
+    assert summary[2].startswith("    namespace:") and "(3 calls)" in summary[2]
+
+def test_spans_from_threads_are_attached_to_root(timing):
+    def worker():
+        with span("worker"):
+            count_event(FILES_READ)
+    with span("main"):
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    report = get_timing_report()
+    assert get_child(report, "worker")["calls"] == 4
+    assert report["counters"][FILES_READ] == 4
+    assert get_child(report, "main")["children"] == []
+
+def test_disabled_timing_collects_nothing(monkeypatch):
+    monkeypatch.setattr(timing_helper, "_enabled", False)
+    reset_timing()
+    with span("phase"):
+        count_event(FILES_READ)
+        assert decorated_function(1) == 1
+    report = get_timing_report()
+    assert report["children"] == []
+    assert report["counters"][FILES_READ] == 0
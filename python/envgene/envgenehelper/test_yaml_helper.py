@@ -0,0 +1,155 @@
+import pytest
+
+from . import file_helper
+from .file_helper import openFileAsString, writeToFile
+from .yaml_helper import *
+
+# CONST
+TEST_YAML = """\
+name: "test-app" # app name
+deployParameters:
+  B_PARAM: b    # paramset: b
+  A_PARAM: |
+    multi
+    line
+technicalConfigurationParameters: {}
+"""
+TEST_HEADER = "The contents of this file is generated.\nPlease do not modify"
+
+def write_legacy(file_path, yaml_data, header_text, allign_comments):
+    writeYamlToFile(file_path, yaml_data)
+    yaml_data = openYaml(file_path)
+    make_quotes_for_strings(yaml_data)
+    writeYamlToFile(file_path, yaml_data)
+    addHeaderToYaml(file_path, header_text)
+    align_spaces_before_comments(file_path)
+    if allign_comments:
+        alignYamlFileComments(file_path)
+
+@pytest.mark.parametrize("allign_comments", [False, True])
+@pytest.mark.parametrize("header_text", ["", TEST_HEADER])
+def test_write_beautified_yaml_matches_file_pipeline(tmp_path, header_text, allign_comments):
+    legacy_path = str(tmp_path / "legacy.yml")
+    result_path = str(tmp_path / "result.yml")
+    write_legacy(legacy_path, yaml_from_string(TEST_YAML), header_text, allign_comments)
+    write_beautified_yaml(result_path, yaml_from_string(TEST_YAML), header_text=header_text, allign_comments=allign_comments)
+    assert openFileAsString(result_path) == openFileAsString(legacy_path)
+
+def test_add_header_to_yaml_str():
+    assert add_header_to_yaml_str("a: 1\n", "line1\nline2") == "# line1\n# line2\na: 1\n"
+    assert add_header_to_yaml_str("# existing\na: 1\n", "line1") == "# existing\na: 1\n"
+    assert add_header_to_yaml_str("a: 1\n", "") == "a: 1\n"
+
+def test_align_spaces_before_comments_str():
+    assert align_spaces_before_comments_str("a: 1\nb:    # comment\n") == "a: 1\nb: # comment\n"
+
+def test_layer_yaml_does_not_change_base():
+    base = yaml_from_string(TEST_YAML)
+    layer = layer_yaml(base)
+    store_value_to_yaml(layer, "name", "other-app", "from application level")
+    layer["technicalConfigurationParameters"] = empty_yaml()
+    layer["technicalConfigurationParameters"]["C_PARAM"] = "c"
+    assert base["name"] == "test-app"
+    assert base["technicalConfigurationParameters"] == {}
+    assert layer["deployParameters"] is base["deployParameters"]
+    assert dumpYamlToStr(base) == dumpYamlToStr(yaml_from_string(TEST_YAML))
+
+def test_copy_yaml_and_remove_empty_dicts():
+    source = yaml_from_string(TEST_YAML)
+    result = copy_yaml_and_remove_empty_dicts(source)
+    assert "technicalConfigurationParameters" not in result
+    assert "technicalConfigurationParameters" in source
+
+STORE_VALUES_YAML = """\
+first: 1
+second: 2 # comment
+third:
+  nested: 3
+fourth: 4
+"""
+
+@pytest.mark.parametrize("seed", range(20))
+def test_store_values_to_yaml_matches_store_value_to_yaml(seed):
+    import random
+    rnd = random.Random(seed)
+    keys = ["first", "second", "third", "fourth", "fifth", "sixth", "seventh"]
+    source = "{}\n" if seed % 5 == 0 else STORE_VALUES_YAML
+    values = [(rnd.choice(keys), rnd.randint(0, 9), rnd.choice(["", "paramset: a", "# paramset: b"]))
+              for _ in range(rnd.randint(1, 12))]
+    expected = yaml_from_string(source)
+    for key, value, comment in values:
+        store_value_to_yaml(expected, key, value, comment)
+    result = yaml_from_string(source)
+    store_values_to_yaml(result, values)
+    assert list(result.keys()) == list(expected.keys())
+    assert dumpYamlToStr(result) == dumpYamlToStr(expected)
+
+def test_store_values_to_yaml_replaces_quoted_values():
+    source = 'first: "a"\nsecond: \'b\' # comment\nthird: c\n'
+    values = [("second", "x", ""), ("third", "y", "paramset: a"), ("first", "z", "")]
+    expected = yaml_from_string(source)
+    for key, value, comment in values:
+        store_value_to_yaml(expected, key, value, comment)
+    result = yaml_from_string(source)
+    store_values_to_yaml(result, values)
+    assert dumpYamlToStr(result) == dumpYamlToStr(expected)
+    assert "\"" not in dumpYamlToStr(result) and "'" not in dumpYamlToStr(result)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_merge_yaml_into_target_merges_lists_as_in_check(seed):
+    import random
+    rnd = random.Random(seed)
+    def random_element(depth=0):
+        kind = rnd.randint(0, 6 if depth < 2 else 3)
+        if kind <= 3:
+            return [1, True, 1.0, 0, "a", "b", None, 2.5][rnd.randint(0, 7)]
+        if kind <= 5:
+            return [random_element(depth + 1) for _ in range(rnd.randint(0, 2))]
+        return {rnd.choice(["x", "y", 1]): random_element(depth + 1) for _ in range(rnd.randint(0, 2))}
+    target = [random_element() for _ in range(rnd.randint(0, 6))]
+    # dicts of source list are merged with dicts of target list by index, they are not looked up
+    source = [element for element in (random_element() for _ in range(rnd.randint(0, 6))) if not isinstance(element, dict)]
+    expected = copy.deepcopy(target)
+    expected.extend(v_el for v_el in source if v_el not in expected and (isinstance(v_el, primitiveTypes) or isinstance(v_el, list)))
+    result = yaml_from_string("list: []\n")
+    result["list"].extend(copy.deepcopy(target))
+    merge_yaml_into_target(result, "", {"list": source})
+    assert result["list"] == expected
+    assert [type(element) for element in result["list"]] == [type(element) for element in expected]
+
+def test_open_yaml_with_document_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_helper, "document_cache_size", 2)
+    path = str(tmp_path / "a.yml")
+    writeToFile(path, "a: 1 # comment\n")
+    first = openYaml(path)
+    first["a"] = 2
+    second = openYaml(path)
+    assert second == {"a": 1} and second is not first
+    assert dumpYamlToStr(second) == "a: 1 # comment\n"
+    writeYamlToFile(path, first)
+    assert openYaml(path) == {"a": 2}
+    for name in ["b", "c"]:
+        writeToFile(str(tmp_path / f"{name}.yml"), f"{name}: 1\n")
+        openYaml(str(tmp_path / f"{name}.yml"))
+    assert len(file_helper._document_cache) == 2
+    file_helper.invalidate_document_cache(str(tmp_path))
+    assert not file_helper._document_cache
+
+def test_read_yaml_read_only_resolves_scalars_as_round_trip_parser():
+    text = "a: [017, 0o17, 0b11, 1_000, 0x1F, -0o7, 1e3, .5, -.inf, yes, on, true, ~, '', 2024-01-01, 1:20, 09]\nb:\n"
+    result = readYamlReadOnly(text)
+    assert type(result) is dict
+    assert result == convert_ordereddict_to_dict(readYaml(text))
+    assert readYamlReadOnly("") == {}
+
+def test_open_yaml_read_only_of_test_data():
+    file_paths = findAllYamlsInDir(os.path.join(os.path.dirname(__file__), "../../../test_data/test_environments"))
+    assert file_paths
+    for file_path in file_paths:
+        try:
+            expected = convert_ordereddict_to_dict(openYaml(file_path))
+        except ruyaml.YAMLError:
+            with pytest.raises(pyyaml.YAMLError):
+                openYamlReadOnly(file_path)
+            continue
+        assert openYamlReadOnly(file_path) == expected, file_path
@@ -0,0 +1,161 @@
+import atexit
+import json
+import threading
+import time
+from functools import wraps
+from os import getenv
+
+from .logger import logger
+
+# Phase timing is collected only when ENVGENE_TIMING is "true", otherwise spans and counters are no-ops.
+# Spans with the same name under the same parent are aggregated into one node, so spans
+# inside loops (per namespace, per file) don't grow the report. Spans opened in worker threads
+# are attached to the root and their time is summed over threads.
+ENVGENE_TIMING_ID = "ENVGENE_TIMING"
+ENVGENE_TIMING_REPORT_ID = "ENVGENE_TIMING_REPORT"
+
+FILES_READ = "files_read"
+FILES_WRITTEN = "files_written"
+SUBPROCESSES = "subprocesses"
+COUNTERS = (FILES_READ, FILES_WRITTEN, SUBPROCESSES)
+
+class TimingNode:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.children = {}
+
+    def get_child(self, name):
+        child = self.children.get(name)
+        if child is None:
+            child = self.children[name] = TimingNode(name)
+        return child
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "seconds": round(self.seconds, 3),
+            "counters": dict(self.counters),
+            "children": [child.to_dict() for child in self.children.values()],
+        }
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+class _Span:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = _get_stack()
+        with _lock:
+            self.node = stack[-1].get_child(self.name)
+        stack.append(self.node)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        seconds = time.perf_counter() - self.start
+        _get_stack().pop()
+        with _lock:
+            self.node.calls += 1
+            self.node.seconds += seconds
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+_lock = threading.Lock()
+_local = threading.local()
+_enabled = False
+_root = TimingNode("total")
+_start = 0.0
+
+def _get_stack():
+    stack = getattr(_local, "stack", None)
+    # stack is recreated in every thread after reset of timing
+    if stack is None or stack[0] is not _root:
+        stack = _local.stack = [_root]
+    return stack
+
+def is_timing_enabled():
+    return _enabled
+
+def enable_timing(report_at_exit=True):
+    global _enabled, _start
+    if _enabled:
+        return
+    _enabled = True
+    _start = time.perf_counter()
+    if report_at_exit:
+        atexit.register(report_timing)
+
+def reset_timing():
+    global _root, _start
+    with _lock:
+        _root = TimingNode("total")
+        _start = time.perf_counter()
+
+# context manager measuring a named phase, nested into the span currently open in the thread
+def span(name):
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name)
+
+# decorator measuring every call of the function as a span, function name is used by default
+def timed(name=None):
+    def decorator(func):
+        span_name = name or func.__name__
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# counter is increased for the root and for every span open in the thread
+def count_event(counter, amount=1):
+    if not _enabled:
+        return
+    stack = _get_stack()
+    with _lock:
+        for node in stack:
+            node.counters[counter] = node.counters.get(counter, 0) + amount
+
+def get_timing_report() -> dict:
+    with _lock:
+        _root.calls = 1
+        _root.seconds = time.perf_counter() - _start
+        return _root.to_dict()
+
+def format_timing_report(report: dict) -> str:
+    lines = []
+    def add_node(node, depth):
+        counters = " ".join(f"{k}={v}" for k, v in node["counters"].items() if v)
+        calls = f" ({node['calls']} calls)" if node["calls"] > 1 else ""
+        lines.append(f"{'  ' * depth}{node['name']}: {node['seconds']:.3f}s{calls} {counters}".rstrip())
+        for child in sorted(node["children"], key=lambda c: c["seconds"], reverse=True):
+            add_node(child, depth + 1)
+    add_node(report, 0)
+    return "\n".join(lines)
+
+def report_timing():
+    report = get_timing_report()
+    logger.info(f"Timing report:\n{format_timing_report(report)}")
+    report_path = getenv(ENVGENE_TIMING_REPORT_ID, "")
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Timing report is written to {report_path}")
+    else:
+        logger.info(f"Timing report JSON: {json.dumps(report)}")
+
+if getenv(ENVGENE_TIMING_ID, "false").lower() == "true":
+    enable_timing()
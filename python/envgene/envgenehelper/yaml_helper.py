@@ -4,14 +4,21 @@
 import jschon
 import jschon_tools
 import ruyaml
+import ruyaml.resolver
+import yaml as pyyaml
 import jsonschema
 import copy
+import threading
 from io import StringIO
 from .file_helper import *
 from .logger import logger
 from .json_helper import openJson
+from .schema_helper import get_schema_data, get_schema_validation_errors, validate_by_schema_path
+from .timing_helper import count_event, timed, FILES_READ, FILES_WRITTEN
 from ruyaml.scalarstring import DoubleQuotedScalarString, LiteralScalarString
 from ruyaml import CommentedMap, CommentedSeq
+from ruyaml.error import CommentMark
+from ruyaml.tokens import CommentToken
 from typing import Callable, OrderedDict
 
 def create_yaml_processor(is_safe=False) -> ruyaml.main.YAML:
@@ -27,6 +34,15 @@ def _null_representer(self: ruyaml.representer.BaseRepresenter, data: None) -> r
     yaml.Representer.add_representer(type(None), _null_representer)
     return yaml
 
+class ThreadLocalYamlProcessor(threading.local):
+    # ruyaml.YAML keeps parser and emitter state between calls, so one instance
+    # can't be shared by threads. Every thread gets its own processor.
+    def __init__(self, is_safe=False):
+        self.processor = create_yaml_processor(is_safe)
+
+    def __getattr__(self, name):
+        return getattr(self.processor, name)
+
 def get_empty_yaml():
     return ruyaml.CommentedMap()
 
@@ -36,8 +52,34 @@ def openYaml(filePath, safe_load=False, default_yaml: Callable=get_empty_yaml, a
         return default_yaml()
 
     logger.debug(f"Open yaml file: {filePath}")
+    return get_cached_document(filePath, "safe_yaml" if safe_load else "yaml",
+                               lambda path: _read_yaml_file(path, safe_load))
+
+def _read_yaml_file(filePath, safe_load):
+    count_event(FILES_READ)
+    with open(filePath, 'r') as f:
+        return readYaml(f.read(), safe_load, context=f"File: {filePath}")
+
+def openYamlReadOnly(filePath, default_yaml: Callable=dict, allow_default=False):
+    # plain dicts and lists without comments and formatting, for files which are only read, not written back.
+    # Parsed by libyaml, that is many times faster than round-trip parsing of openYaml
+    if allow_default and not check_file_exists(filePath):
+        logger.info(f'{filePath} not found. Returning default value')
+        return default_yaml()
+
+    logger.debug(f"Open yaml file for reading: {filePath}")
+    return get_cached_document(filePath, "read_only_yaml", _read_yaml_file_read_only)
+
+def _read_yaml_file_read_only(filePath):
+    count_event(FILES_READ)
     with open(filePath, 'r') as f:
-        resultYaml = readYaml(f.read(), safe_load, context=f"File: {filePath}")
+        return readYamlReadOnly(f.read(), context=f"File: {filePath}")
+
+def readYamlReadOnly(text, context=None):
+    resultYaml = pyyaml.load(text, Loader=ReadOnlyYamlLoader) if text is not None else None
+    if not resultYaml:
+        logger.warning(f"Failed to read yaml. Returning empty dictionary. Context: {context}")
+        return {}
     return resultYaml
 
 def readYaml(text, safe_load=False, context=None):
@@ -79,8 +121,12 @@ def remove_empty_list_comments(data):
 
 def writeYamlToFile(filePath, contents):
     logger.debug(f"Writing yaml to file: {filePath}")
+    if not os.path.exists(filePath):
+        invalidate_dir_index(filePath)
+    invalidate_document_cache(filePath)
     os.makedirs(os.path.dirname(filePath), exist_ok=True)
     remove_empty_list_comments(contents)
+    count_event(FILES_WRITTEN)
     with open(filePath, 'w+') as f:
         yaml.dump(contents, f)
     return
@@ -95,8 +141,13 @@ def addHeaderToYaml(file_path: str, header_text: str) :
         logger.debug(f'Adding header {header_text} to yaml: {file_path}')
         file_contents = openFileAsString(file_path)
         if not file_contents or file_contents[0] != "#":
-            comment_text = "# " + header_text.replace("\n", "\n# ")
-            writeToFile(file_path, comment_text + "\n" + file_contents)
+            writeToFile(file_path, add_header_to_yaml_str(file_contents, header_text))
+
+def add_header_to_yaml_str(yaml_str: str, header_text: str) -> str:
+    if header_text and (not yaml_str or yaml_str[0] != "#"):
+        comment_text = "# " + header_text.replace("\n", "\n# ")
+        return comment_text + "\n" + yaml_str
+    return yaml_str
 
 def alignYamlFileComments(file_path) :
     logger.debug(f'Alligning comments yaml: {file_path}')
@@ -124,15 +175,16 @@ def alignYamlComments(yamlContent, extra_indent=0):
     return None
 
 def sortYaml(yaml_data, schema_path, remove_additional_props):
-    with open(schema_path, 'r') as f:
-        schema_data = json.load(f)
+    schema_data = get_schema_data(schema_path)
     logger.debug(f'Checking yaml with schema: {schema_path}')
-    jsonschema.validate(yaml_data, schema_data)
+    validate_by_schema_path(yaml_data, schema_path)
+    # document is validated above, so jschon doesn't evaluate it for schemas without conditional subschemas
     sort_data = jschon_tools.process_json_doc(
         schema_data=schema_data,
         doc_data=yaml_data,
         sort=True,
-        remove_additional_props=remove_additional_props
+        remove_additional_props=remove_additional_props,
+        validate=False
     )
     return sort_data
 
@@ -181,6 +233,31 @@ def set_nested_yaml_attribute(yaml_content, attribute_str, value, comment="", is
 
 primitiveTypes = (int, str, bool, float)
 
+def _get_element_fingerprint(element):
+    # hashable value which is equal for equal elements, raises TypeError for elements which can't be hashed
+    if isinstance(element, dict):
+        return frozenset((k, _get_element_fingerprint(v)) for k, v in element.items())
+    if isinstance(element, list):
+        return tuple(_get_element_fingerprint(v) for v in element)
+    hash(element)
+    return element
+
+def extend_with_missing_elements(target_list, elements):
+    # appends elements which are not in target_list and were not appended before, in order of elements.
+    # Elements are looked up by fingerprints instead of comparing with every element of target_list
+    try:
+        fingerprints = set(map(_get_element_fingerprint, target_list))
+        missing_elements = []
+        for element in elements:
+            fingerprint = _get_element_fingerprint(element)
+            if fingerprint not in fingerprints:
+                fingerprints.add(fingerprint)
+                missing_elements.append(element)
+    except TypeError:
+        target_list.extend(element for element in elements if element not in target_list)
+        return
+    target_list.extend(missing_elements)
+
 def merge_yaml_into_target(yaml_content, target_attribute_str, source_yaml, overwrite_existing_values=True,  overwrite_existing_comments=True):
     if source_yaml == None:
         return
@@ -204,7 +281,7 @@ def merge_yaml_into_target(yaml_content, target_attribute_str, source_yaml, over
         if isinstance(target_yaml[k], dict) and isinstance(v, dict):
             merge_yaml_into_target(target_yaml[k], "", v, overwrite_existing_values, overwrite_existing_comments)
         elif isinstance(target_yaml[k], list) and isinstance(v, list):
-            target_yaml[k].extend(v_el for v_el in v if v_el not in target_yaml[k] and (isinstance(v_el, primitiveTypes) or isinstance(v_el, list)))
+            extend_with_missing_elements(target_yaml[k], [v_el for v_el in v if isinstance(v_el, primitiveTypes) or isinstance(v_el, list)])
             src_dicts = {}
             for v_k, v_el in enumerate(v):
                 if isinstance(v_el, dict):
@@ -238,6 +315,82 @@ def store_value_to_yaml(yamlContent, key, value, comment=""):
     else:
         yamlContent.insert(1, key, value)
 
+_NO_KEY = object()
+
+def _get_comment_column(yamlContent, key, pre, post, get_keys):
+    # column of new eol comment as CommentedMap.yaml_add_eol_comment calculates it, but with
+    # neighbours of the key passed, as map is not reordered yet
+    items = yamlContent.ca.items
+    try:
+        if pre in items:
+            return items[pre][2].start_mark.column
+        if post in items:
+            return items[post][2].start_mark.column
+        column_key = None
+        for k in get_keys():
+            if k >= key:
+                break
+            if k in items:
+                column_key = k
+        return items[column_key][2].start_mark.column if column_key is not None else None
+    except AttributeError:
+        return 0
+
+def store_values_to_yaml(yamlContent, values):
+    # Stores (key, value, comment) items to yaml with the same result as store_value_to_yaml called
+    # for every item in order, but the map is reordered once. store_value_to_yaml moves key to the
+    # second position of the map, so resulting map is: first key, stored keys from the last stored
+    # to the first stored, keys which are not stored in their order.
+    values = list(values)
+    if not values:
+        return
+    logger.debug(f"Updating {len(values)} keys in yaml")
+    keys = list(yamlContent.keys())
+    head = keys[0] if keys else _NO_KEY
+    rest = dict.fromkeys(keys[1:])
+    stored = {}
+    new_values = {}
+    for key, value, comment in values:
+        if key == head:
+            deleteCommentByKey(yamlContent, key)
+            if stored:
+                head = next(reversed(stored))
+                del stored[head]
+            elif rest:
+                head = next(iter(rest))
+                del rest[head]
+            else:
+                head = _NO_KEY
+        elif key in stored or key in rest:
+            deleteCommentByKey(yamlContent, key)
+            stored.pop(key, None)
+            rest.pop(key, None)
+        if head is _NO_KEY:
+            head = key
+            pre = post = None
+        else:
+            post = next(reversed(stored), None) if stored else next(iter(rest), None)
+            stored[key] = None
+            pre = head
+        new_values[key] = value
+        if comment:
+            get_keys = lambda: [head] + list(reversed(stored)) + list(rest)
+            column = _get_comment_column(yamlContent, key, pre, post, get_keys)
+            if comment[0] != '#':
+                comment = '# ' + comment
+            if column is None:
+                comment = ' ' + comment
+                column = 0
+            # the same eol comment as CommentedMap.yaml_add_eol_comment adds
+            yamlContent.ca.items[key] = [None, None, CommentToken(comment, CommentMark(column)), None]
+    for key, value in new_values.items():
+        # old value is deleted, so its scalar string type is not applied to the new value
+        if key in yamlContent:
+            del yamlContent[key]
+        yamlContent[key] = value
+    for key in [head] + list(reversed(stored)) + list(rest):
+        yamlContent.move_to_end(key)
+
 def merge_dict_key_with_comment(targetKey, targetYaml, sourceKey, sourceYaml, comment=""):
     if sourceKey in sourceYaml:
        deleteCommentByKey(targetYaml, targetKey)
@@ -245,36 +398,52 @@ def merge_dict_key_with_comment(targetKey, targetYaml, sourceKey, sourceYaml, co
        store_value_to_yaml(targetYaml, targetKey, sourceYaml[sourceKey], comment)
 
 
+@timed()
 def beautifyYaml(file_path, schema_path="", header_text="", allign_comments=False, wrap_all_strings=False, remove_additional_props = False):
     logger.info(f'Beautifying yaml: {file_path} with schema: {schema_path}')
     yamlData = openYaml(file_path)
+    result = render_beautified_yaml(yamlData, schema_path, header_text, allign_comments, wrap_all_strings, remove_additional_props)
+    writeToFile(file_path, result)
+
+@timed()
+def write_beautified_yaml(file_path, yaml_data, schema_path="", header_text="", allign_comments=False, wrap_all_strings=False, remove_additional_props=False):
+    # Replacement for writeYamlToFile followed by beautifyYaml. The document is
+    # passed through the same dump/load round trip in memory, so the file
+    # content is identical to the one produced by the two calls.
+    logger.info(f'Beautifying yaml: {file_path} with schema: {schema_path}')
+    result = beautify_yaml_to_str(yaml_data, schema_path, header_text, allign_comments, wrap_all_strings,
+                                  remove_additional_props, context=f"File: {file_path}")
+    writeToFile(file_path, result)
+
+def beautify_yaml_to_str(yaml_data, schema_path="", header_text="", allign_comments=False, wrap_all_strings=False, remove_additional_props=False, context=None) -> str:
+    # content which write_beautified_yaml writes for yaml_data
+    remove_empty_list_comments(yaml_data)
+    yamlData = readYaml(dumpYamlToStr(yaml_data), context=context)
+    return render_beautified_yaml(yamlData, schema_path, header_text, allign_comments, wrap_all_strings, remove_additional_props)
+
+def render_beautified_yaml(yaml_data, schema_path="", header_text="", allign_comments=False, wrap_all_strings=False, remove_additional_props=False) -> str:
     if schema_path:
-        yamlData = sortYaml(yamlData, schema_path, remove_additional_props)
+        yaml_data = sortYaml(yaml_data, schema_path, remove_additional_props)
     if wrap_all_strings:
-        make_quotes_for_all_strings(yamlData)
+        make_quotes_for_all_strings(yaml_data)
     else:
-        make_quotes_for_strings(yamlData)
-
-    writeYamlToFile(file_path, yamlData)
-    addHeaderToYaml(file_path, header_text)
-    align_spaces_before_comments(file_path)
+        make_quotes_for_strings(yaml_data)
+    remove_empty_list_comments(yaml_data)
+    result = add_header_to_yaml_str(dumpYamlToStr(yaml_data), header_text)
+    result = align_spaces_before_comments_str(result)
     if allign_comments:
-        alignYamlFileComments(file_path)
+        aligned_data = readYaml(result)
+        alignYamlComments(aligned_data, 0)
+        remove_empty_list_comments(aligned_data)
+        result = dumpYamlToStr(aligned_data)
+    return result
 
 def findYamls(dir, pattern, notPattern="", additionalRegexpPattern="", additionalRegexpNotPattern="") :
     fileList = findAllYamlsInDir(dir)
     return findFiles(fileList, pattern, notPattern, additionalRegexpPattern, additionalRegexpNotPattern)
 
 def findAllYamlsInDir(dir) :
-    result = []
-    dirPointer = pathlib.Path(dir)
-    fileList = list(dirPointer.rglob("*.yml"))
-    fileListYaml = list(dirPointer.rglob("*.yaml"))
-    if len(fileListYaml) > 0 :
-        fileList = fileList + fileListYaml
-    for f in fileList :
-        result.append(str(f))
-    return result
+    return find_in_dir(dir, "*.yml") + find_in_dir(dir, "*.yaml")
 
 def mergeYamlInDir(dir_path) :
     result = {}
@@ -302,22 +471,21 @@ def make_quotes_for_strings(yaml_data):
                 make_quotes_for_strings(v)
 
 def align_spaces_before_comments(filePath):
-    result = ""
-    f = open(filePath, 'r')
-    fileLines = f.readlines()
-    for line in fileLines:
-        if re.match(r'^(.*):( +)#(.*)$', line):
-            pattern = r'^(.*):( +)#(.*)$'
-            alignedLine = re.sub(pattern, r'\1: #\3', line)
-        else:
-            alignedLine = line
-        result += alignedLine
-
+    result = align_spaces_before_comments_str(openFileAsString(filePath))
     writeToFile(filePath, result)
 
+COMMENT_SPACES_PATTERN = re.compile(r'^(.*):( +)#(.*)$')
+
+def align_spaces_before_comments_str(yaml_str: str) -> str:
+    # newline=None gives the same newline translation as reading the file back
+    result = []
+    for line in StringIO(yaml_str, newline=None).readlines():
+        result.append(COMMENT_SPACES_PATTERN.sub(r'\1: #\3', line))
+    return "".join(result)
+
 def copy_yaml_and_remove_empty_dicts(source_yaml):
-    # copying yaml dict
-    result = copy.deepcopy(source_yaml)
+    # only mappings are copied, lists and scalars are shared with source_yaml
+    result = source_yaml.copy()
     # going to recursion for dict entities
     for key in result.keys():
         value = result[key]
@@ -329,6 +497,17 @@ def copy_yaml_and_remove_empty_dicts(source_yaml):
         del result[k]
     return result
 
+def layer_yaml(base_yaml):
+    # Copy-on-write layer over base_yaml: top level keys and their comments are
+    # copied, nested values are shared with base_yaml. Values of the layer may be
+    # replaced or removed, but nested values must not be modified in place.
+    result = base_yaml.copy()
+    if isinstance(base_yaml, CommentedMap):
+        layer_comment = copy.copy(base_yaml.ca)
+        layer_comment._items = {k: copy.copy(v) for k, v in base_yaml.ca.items.items()}
+        setattr(result, ruyaml.comments.Comment.attrib, layer_comment)
+    return result
+
 def empty_yaml():
     result = yaml.load("{}")
     return result
@@ -337,10 +516,11 @@ def yaml_from_string(yaml_str):
     result = yaml.load(yaml_str)
     return result
 
-def validate_yaml_by_scheme_or_fail(yaml_file_path: str, schema_file_path: str) -> None:
-    yaml_content = openYaml(yaml_file_path)
-    schema_content = openJson(schema_file_path)
-    errors = validate_yaml_data_by_scheme(yaml_content, schema_content)
+def validate_yaml_by_scheme_or_fail(yaml_file_path: str, schema_file_path: str, yaml_content=None) -> None:
+    # yaml_content is content of yaml_file_path if it is already read
+    if yaml_content is None:
+        yaml_content = openYaml(yaml_file_path)
+    errors = get_schema_validation_errors(yaml_content, schema_file_path)
     if len(errors) > 0:
         rel_path = getRelPath(yaml_file_path)
         logger.error(f"Validation of {rel_path} file has failed")
@@ -378,6 +558,41 @@ def convert_ordereddict_to_dict(obj):
     else:
         return obj
 
+class ReadOnlyYamlLoader(getattr(pyyaml, "CSafeLoader", pyyaml.SafeLoader)):
+    # PyYAML resolves scalars by YAML 1.1 and ruyaml by YAML 1.2, where 'yes' is a string and '017' is decimal.
+    # Resolvers of ruyaml for YAML 1.2 are used, so values are the same as openYaml returns
+    yaml_implicit_resolvers = {}
+
+    def construct_mapping(self, node, deep=False):
+        # duplicate keys are errors as in ruyaml, PyYAML keeps the last value silently
+        if isinstance(node, pyyaml.MappingNode):
+            keys = set()
+            for key_node, _ in node.value:
+                if key_node.tag == "tag:yaml.org,2002:merge":
+                    continue
+                key = self.construct_object(key_node, deep=True)
+                if isinstance(key, (list, dict)):
+                    continue
+                if key in keys:
+                    raise pyyaml.constructor.ConstructorError("while constructing a mapping", node.start_mark,
+                                                              f"found duplicate key {key!r}", key_node.start_mark)
+                keys.add(key)
+        return super().construct_mapping(node, deep)
+
+def _construct_yaml_1_2_int(loader, node):
+    value = loader.construct_scalar(node).replace("_", "")
+    sign = -1 if value[0] == "-" else 1
+    value = value.lstrip("+-")
+    bases = {"0b": 2, "0o": 8, "0x": 16}
+    if value[:2] in bases:
+        return sign * int(value[2:], bases[value[:2]])
+    return sign * int(value)
+
+for _versions, _tag, _regexp, _first_chars in ruyaml.resolver.implicit_resolvers:
+    if (1, 2) in _versions and _tag not in ("tag:yaml.org,2002:value", "tag:yaml.org,2002:yaml"):
+        ReadOnlyYamlLoader.add_implicit_resolver(_tag, _regexp, _first_chars)
+ReadOnlyYamlLoader.add_constructor("tag:yaml.org,2002:int", _construct_yaml_1_2_int)
+
 jschon.create_catalog('2020-12')
-yaml = create_yaml_processor()
-safe_yaml = create_yaml_processor(is_safe=True)
+yaml = ThreadLocalYamlProcessor()
+safe_yaml = ThreadLocalYamlProcessor(is_safe=True)
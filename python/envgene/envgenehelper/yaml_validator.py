@@ -1,5 +1,5 @@
 from .logger import logger
-from .collections_helper import dump_as_yaml_format
+from .collections_helper import dump_as_yaml_format, lazy_dump_as_yaml_format
 import re
 import copy
 
@@ -13,8 +13,8 @@
 def checkByWhiteList(yamlContent, whiteList, removeEmptyDicts=False, isComplex=False):
     yamlCompare = remove_empty_dicts_recursive(yamlContent) if removeEmptyDicts else copy.deepcopy(yamlContent)
     whiteListCompare = remove_empty_dicts_recursive(whiteList) if removeEmptyDicts else copy.deepcopy(whiteList)
-    logger.debug(f"Yaml to check: {dump_as_yaml_format(yamlCompare)}")
-    logger.debug(f"White list: {dump_as_yaml_format(whiteListCompare)}")
+    logger.debug("Yaml to check: %s", lazy_dump_as_yaml_format(yamlCompare))
+    logger.debug("White list: %s", lazy_dump_as_yaml_format(whiteListCompare))
     errors = {
         "extraKeys": [],
         "absentKeys": [],
@@ -1,17 +1,63 @@
 import math
+import threading
+from collections import OrderedDict
 from typing import cast
 from typing import Dict
 from typing import List
 from typing import Mapping
 from typing import Sequence
+from typing import Set
 from typing import Tuple
 
 import jschon.jsonschema
 from jschon.json import JSONCompatible
+from jschon.vocabulary import SubschemaMixin
 
 
 _END_SORT_KEY = (math.inf,)
 
+# Applicator keywords which apply subschemas to an instance regardless of its content (other than its type and
+# property names), so that sort keys of a document can be derived from the schema without evaluating it.
+_STATIC_APPLICATOR_KEYWORDS = frozenset({'properties', 'additionalProperties', 'items', '$ref'})
+# Keywords which apply referenced schemas, they aren't subschema keywords
+_REFERENCE_KEYWORDS = frozenset({'$ref', '$dynamicRef', '$recursiveRef'})
+
+_COMPILED_SCHEMAS_CACHE_SIZE = 64
+
+
+class _CompiledSchema:
+    """
+    A JSON schema compiled from schema data, along with sort keys of its (sub)schemas.
+    """
+
+    def __init__(self, schema_data: Mapping[str, JSONCompatible]) -> None:
+        # schema data is referenced to keep its id from being reused while it's cached
+        self.schema_data = schema_data
+        try:
+            self.root_schema = jschon.JSONSchema(schema_data)
+        except jschon.CatalogError:
+            # jschon only supports newer jsonschema drafts
+            schema_data = dict(schema_data)
+            schema_data['$schema'] = "https://json-schema.org/draft/2020-12/schema"
+            self.root_schema = jschon.JSONSchema(schema_data)
+        self.is_static = _is_static_schema(self.root_schema)
+        self.sort_keys: Dict[jschon.URI, Mapping[jschon.JSONPointer, Tuple[int, ...]]] = {}
+
+    def get_sort_keys_for_schema(self, schema: jschon.JSONSchema) -> Mapping[jschon.JSONPointer, Tuple[int, ...]]:
+        canonical_uri = schema.canonical_uri
+        if canonical_uri is None:  # pragma: no cover
+            raise ValueError('Schema must have a canonical URI')
+        if sort_keys := self.sort_keys.get(canonical_uri):
+            return sort_keys
+        sort_keys = _get_sort_keys_for_json_nodes(schema)
+        self.sort_keys[canonical_uri] = sort_keys
+        return sort_keys
+
+
+# compiled schemas by id of schema data, least recently used ones are evicted
+_compiled_schemas: 'OrderedDict[int, _CompiledSchema]' = OrderedDict()
+_compiled_schemas_lock = threading.Lock()
+
 
 def _get_sort_keys_for_json_nodes(root_node: jschon.JSON) -> Mapping[jschon.JSONPointer, Tuple[int, ...]]:
     """
@@ -41,25 +87,83 @@ def _recurse(node: jschon.JSON, node_sort_key: Tuple[int, ...]) -> None:
     return mapping
 
 
-def _get_sort_keys_for_json_doc(
-    *, root_result: jschon.jsonschema.Result
+def _is_static_schema(root_schema: jschon.JSONSchema) -> bool:
+    """
+    Checks whether only static applicator keywords are reachable from the schema, i.e. which subschemas apply
+    to a node of a valid document doesn't depend on values within the document.
+    """
+    seen: Set[int] = set()
+
+    def _is_static(schema: jschon.JSON) -> bool:
+        if not isinstance(schema, jschon.JSONSchema) or id(schema) in seen:
+            return True
+        seen.add(id(schema))
+        for key, keyword in schema.keywords.items():
+            if keyword.static:
+                continue
+            if key not in _STATIC_APPLICATOR_KEYWORDS:
+                if isinstance(keyword, SubschemaMixin) or key in _REFERENCE_KEYWORDS:
+                    return False
+                continue
+            if key == '$ref':
+                subschemas = [keyword.refschema]
+            elif key == 'properties':
+                subschemas = list(keyword.json.values())
+            else:
+                subschemas = [keyword.json]
+            if not all(_is_static(subschema) for subschema in subschemas):
+                return False
+        return True
+
+    return _is_static(root_schema)
+
+
+def _get_static_sort_keys_for_json_doc(
+    *, doc_json: jschon.JSON, compiled_schema: _CompiledSchema
 ) -> Mapping[jschon.JSONPointer, Tuple[int, ...]]:
-    schema_sort_keys_cache: Dict[jschon.URI, Mapping[jschon.JSONPointer, Tuple[int, ...]]] = {}
+    """
+    Gets sort keys of a document for a static schema without evaluating the document, in the same way jschon would
+    apply static applicator keywords to it. The document is assumed to be valid.
+    """
+    doc_sort_keys: Dict[jschon.JSONPointer, Tuple[int, ...]] = {doc_json.path: ()}
 
-    def _get_sort_keys_for_schema(schema: jschon.JSONSchema) -> Mapping[jschon.JSONPointer, Tuple[int, ...]]:
-        canonical_uri = schema.canonical_uri
-        if canonical_uri is None:  # pragma: no cover
-            raise ValueError('Schema must have a canonical URI')
-        if sort_keys := schema_sort_keys_cache.get(canonical_uri):
-            return sort_keys
-        sort_keys = _get_sort_keys_for_json_nodes(schema)
-        schema_sort_keys_cache[canonical_uri] = sort_keys
-        return sort_keys
+    def _traverse_schema(schema: jschon.JSONSchema, instance: jschon.JSON) -> None:
+        if not isinstance(schema.data, Mapping):
+            return
+        schema_sort_keys = compiled_schema.get_sort_keys_for_schema(schema)
+        for key, keyword in schema.keywords.items():
+            if keyword.static or instance.type not in keyword.instance_types:
+                continue
+            doc_sort_keys.setdefault(instance.path, schema_sort_keys[jschon.JSONPointer((key,))])
+            if key == 'properties':
+                for name, item in instance.items():
+                    if name in keyword.json:
+                        doc_sort_keys.setdefault(item.path, schema_sort_keys[jschon.JSONPointer((key, name))])
+                        _traverse_schema(keyword.json[name], item)
+            elif key == 'additionalProperties':
+                properties = schema.keywords.get('properties')
+                known_property_names = properties.json.keys() if properties else ()
+                for name, item in instance.items():
+                    if name not in known_property_names:
+                        _traverse_schema(keyword.json, item)
+            elif key == 'items':
+                for item in instance:
+                    _traverse_schema(keyword.json, item)
+            elif key == '$ref':
+                _traverse_schema(keyword.refschema, instance)
 
+    _traverse_schema(compiled_schema.root_schema, doc_json)
+
+    return doc_sort_keys
+
+
+def _get_sort_keys_for_json_doc(
+    *, root_result: jschon.jsonschema.Result, compiled_schema: _CompiledSchema
+) -> Mapping[jschon.JSONPointer, Tuple[int, ...]]:
     doc_sort_keys: Dict[jschon.JSONPointer, Tuple[int, ...]] = {}
 
     def _traverse_result(result: jschon.jsonschema.Result) -> None:
-        schema_sort_keys = _get_sort_keys_for_schema(result.schema)
+        schema_sort_keys = compiled_schema.get_sort_keys_for_schema(result.schema)
         doc_sort_keys.setdefault(result.instance.path, schema_sort_keys[result.relpath])
         for child in result.children.values():
             _traverse_result(child)
@@ -69,15 +173,25 @@ def _traverse_result(result: jschon.jsonschema.Result) -> None:
     return doc_sort_keys
 
 
-def _get_root_result(doc_json: jschon.JSON, schema_data: Mapping[str, JSONCompatible]) -> jschon.jsonschema.Result:
-    try:
-        root_schema = jschon.JSONSchema(schema_data)
-    except jschon.CatalogError:
-        # jschon only supports newer jsonschema drafts
-        schema_data = dict(schema_data)
-        schema_data['$schema'] = "https://json-schema.org/draft/2020-12/schema"
-        root_schema = jschon.JSONSchema(schema_data)
-    res = root_schema.evaluate(doc_json)
+def _get_compiled_schema(schema_data: Mapping[str, JSONCompatible]) -> _CompiledSchema:
+    """
+    Gets the compiled schema for schema data. Schemas are compiled once per schema data object,
+    so schema data must not be modified after it's been processed.
+    """
+    with _compiled_schemas_lock:
+        compiled_schema = _compiled_schemas.get(id(schema_data))
+        if compiled_schema is not None and compiled_schema.schema_data is schema_data:
+            _compiled_schemas.move_to_end(id(schema_data))
+            return compiled_schema
+        compiled_schema = _CompiledSchema(schema_data)
+        _compiled_schemas[id(schema_data)] = compiled_schema
+        if len(_compiled_schemas) > _COMPILED_SCHEMAS_CACHE_SIZE:
+            _compiled_schemas.popitem(last=False)
+        return compiled_schema
+
+
+def _get_root_result(doc_json: jschon.JSON, compiled_schema: _CompiledSchema) -> jschon.jsonschema.Result:
+    res = compiled_schema.root_schema.evaluate(doc_json)
     if not res.valid:
         raise ValueError('Document failed schema validation')
     return res
@@ -89,10 +203,20 @@ def process_json_doc(
     schema_data: Mapping[str, JSONCompatible],
     sort: bool = False,
     remove_additional_props: bool = False,
+    validate: bool = True,
 ) -> JSONCompatible:
+    """
+    @param validate: if False, the document is assumed to be valid against the schema and,
+    unless the schema has conditional subschemas, sort keys are derived from the schema without evaluation
+    """
     doc_json = jschon.JSON(doc_data)
-    root_result = _get_root_result(doc_json, schema_data=schema_data)
-    doc_sort_keys = _get_sort_keys_for_json_doc(root_result=root_result)
+    compiled_schema = _get_compiled_schema(schema_data)
+    doc_sort_keys: Mapping[jschon.JSONPointer, Tuple[int, ...]]
+    if not validate and compiled_schema.is_static:
+        doc_sort_keys = _get_static_sort_keys_for_json_doc(doc_json=doc_json, compiled_schema=compiled_schema)
+    else:
+        root_result = _get_root_result(doc_json, compiled_schema=compiled_schema)
+        doc_sort_keys = _get_sort_keys_for_json_doc(root_result=root_result, compiled_schema=compiled_schema)
 
     def _traverse_node(node: JSONCompatible, json_node: jschon.JSON) -> JSONCompatible:
         """
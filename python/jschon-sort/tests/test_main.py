@@ -0,0 +1,206 @@
+import json
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+
+import jschon
+import pytest
+
+import jschon_tools
+from jschon_tools import _main
+
+STATIC_SCHEMA: Dict[str, Any] = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "range": {"$ref": "#/$defs/range"},
+        "ranges": {"type": "array", "items": {"$ref": "#/$defs/range"}},
+        "labels": {
+            "type": "object",
+            "properties": {"team": {"type": "string"}, "owner": {"type": "string"}},
+            "additionalProperties": {"type": "string"},
+        },
+        "tree": {"$ref": "#/$defs/tree"},
+        "anything": True,
+    },
+    "additionalProperties": {
+        "description": "unknown properties are objects",
+        "type": "object",
+        "properties": {"b": {}, "a": {}},
+    },
+    "$defs": {
+        "range": {"type": "object", "properties": {"start": {"type": "number"}, "end": {"type": "number"}}},
+        "tree": {
+            "type": "object",
+            "properties": {"value": {}, "children": {"type": "array", "items": {"$ref": "#/$defs/tree"}}},
+            "additionalProperties": False,
+        },
+    },
+}
+
+STATIC_DOC: Dict[str, Any] = {
+    "zzz": {"a": 1, "b": 2, "c": 3},
+    "tree": {"children": [{"children": [], "value": 2}], "value": 1},
+    "labels": {"extra": "x", "owner": "o", "team": "t"},
+    "anything": {"y": 1, "x": 2},
+    "ranges": [{"end": 2, "start": 1}, {"start": 3}],
+    "range": {"end": 20, "start": 10},
+    "name": "doc",
+    "aaa": {"b": 1, "a": 2},
+}
+
+CONDITIONAL_SCHEMA: Dict[str, Any] = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "type": "object",
+    "properties": {"kind": {"type": "string"}},
+    "if": {"properties": {"kind": {"const": "range"}}},
+    "then": {"properties": {"start": {}, "end": {}}},
+    "else": {"properties": {"end": {}, "start": {}}},
+}
+
+ONE_OF_SCHEMA: Dict[str, Any] = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "oneOf": [
+        {"type": "object", "properties": {"start": {}, "end": {}}, "required": ["start"]},
+        {"type": "object", "properties": {"end": {}, "to": {}}, "required": ["to"]},
+    ],
+}
+
+
+@pytest.fixture(autouse=True, scope="module")
+def catalog() -> None:
+    jschon.create_catalog('2020-12')
+
+
+@pytest.fixture
+def root_result_calls(monkeypatch: pytest.MonkeyPatch) -> Iterator[List[jschon.JSON]]:
+    calls: List[jschon.JSON] = []
+    get_root_result = _main._get_root_result
+
+    def _get_root_result(doc_json: jschon.JSON, compiled_schema: Any) -> jschon.jsonschema.Result:
+        calls.append(doc_json)
+        return get_root_result(doc_json, compiled_schema)
+
+    monkeypatch.setattr(_main, "_get_root_result", _get_root_result)
+    yield calls
+
+
+def _process(schema_data: Dict[str, Any], doc_data: Any, **kwargs: Any) -> str:
+    # JSON dump keeps order of properties, which dict comparison ignores
+    return json.dumps(jschon_tools.process_json_doc(schema_data=schema_data, doc_data=doc_data, **kwargs))
+
+
+@pytest.mark.parametrize("kwargs", [{"sort": True}, {"remove_additional_props": True}, {}])
+def test_static_schema_without_validation(root_result_calls: List[jschon.JSON], kwargs: Dict[str, Any]) -> None:
+    assert _main._get_compiled_schema(STATIC_SCHEMA).is_static
+    expected = _process(STATIC_SCHEMA, STATIC_DOC, **kwargs)
+    assert len(root_result_calls) == 1
+    assert _process(STATIC_SCHEMA, STATIC_DOC, validate=False, **kwargs) == expected
+    assert len(root_result_calls) == 1
+
+
+def test_static_schema_sort_result() -> None:
+    # properties are ordered by the first keyword of the schema that applies to them, so additional properties
+    # with the "type" keyword go before defined properties, properties unknown to the schema go last by name
+    result = jschon_tools.process_json_doc(schema_data=STATIC_SCHEMA, doc_data=STATIC_DOC, sort=True, validate=False)
+    assert json.dumps(result) == json.dumps(
+        {
+            "aaa": {"b": 1, "a": 2},
+            "zzz": {"b": 2, "a": 1, "c": 3},
+            "name": "doc",
+            "range": {"start": 10, "end": 20},
+            "ranges": [{"start": 1, "end": 2}, {"start": 3}],
+            "labels": {"extra": "x", "team": "t", "owner": "o"},
+            "tree": {"value": 1, "children": [{"value": 2, "children": []}]},
+            "anything": {"x": 2, "y": 1},
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "schema_data, doc_data",
+    [
+        (CONDITIONAL_SCHEMA, {"end": 2, "kind": "range", "start": 1}),
+        (CONDITIONAL_SCHEMA, {"start": 1, "kind": "other", "end": 2}),
+        (ONE_OF_SCHEMA, {"end": 2, "start": 1}),
+        (ONE_OF_SCHEMA, {"to": 2, "end": 1}),
+    ],
+)
+def test_conditional_schema_is_evaluated(
+    root_result_calls: List[jschon.JSON], schema_data: Dict[str, Any], doc_data: Dict[str, Any]
+) -> None:
+    assert not _main._get_compiled_schema(schema_data).is_static
+    expected = _process(schema_data, doc_data, sort=True)
+    assert _process(schema_data, doc_data, sort=True, validate=False) == expected
+    assert len(root_result_calls) == 2
+
+
+def test_conditional_schema_sort_result() -> None:
+    result = jschon_tools.process_json_doc(
+        schema_data=CONDITIONAL_SCHEMA, doc_data={"end": 2, "kind": "range", "start": 1}, sort=True, validate=False
+    )
+    assert list(result) == ["start", "end", "kind"]
+    result = jschon_tools.process_json_doc(
+        schema_data=CONDITIONAL_SCHEMA, doc_data={"start": 1, "kind": "other", "end": 2}, sort=True, validate=False
+    )
+    assert list(result) == ["end", "start", "kind"]
+
+
+def test_invalid_document() -> None:
+    with pytest.raises(ValueError):
+        jschon_tools.process_json_doc(schema_data=STATIC_SCHEMA, doc_data={"name": 1}, sort=True)
+    with pytest.raises(ValueError):
+        jschon_tools.process_json_doc(schema_data=ONE_OF_SCHEMA, doc_data={"end": 1}, sort=True, validate=False)
+
+
+def test_compiled_schemas_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(_main, "_compiled_schemas", OrderedDict())
+    monkeypatch.setattr(_main, "_COMPILED_SCHEMAS_CACHE_SIZE", 2)
+    schemas = [dict(STATIC_SCHEMA) for _ in range(3)]
+
+    compiled_schema = _main._get_compiled_schema(schemas[0])
+    assert _main._get_compiled_schema(schemas[0]) is compiled_schema
+    # equal schema data in another object is compiled again
+    assert _main._get_compiled_schema(schemas[1]) is not compiled_schema
+
+    # least recently used schema is evicted
+    assert _main._get_compiled_schema(schemas[0]) is compiled_schema
+    _main._get_compiled_schema(schemas[2])
+    assert list(_main._compiled_schemas) == [id(schemas[0]), id(schemas[2])]
+    assert _main._get_compiled_schema(schemas[0]) is compiled_schema
+    assert _main._get_compiled_schema(schemas[1]) is not compiled_schema
+    assert list(_main._compiled_schemas) == [id(schemas[0]), id(schemas[1])]
+
+
+def test_compiled_schemas_cache_checks_schema_identity(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(_main, "_compiled_schemas", OrderedDict())
+    schema_data = dict(STATIC_SCHEMA)
+    other_schema_data = dict(CONDITIONAL_SCHEMA)
+    compiled_schema = _main._get_compiled_schema(schema_data)
+    # entry with the same id, but for other schema data, as if schema data object was freed and its id reused
+    _main._compiled_schemas[id(other_schema_data)] = compiled_schema
+    assert _main._get_compiled_schema(other_schema_data) is not compiled_schema
+    assert not _main._get_compiled_schema(other_schema_data).is_static
+
+
+def test_sort_keys_are_cached_for_compiled_schema() -> None:
+    schema_data = dict(STATIC_SCHEMA)
+    compiled_schema = _main._get_compiled_schema(schema_data)
+    first = _process(schema_data, STATIC_DOC, sort=True, validate=False)
+    sort_keys = dict(compiled_schema.sort_keys)
+    assert sort_keys
+    assert _process(schema_data, STATIC_DOC, sort=True) == first
+    assert all(compiled_schema.sort_keys[uri] is keys for uri, keys in sort_keys.items())
+
+
+def test_old_draft_schema() -> None:
+    schema_data = {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "type": "object",
+        "properties": {"b": {}, "a": {}},
+    }
+    result = jschon_tools.process_json_doc(schema_data=schema_data, doc_data={"a": 1, "b": 2}, sort=True, validate=False)
+    assert list(result) == ["b", "a"]
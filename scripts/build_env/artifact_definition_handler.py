@@ -43,6 +43,7 @@ def find_registry_configuration(template_name, base_path):
     app_definition = getAppDefinitionPath(base_path, template_name)
     check_dir_exist_and_create(f"{base_path}/configuration/artifact_definitions")
 
+    invalidate_dir_index(app_definition)
     with open(app_definition, mode="w") as final_registry:
         safe_dump(applications_definition, final_registry)
     beautifyYaml(app_definition, "schemas/artifact-definition.schema.json", remove_additional_props=True)
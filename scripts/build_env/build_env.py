@@ -5,6 +5,11 @@
 import yaml
 import re
 import pathlib
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from envgenehelper import *
 from resource_profiles import processResourceProfiles
 from schema_validation import checkEnvSpecificParametersBySchema
@@ -12,6 +17,18 @@
 
 # const
 GENERATED_HEADER = "The contents of this file is generated from template artifact: %s.\nContents will be overwritten by next generation.\nPlease modify this contents only for development purposes or as workaround."
+JINJA_BYTECODE_CACHE_DIR = os.getenv("ENVGENE_JINJA_BYTECODE_CACHE_DIR", "")
+NAMESPACE_WORKERS = int(os.getenv("ENVGENE_NAMESPACE_WORKERS", "1") or 1)
+ENV_SPECIFIC_PARAMSETS_KEYS = ["envSpecificParamsets", "envSpecificE2EParamsets", "envSpecificTechnicalParamsets"]
+APPLICATION_SCHEMA = "schemas/application.schema.json"
+
+# Jinja2 environments for .j2 paramsets are shared by the whole process, one per
+# paramset directory, so includes are still resolved relative to the paramset.
+# Every environment keeps compiled templates in memory, the optional bytecode
+# cache keeps them on disk, keyed by template path and source checksum.
+_paramset_jinja_envs = {}
+_paramset_jinja_envs_lock = threading.Lock()
+_paramset_bytecode_cache = None
 
 def findNamespaces(dir) :
     result = []
@@ -19,13 +36,12 @@ def findNamespaces(dir) :
     for filePath in fileList:
         if "/Namespaces/" in filePath:
             result.append(filePath)
-    logger.info(f'List of {dir} namespaces: \n {dump_as_yaml_format(result)}')
+    logger.info('List of %s namespaces: \n %s', dir, lazy_dump_as_yaml_format(result))
     return result
 
-def processFileList(mask, dict, dirPointer):
-    fileList = list(dirPointer.rglob(mask))
-    for f in fileList:
-        filePath = str(f)
+def processFileList(mask, dict, dir):
+    fileList = find_in_dir(dir, mask)
+    for filePath in fileList:
         # envSpecific = false will be update later during templates parsing
         key = extractNameFromFile(filePath)
         if key in dict:
@@ -36,11 +52,10 @@ def processFileList(mask, dict, dirPointer):
 
 def createParamsetsMap(dir):
     result = {}
-    dirPointer = pathlib.Path(dir)
     masks = ["*.json", "*.yml", "*.yaml", "*.j2"]
     for mask in masks:
-        result = processFileList(mask, result, dirPointer)
-    logger.debug(f'List of {dir} paramsets: \n %s', dump_as_yaml_format(result))
+        result = processFileList(mask, result, dir)
+    logger.debug('List of %s paramsets: \n %s', dir, lazy_dump_as_yaml_format(result))
     return result
 
 def sortParameters(params) :
@@ -50,17 +65,37 @@ def sortParameters(params) :
             result[k] = params[k]
     return result
 
+def get_paramset_bytecode_cache():
+    global _paramset_bytecode_cache
+    if JINJA_BYTECODE_CACHE_DIR and _paramset_bytecode_cache is None:
+        os.makedirs(JINJA_BYTECODE_CACHE_DIR, exist_ok=True)
+        _paramset_bytecode_cache = FileSystemBytecodeCache(JINJA_BYTECODE_CACHE_DIR)
+    return _paramset_bytecode_cache
+
+def get_paramset_jinja_env(paramset_dir):
+    env = _paramset_jinja_envs.get(paramset_dir)
+    if env is None:
+        with _paramset_jinja_envs_lock:
+            env = _paramset_jinja_envs.get(paramset_dir)
+            if env is None:
+                env = Environment(loader=FileSystemLoader(paramset_dir), bytecode_cache=get_paramset_bytecode_cache())
+                _paramset_jinja_envs[paramset_dir] = env
+    return env
+
+def clear_paramset_jinja_envs():
+    with _paramset_jinja_envs_lock:
+        _paramset_jinja_envs.clear()
+
 def openParamset(path, template_context=None) :
     if path.endswith(".json"):
         return openJson(path)
     # using safe load to load without comments
     if path.endswith(".j2"):
         # First render the template
-        from jinja2 import Environment, FileSystemLoader
-        env = Environment(loader=FileSystemLoader(os.path.dirname(path)))
+        env = get_paramset_jinja_env(os.path.dirname(path))
         template = env.get_template(os.path.basename(path))
         rendered = template.render(**(template_context or {}))
-        return yaml.safe_load(rendered)
+        return readYaml(rendered, safe_load=True, context=f"File: {path}")
     paramsetYaml = openYaml(path, safe_load=True)
     return paramsetYaml
 
@@ -162,7 +197,59 @@ def findEnvDefinitionFromTemplatePath(templatePath, env_instances_dir=None):
     raise ReferenceError(f"Environment definition not found for template {templatePath}")
 
 
-def convertParameterSetsToParameters(templatePath, paramsTemplate, paramsetsTag, parametersTag, paramset_map, env_specific_params_map, header_text="", env_instances_dir=None):
+@dataclass
+class EnvironmentContext:
+    # Environment data resolved once per build_env run and shared by all templates
+    # and paramsets of the environment, instead of searching and parsing
+    # env_definition.yml for every paramset
+    source_env_definition: dict
+    env_definition: dict = None
+    template_context: dict = None
+
+def create_paramset_template_context(env_definition):
+    # Get environment name from inventory, with fallback to derived name from path
+    env_name = env_definition["inventory"].get("environmentName")
+
+    # Get cloud name and cluster information for macro support
+    cloud_name = env_definition["inventory"].get("cloudName", "")
+    cluster_name = env_definition.get("_derived_cluster_name", "")
+
+    # Create cloudNameWithCluster for macro support
+    cloud_name_with_cluster = f"{cloud_name}-{cluster_name}" if cloud_name and cluster_name else cloud_name
+
+    # Create environment context with comprehensive macro support
+    current_env = {
+        "name": env_name,
+        "environmentName": env_name,  # Alternative access
+        "cloud": cloud_name,
+        "cloudNameWithCluster": cloud_name_with_cluster,
+        "solution_structure": env_definition.get("solutionStructure", {}),
+        "additionalTemplateVariables": env_definition.get("envTemplate", {}).get("additionalTemplateVariables", {}),
+        "cluster": {
+            "name": cluster_name,
+            # Add cluster-specific properties that might be used in templates
+            "cloud_api_url": env_definition.get("envTemplate", {}).get("additionalTemplateVariables", {}).get("cloud_api_url", ""),
+            "cloud_api_port": env_definition.get("envTemplate", {}).get("additionalTemplateVariables", {}).get("cloud_api_port", ""),
+            "cloud_public_url": env_definition.get("envTemplate", {}).get("additionalTemplateVariables", {}).get("cloud_public_url", ""),
+            "cloud_api_protocol": env_definition.get("envTemplate", {}).get("additionalTemplateVariables", {}).get("cloud_api_protocol", "https")
+        }
+    }
+    return {
+        "env_definition": env_definition,
+        "current_env": current_env
+    }
+
+def create_environment_context(templatePath, env_instances_dir):
+    # templatePath is any template of rendered environment, env definition is searched from its directory
+    env_context = EnvironmentContext(source_env_definition=getEnvDefinition(env_instances_dir))
+    try:
+        env_context.env_definition = findEnvDefinitionFromTemplatePath(templatePath, env_instances_dir)
+        env_context.template_context = create_paramset_template_context(env_context.env_definition)
+    except Exception as e:
+        logger.warning(f"Failed to get template context for paramsets, paramsets will be rendered without it: {str(e)}")
+    return env_context
+
+def convertParameterSetsToParameters(templatePath, paramsTemplate, paramsetsTag, parametersTag, paramset_map, env_specific_params_map, header_text="", env_context=None, app_documents=None):
     params = copy.deepcopy(paramsTemplate[parametersTag])
     for pset in paramsTemplate[paramsetsTag]:
         # Check if paramset exists in paramset_map before accessing it
@@ -175,44 +262,14 @@ def convertParameterSetsToParameters(templatePath, paramsTemplate, paramsetsTag,
             paramSetFile = entry["filePath"]
             logger.info(f"Processing paramset {pset} in file {paramSetFile}")
             isEnvSpecificParamset = entry["envSpecific"]
-            # Get template context from environment definition
-            try:
-                env_definition = findEnvDefinitionFromTemplatePath(templatePath, env_instances_dir)
-                # Get environment name from inventory, with fallback to derived name from path
-                env_name = env_definition["inventory"].get("environmentName")
-                
-                # Get cloud name and cluster information for macro support
-                cloud_name = env_definition["inventory"].get("cloudName", "")
-                cluster_name = env_definition.get("_derived_cluster_name", "")
-                
-                # Create cloudNameWithCluster for macro support
-                cloud_name_with_cluster = f"{cloud_name}-{cluster_name}" if cloud_name and cluster_name else cloud_name
-                
-                # Create environment context with comprehensive macro support
-                current_env = {
-                    "name": env_name,
-                    "environmentName": env_name,  # Alternative access
-                    "cloud": cloud_name,
-                    "cloudNameWithCluster": cloud_name_with_cluster,
-                    "solution_structure": env_definition.get("solutionStructure", {}),
-                    "additionalTemplateVariables": env_definition.get("envTemplate", {}).get("additionalTemplateVariables", {}),
-                    "cluster": {
-                        "name": cluster_name,
-                        # Add cluster-specific properties that might be used in templates
-                        "cloud_api_url": env_definition.get("envTemplate", {}).get("additionalTemplateVariables", {}).get("cloud_api_url", ""),
-                        "cloud_api_port": env_definition.get("envTemplate", {}).get("additionalTemplateVariables", {}).get("cloud_api_port", ""),
-                        "cloud_public_url": env_definition.get("envTemplate", {}).get("additionalTemplateVariables", {}).get("cloud_public_url", ""),
-                        "cloud_api_protocol": env_definition.get("envTemplate", {}).get("additionalTemplateVariables", {}).get("cloud_api_protocol", "https")
-                    }
-                }
-                template_context = {
-                    "env_definition": env_definition,
-                    "current_env": current_env
-                }
-                paramSetValues = openParamset(paramSetFile, template_context)
-            except Exception as e:
-                logger.warning(f"Failed to render template for paramset {pset}: {str(e)}")
-                # Fall back to direct YAML loading if template rendering fails
+            if env_context and env_context.template_context:
+                try:
+                    paramSetValues = openParamset(paramSetFile, env_context.template_context)
+                except Exception as e:
+                    logger.warning(f"Failed to render template for paramset {pset}: {str(e)}")
+                    # Fall back to direct YAML loading if template rendering fails
+                    paramSetValues = openParamset(paramSetFile)
+            else:
                 paramSetValues = openParamset(paramSetFile)
             #
             paramSetName = paramSetValues["name"]
@@ -226,35 +283,56 @@ def convertParameterSetsToParameters(templatePath, paramsTemplate, paramsetsTag,
             else :
                 paramSetAppParams = []
             paramsetDefinitionComment = "paramset: " + paramSetName + " version: " + str(paramSetVersion) + " source: " + ("template" if "from_template" in paramSetFile else "instance")
-            # process parameters in ParamSet
+            # process parameters in ParamSet, all parameters of paramset are stored at once
+            paramSetItems = []
             for k in paramSetParameters:
                 # get value with potential merge of dicts
                 val = get_merged_param_value(k, params, paramSetParameters)
-                store_value_to_yaml(params, k, val, paramsetDefinitionComment)
+                paramSetItems.append((k, val, paramsetDefinitionComment))
                 # fill env specific parameters map for env specific paramset
                 if isEnvSpecificParamset:
                     storeToEnvSpecificParametersMap(env_specific_params_map, "", parametersTag, k, val, pset)
+            store_values_to_yaml(params, paramSetItems)
             # prepare application parameters
-            convertParameterSetsToApplication(templatePath, paramsetDefinitionComment, paramSetAppParams, pset, parametersTag, isEnvSpecificParamset, env_specific_params_map, header_text)
+            convertParameterSetsToApplication(templatePath, paramsetDefinitionComment, paramSetAppParams, pset, parametersTag, isEnvSpecificParamset, env_specific_params_map, header_text, app_documents)
     params = sortParameters(params)
     return params
 
-def convertParameterSetsToApplication(templatePath, paramsetDefinitionComment, applicationsParamSets, paramsetName, parametersTag, isEnvSpecificParamset, env_specific_params_map, header_text=""):
-    application_schema="schemas/application.schema.json"
+def convertParameterSetsToApplication(templatePath, paramsetDefinitionComment, applicationsParamSets, paramsetName, parametersTag, isEnvSpecificParamset, env_specific_params_map, header_text="", app_documents=None):
+    # application documents are accumulated in app_documents and written once by
+    # flushApplicationDocuments, without it every paramset writes them immediately
+    flush = app_documents is None
+    if flush:
+        app_documents = {}
     for appParams in applicationsParamSets:
             appName = appParams["appName"] if "appName" in appParams else appParams["name"]
             applicationParametersFile = os.path.dirname(templatePath) + "/Applications/" + appName + ".yml"
-            appDefinition = getApplicationParametersYaml(appName, applicationParametersFile)
+            if applicationParametersFile in app_documents:
+                # document is read again as it would be written, so comments of this paramset get
+                # the same columns as when the file was written and read for every paramset
+                app_documents[applicationParametersFile] = readYaml(
+                    beautify_yaml_to_str(app_documents[applicationParametersFile], APPLICATION_SCHEMA, header_text),
+                    context=f"File: {applicationParametersFile}")
+            else:
+                app_documents[applicationParametersFile] = getApplicationParametersYaml(appName, applicationParametersFile)
+            appDefinition = app_documents[applicationParametersFile]
+            appValues = []
             for j in appParams["parameters"]:
                 # get value with potential merge of dicts
                 val = get_merged_param_value(j, appDefinition[parametersTag], appParams["parameters"])
-                store_value_to_yaml(appDefinition[parametersTag], j, val, paramsetDefinitionComment)
+                appValues.append((j, val, paramsetDefinitionComment))
                 if isEnvSpecificParamset:
                     storeToEnvSpecificParametersMap(env_specific_params_map, appName, parametersTag, j, val, paramsetName)
-            writeYamlToFile(applicationParametersFile, appDefinition)
-            beautifyYaml(applicationParametersFile, application_schema, header_text, wrap_all_strings=False)
+            store_values_to_yaml(appDefinition[parametersTag], appValues)
+    if flush:
+        flushApplicationDocuments(app_documents, header_text)
     return
 
+def flushApplicationDocuments(app_documents, header_text=""):
+    for applicationParametersFile, appDefinition in app_documents.items():
+        write_beautified_yaml(applicationParametersFile, appDefinition, APPLICATION_SCHEMA, header_text, wrap_all_strings=False)
+    app_documents.clear()
+
 def initParametersStructure(map, key, is_app=False) :
     if key not in map:
         map[key] = {}
@@ -280,13 +358,13 @@ def getApplicationParametersYaml(appName, applicationParametersFile):
         result = openYaml(applicationParametersFile)
     return result
 
-def updateEnvSpecificParamsets(env_instances_dir, templateName, templateContent, paramset_map) :
-    envDefinitionYaml = getEnvDefinition(env_instances_dir)
+def updateEnvSpecificParamsets(env_instances_dir, templateName, templateContent, paramset_map, env_context=None) :
+    envDefinitionYaml = env_context.source_env_definition if env_context else getEnvDefinition(env_instances_dir)
     result = {}
     if "envSpecificParamsets" in envDefinitionYaml["envTemplate"]:
         if templateName in envDefinitionYaml["envTemplate"]["envSpecificParamsets"]:
             envSpecificParamsets = envDefinitionYaml["envTemplate"]["envSpecificParamsets"][templateName]
-            logger.info(f"Attaching env-specific deployment paramsets: {dump_as_yaml_format(envSpecificParamsets)} to template {templateName}")
+            logger.info("Attaching env-specific deployment paramsets: %s to template %s", lazy_dump_as_yaml_format(envSpecificParamsets), templateName)
             templateContent["deployParameterSets"] = templateContent["deployParameterSets"] + envSpecificParamsets
             for pset in envSpecificParamsets:
                 # Check if paramset exists in paramset_map before accessing it
@@ -298,7 +376,7 @@ def updateEnvSpecificParamsets(env_instances_dir, templateName, templateContent,
     if "envSpecificE2EParamsets" in envDefinitionYaml["envTemplate"]:
         if templateName in envDefinitionYaml["envTemplate"]["envSpecificE2EParamsets"]:
             envSpecificParamsets = envDefinitionYaml["envTemplate"]["envSpecificE2EParamsets"][templateName]
-            logger.info(f"Attaching env-specific E2E paramsets: {dump_as_yaml_format(envSpecificParamsets)} to template {templateName}")
+            logger.info("Attaching env-specific E2E paramsets: %s to template %s", lazy_dump_as_yaml_format(envSpecificParamsets), templateName)
             templateContent["e2eParameterSets"] = templateContent["e2eParameterSets"] + envSpecificParamsets
             for pset in envSpecificParamsets:
                 # Check if paramset exists in paramset_map before accessing it
@@ -310,7 +388,7 @@ def updateEnvSpecificParamsets(env_instances_dir, templateName, templateContent,
     if "envSpecificTechnicalParamsets" in envDefinitionYaml["envTemplate"]:
         if templateName in envDefinitionYaml["envTemplate"]["envSpecificTechnicalParamsets"]:
             envSpecificParamsets = envDefinitionYaml["envTemplate"]["envSpecificTechnicalParamsets"][templateName]
-            logger.info(f"Attaching env-specific technical paramsets: {dump_as_yaml_format(envSpecificParamsets)} to template {templateName}")
+            logger.info("Attaching env-specific technical paramsets: %s to template %s", lazy_dump_as_yaml_format(envSpecificParamsets), templateName)
             templateContent["technicalConfigurationParameterSets"] = templateContent["technicalConfigurationParameterSets"] + envSpecificParamsets
             for pset in envSpecificParamsets:
                 # Check if paramset exists in paramset_map before accessing it
@@ -321,26 +399,31 @@ def updateEnvSpecificParamsets(env_instances_dir, templateName, templateContent,
                     logger.warning(f"Paramset '{pset}' referenced in envSpecificTechnicalParamsets for template '{templateName}' was not found. It may have been skipped due to missing variables.")
     return result
 
-def processTemplate(templatePath, templateName, env_instances_dir, schema_path, paramset_map, env_specific_params_map, resource_profiles_map=None, header_text="", process_env_specific=True):
+@timed()
+def processTemplate(templatePath, templateName, env_instances_dir, schema_path, paramset_map, env_specific_params_map, resource_profiles_map=None, header_text="", process_env_specific=True, env_context=None):
     logger.info(f"Processing template: {templateName} in {templatePath}")
+    if env_context is None:
+        env_context = create_environment_context(templatePath, env_instances_dir)
     templateContent = openYaml(templatePath)
+    # applications parameters from all paramsets of the template are written once
+    app_documents = {}
     if process_env_specific:
-        updateEnvSpecificParamsets(env_instances_dir, templateName, templateContent, paramset_map)
+        updateEnvSpecificParamsets(env_instances_dir, templateName, templateContent, paramset_map, env_context)
     #process deployParameters
-    templateContent["deployParameters"] = convertParameterSetsToParameters(templatePath, templateContent, "deployParameterSets", "deployParameters", paramset_map, env_specific_params_map, header_text, env_instances_dir)
+    templateContent["deployParameters"] = convertParameterSetsToParameters(templatePath, templateContent, "deployParameterSets", "deployParameters", paramset_map, env_specific_params_map, header_text, env_context, app_documents)
     templateContent["deployParameterSets"] = []
     #process e2eParameters
-    templateContent["e2eParameters"] = convertParameterSetsToParameters(templatePath, templateContent, "e2eParameterSets", "e2eParameters", paramset_map, env_specific_params_map, header_text, env_instances_dir)
+    templateContent["e2eParameters"] = convertParameterSetsToParameters(templatePath, templateContent, "e2eParameterSets", "e2eParameters", paramset_map, env_specific_params_map, header_text, env_context, app_documents)
     templateContent["e2eParameterSets"] = []
     #process technicalConfigurationParameters
-    templateContent["technicalConfigurationParameters"] = convertParameterSetsToParameters(templatePath, templateContent, "technicalConfigurationParameterSets", "technicalConfigurationParameters", paramset_map, env_specific_params_map, header_text, env_instances_dir)
+    templateContent["technicalConfigurationParameters"] = convertParameterSetsToParameters(templatePath, templateContent, "technicalConfigurationParameterSets", "technicalConfigurationParameters", paramset_map, env_specific_params_map, header_text, env_context, app_documents)
     templateContent["technicalConfigurationParameterSets"] = []
     # preparing map for needed resource profiles
     if "profile" in templateContent and templateContent["profile"] and "name" in templateContent["profile"] and templateContent["profile"]["name"] :
         rpName = templateContent["profile"]["name"]
         resource_profiles_map[templateName] = rpName
-    writeYamlToFile(templatePath, templateContent)
-    beautifyYaml(templatePath, schema_path, header_text)
+    flushApplicationDocuments(app_documents, header_text)
+    write_beautified_yaml(templatePath, templateContent, schema_path, header_text)
     return
 
 def process_additional_template_parameters(render_env_dir, source_env_dir, all_instances_dir):
@@ -355,7 +438,7 @@ def process_additional_template_parameters(render_env_dir, source_env_dir, all_i
                 yamlPath = sharedVarYamls[0]
                 addedVars = openYaml(yamlPath)
                 result.update(addedVars)
-                logger.info(f"Shared template variables added from: {yamlPath}: \n{dump_as_yaml_format(addedVars)}")
+                logger.info("Shared template variables added from: %s: \n%s", yamlPath, lazy_dump_as_yaml_format(addedVars))
             elif len(sharedVarYamls) > 1:
                 logger.error(f"Duplicate shared template variables with key {sharedVarFileName} found in {all_instances_dir}: \n\t" + ",\n\t".join(str(x) for x in sharedVarYamls))
                 raise ReferenceError(f"Duplicate shared template variables with key {sharedVarFileName} found. See logs above.")
@@ -367,11 +450,11 @@ def process_additional_template_parameters(render_env_dir, source_env_dir, all_i
             inventoryYaml["envTemplate"]["additionalTemplateVariables"] = {}
         else:
             inventoryVars = inventoryYaml["envTemplate"]["additionalTemplateVariables"]
-            logger.debug(f"Additional template variables from inventory: \n{dump_as_yaml_format(inventoryVars)}")
+            logger.debug("Additional template variables from inventory: \n%s", lazy_dump_as_yaml_format(inventoryVars))
             result.update(inventoryVars)
 
         # storing to yaml
-        logger.info(f"Resulting additional template variables are: \n{dump_as_yaml_format(result)}")
+        logger.info("Resulting additional template variables are: \n%s", lazy_dump_as_yaml_format(result))
         inventoryYaml["envTemplate"]["additionalTemplateVariables"] = result;
         writeYamlToFile(envDefinitionPath, inventoryYaml)
     else:
@@ -381,8 +464,101 @@ def getTemplateNameFromNamespacePath(namespacePath) :
     path = pathlib.Path(namespacePath)
     return path.parent.name
 
+def getEnvSpecificParamsetNames(envDefinitionYaml, templateName):
+    result = []
+    for key in ENV_SPECIFIC_PARAMSETS_KEYS:
+        if key in envDefinitionYaml["envTemplate"] and templateName in envDefinitionYaml["envTemplate"][key]:
+            result = result + envDefinitionYaml["envTemplate"][key][templateName]
+    return result
+
+def markEnvSpecificParamsets(paramset_map, paramsetNames):
+    for pset in paramsetNames:
+        for value in paramset_map.get(pset, []):
+            value["envSpecific"] = True
+
+# paramsets map and environment context are passed to every worker process once
+_namespace_worker_state = {}
+
+def initNamespaceWorker(paramset_map, env_context):
+    _namespace_worker_state["paramset_map"] = paramset_map
+    _namespace_worker_state["env_context"] = env_context
+
+def renderNamespaceTask(templatePath, templateName, env_instances_dir, schema_path, markedParamsets, header_text):
+    paramset_map = _namespace_worker_state["paramset_map"]
+    namespaces_params_map = {}
+    resource_profiles_map = {}
+    error = None
+    with collect_log_records() as records:
+        try:
+            logger.info(f"Processing namespace: {templatePath}")
+            markEnvSpecificParamsets(paramset_map, markedParamsets)
+            initParametersStructure(namespaces_params_map, templateName)
+            processTemplate(
+                templatePath,
+                templateName,
+                env_instances_dir,
+                schema_path,
+                paramset_map,
+                namespaces_params_map[templateName],
+                resource_profiles_map=resource_profiles_map,
+                header_text=header_text,
+                env_context=_namespace_worker_state["env_context"])
+        except Exception as e:
+            e.add_note(f"Raised while processing namespace {templatePath}:\n{traceback.format_exc()}")
+            error = e
+    return namespaces_params_map.get(templateName), resource_profiles_map, records, error
+
+def processNamespaceTemplates(namespaceTemplates, env_instances_dir, schema_path, paramset_map, namespaces_params_map, resource_profiles_map, header_text, env_context):
+    workers_count = min(NAMESPACE_WORKERS, len(namespaceTemplates))
+    if workers_count <= 1:
+        # iterate through namespace definitions and create namespace parameters
+        for templatePath in namespaceTemplates :
+            logger.info(f"Processing namespace: {templatePath}")
+            templateName = getTemplateNameFromNamespacePath(templatePath)
+            initParametersStructure(namespaces_params_map, templateName)
+            processTemplate(
+                templatePath,
+                templateName,
+                env_instances_dir,
+                schema_path,
+                paramset_map,
+                namespaces_params_map[templateName],
+                resource_profiles_map=resource_profiles_map,
+                header_text=header_text,
+                env_context=env_context)
+        return
+    logger.info(f"Processing {len(namespaceTemplates)} namespaces with {workers_count} workers")
+    # namespaces are written to separate directories, results and logs are collected in order of namespaces.
+    # Paramsets marked as env specific by a namespace stay marked for namespaces processed after it,
+    # so every worker marks paramsets of preceding namespaces as sequential processing does
+    tasks = []
+    markedParamsets = []
+    for templatePath in namespaceTemplates:
+        templateName = getTemplateNameFromNamespacePath(templatePath)
+        tasks.append((templatePath, templateName, markedParamsets))
+        markedParamsets = markedParamsets + getEnvSpecificParamsetNames(env_context.source_env_definition, templateName)
+    with ProcessPoolExecutor(max_workers=workers_count, initializer=initNamespaceWorker, initargs=(paramset_map, env_context)) as executor:
+        futures = [executor.submit(renderNamespaceTask, templatePath, templateName, env_instances_dir, schema_path, marked, header_text)
+                   for templatePath, templateName, marked in tasks]
+        for (templatePath, templateName, marked), future in zip(tasks, futures):
+            params_map, profiles_map, records, error = future.result()
+            for record in records:
+                logger.handle(record)
+            if error:
+                executor.shutdown(cancel_futures=True)
+                raise error
+            namespaces_params_map[templateName] = params_map
+            resource_profiles_map.update(profiles_map)
+    # files of namespaces, applications and env specific paramsets are written by workers,
+    # directory indexes and documents cached by this process before that are outdated
+    for path in [env_instances_dir] + [os.path.dirname(templatePath) for templatePath in namespaceTemplates]:
+        invalidate_dir_index(path)
+        invalidate_document_cache(path)
+    markEnvSpecificParamsets(paramset_map, markedParamsets)
+
 def build_env(env_name, env_instances_dir, parameters_dir, env_template_dir, resource_profiles_dir, env_specific_resource_profile_map, all_instances_dir) :
-    paramset_map = createParamsetsMap(parameters_dir)
+    with span("createParamsetsMap"):
+        paramset_map = createParamsetsMap(parameters_dir)
     env_dir = env_template_dir+"/"+env_name
     logger.info(f"Env name: {env_name}")
     logger.info(f"Env dir: {env_dir}")
@@ -395,10 +571,11 @@ def build_env(env_name, env_instances_dir, parameters_dir, env_template_dir, res
 
 
     #removingAnsibleTrash
-    yamlFiles = findAllYamlsInDir(env_dir)
-    for f in yamlFiles :
-        logger.debug(f"Removing ansible trash from: {f}")
-        removeAnsibleTrashFromFile(f)
+    with span("remove_ansible_trash"):
+        yamlFiles = findAllYamlsInDir(env_dir)
+        for f in yamlFiles :
+            logger.debug(f"Removing ansible trash from: {f}")
+            removeAnsibleTrashFromFile(f)
     envDefinitionYaml = getEnvDefinition(env_dir)
     logger.info(getEnvDefinitionPath(env_dir))
     templateArtifactName = getTemplateArtifactName(envDefinitionYaml)
@@ -408,6 +585,7 @@ def build_env(env_name, env_instances_dir, parameters_dir, env_template_dir, res
     tenantTemplatePath = env_dir + "/tenant.yml"
     cloudTemlatePath = env_dir + "/cloud.yml"
     namespaceTemplates = findNamespaces(env_dir)
+    env_context = create_environment_context(cloudTemlatePath, env_instances_dir)
     # env specific parameters map - will be filled with env specific parameters during template processing
     env_specific_parameters_map = {}
     env_specific_parameters_map["namespaces"] = {}
@@ -430,9 +608,11 @@ def build_env(env_name, env_instances_dir, parameters_dir, env_template_dir, res
         env_specific_parameters_map["cloud"],
         resource_profiles_map=needed_resource_profiles_map,
         header_text=generated_header_text,
-        process_env_specific=False)
+        process_env_specific=False,
+        env_context=env_context)
     # process cloud passport
-    process_cloud_passport(env_dir, env_instances_dir, all_instances_dir)
+    with span("process_cloud_passport"):
+        process_cloud_passport(env_dir, env_instances_dir, all_instances_dir)
     logger.info("Processing cloud with env specific parameters.")
     processTemplate(
         cloudTemlatePath,
@@ -443,29 +623,26 @@ def build_env(env_name, env_instances_dir, parameters_dir, env_template_dir, res
         env_specific_parameters_map["cloud"],
         resource_profiles_map=needed_resource_profiles_map,
         header_text=generated_header_text,
-        process_env_specific=True)
+        process_env_specific=True,
+        env_context=env_context)
 
     # process namespaces
-    template_namespace_names = []
-    # iterate through namespace definitions and create namespace parameters
-    for templatePath in namespaceTemplates :
-        logger.info(f"Processing namespace: {templatePath}")
-        templateName = getTemplateNameFromNamespacePath(templatePath)
-        template_namespace_names.append(templateName)
-        initParametersStructure(env_specific_parameters_map["namespaces"], templateName)
-        processTemplate(
-            templatePath,
-            templateName,
+    template_namespace_names = [getTemplateNameFromNamespacePath(templatePath) for templatePath in namespaceTemplates]
+    with span("process_namespaces"):
+        processNamespaceTemplates(
+            namespaceTemplates,
             env_instances_dir,
             namespace_schema,
             paramset_map,
-            env_specific_parameters_map["namespaces"][templateName],
-            resource_profiles_map=needed_resource_profiles_map,
-            header_text=generated_header_text)
+            env_specific_parameters_map["namespaces"],
+            needed_resource_profiles_map,
+            generated_header_text,
+            env_context)
 
-    logger.info(f"EnvSpecific parameters are: \n{dump_as_yaml_format(env_specific_parameters_map)}")
+    logger.info("EnvSpecific parameters are: \n%s", lazy_dump_as_yaml_format(env_specific_parameters_map))
     checkEnvSpecificParametersBySchema(env_dir, env_specific_parameters_map, template_namespace_names)
 
     # process resource profiles
-    processResourceProfiles(env_dir, resource_profiles_dir, profiles_schema, needed_resource_profiles_map, env_specific_resource_profile_map, header_text=generated_header_text)
+    with span("processResourceProfiles"):
+        processResourceProfiles(env_dir, resource_profiles_dir, profiles_schema, needed_resource_profiles_map, env_specific_resource_profile_map, header_text=generated_header_text)
 
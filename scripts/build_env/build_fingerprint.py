@@ -0,0 +1,134 @@
+import hashlib
+import os
+
+import envgenehelper
+from envgenehelper import *
+
+# Incremental build of environments. Fingerprint of an environment build is a set of hashes of
+# everything the build depends on: template artifact, environment and shared files of the instances
+# repository (without other environments and clusters), repository configuration, template version and code of the generator.
+# Fingerprint is stored in the resulting environment dir after the build. Files of the environment
+# itself (including generated ones) are part of fingerprint, so environment is built again if
+# its inputs are changed or its generated files are modified or removed.
+
+INCREMENTAL_BUILD = os.getenv("ENVGENE_INCREMENTAL_BUILD", "false").lower() == "true"
+FINGERPRINT_FILE_NAME = ".build-fingerprint.json"
+FINGERPRINT_VERSION = 1
+# variables of CI job used by env-builder, they are part of fingerprint only if templates use them
+CI_VARIABLES = ["CI_COMMIT_SHORT_SHA", "CI_COMMIT_REF_NAME", "CI_COMMIT_TAG", "CI_REPOSITORY_URL"]
+CI_VARIABLE_REFERENCES = [b"ND_CMDB_CONFIG_REF", b"ND_CMDB_CONFIG_TAG", b"ND_CDMB_REPOSITORY_URL"]
+# env-builder and schemas are two levels above build_env scripts both in the repository and in the docker image
+GENERATOR_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+GENERATOR_DIRS = [os.path.dirname(os.path.abspath(__file__)), os.path.dirname(os.path.abspath(envgenehelper.__file__)),
+                  os.path.join(GENERATOR_ROOT_DIR, "env-builder"), os.path.join(GENERATOR_ROOT_DIR, "schemas")]
+
+# digests of files by path, file is read again only if its size or modification time is changed
+_file_digests = {}
+
+
+def get_file_digest(file_path):
+    stat = os.stat(file_path)
+    stat_key = (stat.st_size, stat.st_mtime_ns)
+    cached = _file_digests.get(file_path)
+    if cached and cached[0] == stat_key:
+        return cached[1], cached[2]
+    count_event(FILES_READ)
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    uses_ci_variables = any(ref in content for ref in CI_VARIABLE_REFERENCES)
+    _file_digests[file_path] = (stat_key, digest, uses_ci_variables)
+    return digest, uses_ci_variables
+
+
+def is_env_dir(dir_path):
+    return os.path.isdir(os.path.join(dir_path, "Inventory"))
+
+
+def is_other_env_dir(dir_path, env_dir):
+    # directory of other environment or of cluster which doesn't contain env_dir
+    if dir_path == env_dir or env_dir.startswith(dir_path + os.sep):
+        return False
+    return is_env_dir(dir_path) or any(is_env_dir(entry.path) for entry in os.scandir(dir_path) if entry.is_dir())
+
+
+def get_dir_digest(dir_path, env_dir=None):
+    # digest of relative paths and contents of all files in dir, directories of environments
+    # and clusters other than env_dir and its cluster are skipped
+    result = hashlib.sha256()
+    uses_ci_variables = False
+    dir_path = getAbsPath(dir_path)
+    env_dir = getAbsPath(env_dir) if env_dir else None
+    if not os.path.isdir(dir_path):
+        return "", False
+    for root, dirs, files in os.walk(dir_path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__"
+                         and not (env_dir and is_other_env_dir(os.path.join(root, d), env_dir)))
+        for name in sorted(files):
+            if name == FINGERPRINT_FILE_NAME:
+                continue
+            file_path = os.path.join(root, name)
+            digest, file_uses_ci_variables = get_file_digest(file_path)
+            uses_ci_variables = uses_ci_variables or file_uses_ci_variables
+            result.update(f"{os.path.relpath(file_path, dir_path)}\0{digest}\0".encode())
+    return result.hexdigest(), uses_ci_variables
+
+
+def get_inputs_fingerprint(templates_dir, work_dir, template_version):
+    # parts of fingerprint which are calculated before the build, as the build changes
+    # parameter containers in templates dir. None is returned if fingerprint can't be calculated
+    missing_dirs = [dir_path for dir_path in GENERATOR_DIRS if not os.path.isdir(dir_path)]
+    if missing_dirs:
+        logger.warning(f"Generator directories {', '.join(missing_dirs)} are not found, "
+                       f"build fingerprint is not used")
+        return None
+    templates_digest, uses_ci_variables = get_dir_digest(templates_dir)
+    generator = hashlib.sha256()
+    for dir_path in GENERATOR_DIRS:
+        generator.update(get_dir_digest(dir_path)[0].encode())
+    fingerprint = {
+        "version": FINGERPRINT_VERSION,
+        "template_version": str(template_version),
+        "templates": templates_digest,
+        "configuration": get_dir_digest(f"{work_dir}/configuration")[0],
+        "generator": generator.hexdigest(),
+    }
+    if uses_ci_variables:
+        fingerprint["ci_variables"] = {name: os.getenv(name, "") for name in CI_VARIABLES}
+    return fingerprint
+
+
+def get_build_fingerprint(inputs_fingerprint, env_dir, resulting_env_dir, all_instances_dir):
+    fingerprint = dict(inputs_fingerprint)
+    fingerprint["instances"] = get_dir_digest(all_instances_dir, env_dir)[0]
+    if getAbsPath(resulting_env_dir) != getAbsPath(env_dir):
+        fingerprint["output"] = get_dir_digest(resulting_env_dir)[0]
+    return fingerprint
+
+
+def get_fingerprint_path(resulting_env_dir):
+    return os.path.join(resulting_env_dir, FINGERPRINT_FILE_NAME)
+
+
+def is_build_up_to_date(fingerprint, resulting_env_dir):
+    fingerprint_path = get_fingerprint_path(resulting_env_dir)
+    if not check_file_exists(fingerprint_path):
+        logger.info(f"Build fingerprint {fingerprint_path} is not found, environment will be built")
+        return False
+    try:
+        stored_fingerprint = openJson(fingerprint_path)
+    except ValueError as e:
+        logger.warning(f"Build fingerprint {fingerprint_path} can't be read: {e}. Environment will be built")
+        return False
+    changed = sorted(key for key in fingerprint.keys() | stored_fingerprint.keys()
+                     if fingerprint.get(key) != stored_fingerprint.get(key))
+    if changed:
+        logger.info(f"Build fingerprint is changed for: {', '.join(changed)}. Environment will be built")
+        return False
+    return True
+
+
+def save_build_fingerprint(fingerprint, resulting_env_dir):
+    fingerprint_path = get_fingerprint_path(resulting_env_dir)
+    writeJsonToFile(fingerprint_path, fingerprint)
+    logger.info(f"Build fingerprint is saved to {fingerprint_path}")
@@ -23,8 +23,8 @@ def process_and_update_key(targetKey, targetYaml, sourceKey, sourceYaml, comment
 def mergeDeployParametersFromPassport(cloudPassportYaml, cloudYaml, comment) :
     for domain in cloudPassportYaml:
         if domain == "version": continue
-        for paramKey, paramValue in cloudPassportYaml[domain].items():
-            store_value_to_yaml(cloudYaml["deployParameters"], paramKey, paramValue, comment)
+        store_values_to_yaml(cloudYaml["deployParameters"],
+                             [(paramKey, paramValue, comment) for paramKey, paramValue in cloudPassportYaml[domain].items()])
 
 def process_cloud_definition(cloudPassportYaml, env_dir, comment) :
     cloud_schema="schemas/cloud.schema.json"
@@ -79,11 +79,10 @@ def process_cloud_definition(cloudPassportYaml, env_dir, comment) :
           store_value_to_yaml(cloudYaml["deployParameters"], "CONSUL_ENABLED", f"{consulConfigYaml['enabled']}".lower(), comment)
           del cloudPassportYaml["consul"]
     # adding rest of cloud passport parameters to cloud deploy parameters
-    logger.debug(f"Rest of params from cloud passport are: \n{dump_as_yaml_format(cloudPassportYaml)}")
+    logger.debug("Rest of params from cloud passport are: \n%s", lazy_dump_as_yaml_format(cloudPassportYaml))
     mergeDeployParametersFromPassport(cloudPassportYaml, cloudYaml, comment)
     # storing cloud yaml
-    writeYamlToFile(cloudYamlPath, cloudYaml)
-    beautifyYaml(cloudYamlPath, cloud_schema)
+    write_beautified_yaml(cloudYamlPath, cloudYaml, cloud_schema)
 
 def add_cloud_passport_creds(cloud_passport_name, cloud_passport_file_path, env_dir, comment):
     logger.info(f"Searching credentials for cloud passport {cloud_passport_file_path}")
@@ -107,11 +106,9 @@ def add_cloud_passport_creds(cloud_passport_name, cloud_passport_file_path, env_
         envCredsYaml = openYaml(envCredentialsPath)
     else:
         envCredsYaml = yaml.load("{}")
-    for key, value in passportCredsYaml.items() :
-        store_value_to_yaml(envCredsYaml, key, value, comment)
+    store_values_to_yaml(envCredsYaml, [(key, value, comment) for key, value in passportCredsYaml.items()])
     # storing credentials yaml
-    writeYamlToFile(envCredentialsPath, envCredsYaml)
-    beautifyYaml(envCredentialsPath, credsSchema)
+    write_beautified_yaml(envCredentialsPath, envCredsYaml, credsSchema)
 
 def update_env_definition_with_cloud_name(render_env_dir, source_env_dir, all_instances_dir):
     inventoryYaml = getEnvDefinition(render_env_dir)
@@ -114,7 +114,8 @@ def getCredDefinitionYaml(yamlPath):
         result = openYaml(yamlPath)
     return result
 
-def writeCredToYaml(credItem, credsYaml) :
+def createCredYaml(credItem) :
+    # returns (credentialsId, cred yaml, comment) to be stored to credentials yaml
     cred = credItem["cred"]
     comment = credItem["comment"]
     newCred = yaml.load("{}")
@@ -136,21 +137,23 @@ def writeCredToYaml(credItem, credsYaml) :
         data.insert(1, "path", "envgeneNullValue", "FillMe")
         data.insert(1, "namespace", "envgeneNullValue", "FillMe")
         newCred["data"] = data
-    if (comment):
-        store_value_to_yaml(credsYaml, cred["credentialsId"], newCred, comment)
-    else:
-        store_value_to_yaml(credsYaml, cred["credentialsId"], newCred)
+    return cred["credentialsId"], newCred, comment
+
+def writeCredToYaml(credItem, credsYaml) :
+    store_values_to_yaml(credsYaml, [createCredYaml(credItem)])
     return credsYaml
 
 def mergeAndSaveYaml(yamlPath, newCreds) :
     logger.info(f'"Saving credentials to file: {yamlPath}')
-    count = 0
     credsYaml = getCredDefinitionYaml(yamlPath)
+    # all new credentials are stored at once, first of credentials with the same id is stored
+    newCredYamls = {}
     for cred in newCreds :
-        if not cred["cred"]["credentialsId"] in credsYaml:
-            count = count + 1
-            credsYaml = writeCredToYaml(cred, credsYaml)
-    logger.info("%s credentials created" % count)
+        credId = cred["cred"]["credentialsId"]
+        if not credId in credsYaml and not credId in newCredYamls:
+            newCredYamls[credId] = createCredYaml(cred)
+    store_values_to_yaml(credsYaml, newCredYamls.values())
+    logger.info("%s credentials created" % len(newCredYamls))
     writeYamlToFile(yamlPath, credsYaml)
 
 def findSharedCredentials(cred_name, env_dir, instances_dir):
@@ -171,15 +174,13 @@ def mergeSharedCreds(credYamlPath, envDir, instancesDir) :
     credsYaml = openYaml(credYamlPath)
     if ("sharedMasterCredentialFiles" in inventoryYaml["envTemplate"]) :
         sharedDictFileNames = inventoryYaml["envTemplate"]["sharedMasterCredentialFiles"]
-        logger.info(f"Inventory shared master creds list: \n{dump_as_yaml_format(sharedDictFileNames)}")
+        logger.info("Inventory shared master creds list: \n%s", lazy_dump_as_yaml_format(sharedDictFileNames))
         for credFileName in inventoryYaml["envTemplate"]["sharedMasterCredentialFiles"] :
             credFilePath = findSharedCredentials(credFileName, envDir, instancesDir)
             credYaml = openYaml(credFilePath)
-            count = 0
-            for key in credYaml :
-                store_value_to_yaml(credsYaml, key, credYaml[key], f"shared credentials: {credFileName}")
-                count += 1
-            logger.info(f"Added {count} shared master credentials from {credFilePath}")
+            comment = f"shared credentials: {credFileName}"
+            store_values_to_yaml(credsYaml, [(key, credYaml[key], comment) for key in credYaml])
+            logger.info(f"Added {len(credYaml)} shared master credentials from {credFilePath}")
     writeYamlToFile(credYamlPath, credsYaml)
 
 def create_credentials(envDir, envInstancesDir, instancesDir) :
@@ -1,7 +1,6 @@
 from os import path, getenv
 
 import json
-import jsonschema
 
 from create_credentials import CRED_TYPE_SECRET
 import envgenehelper as helper
@@ -18,9 +17,6 @@
 SCHEMAS_DIR = getenv("JSON_SCHEMAS_DIR", path.join(path.dirname(path.dirname(path.dirname(__file__))), "schemas"))
 PARAMSET_SCHEMA_PATH = path.join(SCHEMAS_DIR, "paramset.schema.json")
 
-with open(PARAMSET_SCHEMA_PATH, 'r') as f:
-    PARAMSET_SCHEMA = json.load(f)
-
 
 def generate_env():
     base_dir = getenv_and_log('CI_PROJECT_DIR')
@@ -115,7 +111,7 @@ def create_paramset_files(env, paramsets):
     helper.check_dir_exist_and_create(ps_dir_path)
     logger.info(f"Creating paramsets in {ps_dir_path}")
     for k, v in paramsets.items():
-        jsonschema.validate(v, PARAMSET_SCHEMA)
+        validate_by_schema_path(v, PARAMSET_SCHEMA_PATH)
         filename = k + ".yml"
         ps_path = path.join(ps_dir_path, filename)
         helper.writeYamlToFile(ps_path, v) # overwrites file
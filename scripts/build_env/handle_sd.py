@@ -114,7 +114,7 @@ def build_namespace_dict(env) -> dict:
             if os.path.isfile(namespace_file):
                 with open(namespace_file, 'r') as f:
                     data = yaml.safe_load(f)
-                    logger.info(f"Parsed content of {namespace_file}: {data}")
+                    logger.info("Parsed content of %s: %s", namespace_file, helper.LazyLogValue(str, data))
                 # Extract 'name' property
                 ns_name = data.get("name")
                 logger.info(f"ns_name = {ns_name}")
@@ -124,18 +124,18 @@ def build_namespace_dict(env) -> dict:
                     logger.warning(f"Warning: 'name' property missing or invalid in {namespace_file}")
             else:
                 continue
-    logger.info(f"Namespace dict built: {result}")
+    logger.info("Namespace dict built: %s", helper.LazyLogValue(str, result))
     return result
 
 
 def merge_sd(sd_path: Path, sd_data, merge_func):
     logger.info(f"Final destination! - {sd_path}")
     full_sd_yaml = helper.openYaml(sd_path)
-    logger.info(f"full_sd.yaml before merge: {full_sd_yaml}")
+    logger.info("full_sd.yaml before merge: %s", helper.LazyLogValue(str, full_sd_yaml))
     helper.check_dir_exist_and_create(sd_path.parent)
     result = merge_func(full_sd_yaml, sd_data)
     helper.writeYamlToFile(sd_path, result)
-    logger.info(f"Merged data into Target Path! - {result}")
+    logger.info("Merged data into Target Path! - %s", helper.LazyLogValue(str, result))
 
 
 def calculate_merge_mode(sd_merge_mode, sd_delta) -> MergeType:
@@ -156,12 +156,12 @@ def calculate_merge_mode(sd_merge_mode, sd_delta) -> MergeType:
 
 
 def calculate_sd_delta(sd_delta):
-    logger.info(f"printing sd_delta before {sd_delta}")
+    logger.info("printing sd_delta before %s", helper.LazyLogValue(str, sd_delta))
     if sd_delta is not None and str(sd_delta).strip() != "":
         sd_delta = str(sd_delta).strip().lower()
     else:
         sd_delta = None
-    logger.info(f"printing sd_delta after {sd_delta}")
+    logger.info("printing sd_delta after %s", helper.LazyLogValue(str, sd_delta))
     return sd_delta
 
 
@@ -182,10 +182,10 @@ def multiply_sds_to_single(sds_data):
             "deployMode": sds_data[0].get("deployMode"),
             "applications": merged_applications["applications"]
         }
-        logger.info(f"Level-1 SD data: {json.dumps(full_sd_from_pipe, indent=2)}")
+        logger.info("Level-1 SD data: %s", helper.LazyLogValue(json.dumps, full_sd_from_pipe, indent=2))
     else:
         full_sd_from_pipe = sds_data
-    logger.info(f"Merged data after performing basic-merge for multiple SDs: {full_sd_from_pipe}")
+    logger.info("Merged data after performing basic-merge for multiple SDs: %s", helper.LazyLogValue(str, full_sd_from_pipe))
     return full_sd_from_pipe
 
 
@@ -218,7 +218,7 @@ def extract_sds_from_json(env, base_sd_path: Path, sd_data, effective_merge_mode
         exit(1)
     sds_from_pipe = json.loads(sd_data)
 
-    logger.info(f"printing data inside extract_sd_from_json {sds_from_pipe}")
+    logger.info("printing data inside extract_sd_from_json %s", helper.LazyLogValue(str, sds_from_pipe))
     if not isinstance(sds_from_pipe, (list, dict)) or not sds_from_pipe:
         logger.error("SD_DATA must be a non-empty list of SD dictionaries or a single SD.")
         exit(1)
@@ -241,7 +241,7 @@ def extract_sds_from_json(env, base_sd_path: Path, sd_data, effective_merge_mode
         logger.info("Inside replace")
         if helper.check_file_exists(sd_path):
             full_sd_yaml = helper.openYaml(sd_path)
-            logger.info(f"full_sd.yaml before replacement: {json.dumps(full_sd_yaml, indent=2)}")
+            logger.info("full_sd.yaml before replacement: %s", helper.LazyLogValue(json.dumps, full_sd_yaml, indent=2))
         else:
             logger.info("No existing SD found at destination. Proceeding to write new SD.")
         helper.check_dir_exist_and_create(path.dirname(sd_path))
@@ -274,35 +274,38 @@ def download_sds_with_version(env, base_sd_path, sd_version, effective_merge_mod
         exit(1)
 
     app_def_getter_plugins = PluginEngine(plugins_dir='/module/scripts/handle_sd_plugins/app_def_getter')
-    sd_data_list = []
+    appvers = []
     for entry in sd_entries:  # appvers
         if ":" not in entry:
             logger.error(f"Invalid SD_VERSION format: '{entry}'. Expected 'name:version'")
             exit(1)
 
         source_name, version = entry.split(":", 1)
-        logger.info(f"Starting download of SD: {source_name}-{version}")
+        appvers.append((source_name, version))
 
-        sd_data = download_sd_by_appver(source_name, version, app_def_getter_plugins)
-
-        sd_data_list.append(sd_data)
+    sd_data_list = download_sds_by_appvers(appvers, app_def_getter_plugins)
 
     sd_data_json = json.dumps(sd_data_list)
     extract_sds_from_json(env, base_sd_path, sd_data_json, effective_merge_mode)
 
 
-def download_sd_by_appver(app_name: str, version: str, plugins: PluginEngine) -> dict[str, object]:
-    if 'SNAPSHOT' in version:
-        raise ValueError("SNAPSHOT is not supported version of Solution Descriptor artifacts")
-    # TODO: check if job would fail without plugins
-    app_def = get_appdef_for_app(f"{app_name}:{version}", app_name, plugins)
-
-    artifact_info = asyncio.run(artifact.check_artifact_async(app_def, artifact.FileExtension.JSON, version))
-    if not artifact_info:
-        raise ValueError(
-            f'Solution descriptor content was not received for {app_name}:{version}')
-    sd_url, _ = artifact_info
-    return artifact.download_json_content(sd_url)
+def download_sds_by_appvers(appvers: list[tuple[str, str]], plugins: PluginEngine) -> list[dict[str, object]]:
+    """Resolves and downloads all SDs concurrently, results are returned in the order of appvers"""
+    artifacts = []
+    for app_name, version in appvers:
+        if 'SNAPSHOT' in version:
+            raise ValueError("SNAPSHOT is not supported version of Solution Descriptor artifacts")
+        # TODO: check if job would fail without plugins
+        app_def = get_appdef_for_app(f"{app_name}:{version}", app_name, plugins)
+        artifacts.append((app_def, version))
+
+    logger.info(f"Starting download of SDs: {', '.join(f'{app_name}-{version}' for app_name, version in appvers)}")
+    sd_data_list = asyncio.run(artifact.download_all_json_async(artifacts, artifact.FileExtension.JSON))
+    for (app_name, version), sd_data in zip(appvers, sd_data_list):
+        if not sd_data:
+            raise ValueError(
+                f'Solution descriptor content was not received for {app_name}:{version}')
+    return sd_data_list
 
 
 def get_appdef_for_app(appver: str, app_name: str, plugins: PluginEngine) -> artifact_models.Application:
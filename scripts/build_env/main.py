@@ -1,10 +1,15 @@
 import argparse
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
-import ansible_runner
 from envgenehelper import *
 from envgenehelper.deployer import *
+from envgenehelper.env_builder import UnsupportedFeatureError, render_env_templates
 
-from build_env import build_env, process_additional_template_parameters
+from build_env import build_env, clear_paramset_jinja_envs, process_additional_template_parameters
+from build_fingerprint import INCREMENTAL_BUILD, get_build_fingerprint, get_inputs_fingerprint, is_build_up_to_date, \
+    save_build_fingerprint
 from cloud_passport import update_env_definition_with_cloud_name
 from create_credentials import create_credentials
 from resource_profiles import get_env_specific_resource_profiles
@@ -16,6 +21,14 @@
 CLOUD_SCHEMA = "schemas/cloud.schema.json"
 NAMESPACE_SCHEMA = "schemas/namespace.schema.json"
 ENV_SPECIFIC_RESOURCE_PROFILE_SCHEMA = "schemas/resource-profile.schema.json"
+ENV_BUILDER_PLAYBOOK = "env-builder/main.yaml"
+ENV_CONFIG_TEMPLATE = "env-builder/templates/env_config.yml.j2"
+# "ansible" runs env-builder playbook, "python" renders templates in process
+RENDER_ENGINE = os.getenv("ENVGENE_RENDER_ENGINE", "ansible").lower()
+# directories written by rendering of templates
+RENDER_OUTPUT_VARS = ["render_dir", "render_parameters_dir"]
+# paramsets are validated in worker processes if there are at least two workers of this number of files
+PARAMSETS_PER_VALIDATION_WORKER = 50
 
 
 def clear_output_folder(dir):
@@ -77,12 +90,16 @@ def cleanup_resulting_dir(resulting_dir: pathlib.Path):
             deleteFile(file_path)
 
 
+def get_resulting_env_dir(env_name, source_env_dir, all_instances_dir, output_dir):
+    env_instances_relative_dir = str(pathlib.Path(source_env_dir).relative_to(pathlib.Path(all_instances_dir)))
+    logger.info(f"Relative path of {env_name} in instances dir is: {env_instances_relative_dir}")
+    return f'{output_dir}/{env_instances_relative_dir}'
+
+
 def post_process_env_after_rendering(env_name, render_env_dir, source_env_dir, all_instances_dir, output_dir):
     check_dir_exist_and_create(output_dir)
     # copying results to output_dir
-    env_instances_relative_dir = str(pathlib.Path(source_env_dir).relative_to(pathlib.Path(all_instances_dir)))
-    logger.info(f"Relative path of {env_name} in instances dir is: {env_instances_relative_dir}")
-    resulting_dir = f'{output_dir}/{env_instances_relative_dir}'
+    resulting_dir = get_resulting_env_dir(env_name, source_env_dir, all_instances_dir, output_dir)
     check_dir_exist_and_create(resulting_dir)
     # overwrite env definition from instances, as it can mutate during generation
     copy_path(f'{source_env_dir}/{INVENTORY_DIR_NAME}/{ENV_DEFINITION_FILE_NAME}',
@@ -119,9 +136,10 @@ def build_environment(env_name, cluster_name, templates_dir, source_env_dir, all
     render_parameters_dir = getAbsPath('tmp/parameters_templates')
     render_profiles_dir = getAbsPath('tmp/resource_profiles')
     # preparing folders for generation
-    render_env_dir = prepare_folders_for_rendering(env_name, cluster_name, source_env_dir, templates_dir, render_dir,
-                                                   render_parameters_dir, render_profiles_dir, output_dir)
-    pre_process_env_before_rendering(render_env_dir, source_env_dir, all_instances_dir)
+    with span("prepare_folders"):
+        render_env_dir = prepare_folders_for_rendering(env_name, cluster_name, source_env_dir, templates_dir, render_dir,
+                                                       render_parameters_dir, render_profiles_dir, output_dir)
+        pre_process_env_before_rendering(render_env_dir, source_env_dir, all_instances_dir)
     # get deployer parameters
     cmdb_url, _, _ = get_deployer_config(f"{cluster_name}/{env_name}", work_dir, all_instances_dir, None, None, False)
     # perform rendering with Jinja2
@@ -179,110 +197,193 @@ def build_environment(env_name, cluster_name, templates_dir, source_env_dir, all
     ansible_vars["cloud_passport_file_path"] = find_cloud_passport_definition(source_env_dir, all_instances_dir)
     ansible_vars["cmdb_url"] = cmdb_url
     ansible_vars["output_dir"] = output_dir
-    logger.info(
-        f"Starting rendering environment {env_name} with ansible. Input params are:\n{dump_as_yaml_format(ansible_vars)}")
-    r = ansible_runner.run(playbook=getAbsPath('env-builder/main.yaml'), envvars=ansible_vars, verbosity=2)
-    if (r.rc != 0):
-        logger.error(f"Error during ansible execution. Result code is: {r.rc}. Status is: {r.status}")
-        raise ReferenceError(f"Error during ansible execution. See logs above.")
-    else:
-        logger.info(f"Ansible execution status is: {r.status}. Stats is: {r.stats}")
+    render_templates(env_name, ansible_vars)
 
     handle_template_override(render_dir)
     env_specific_resource_profile_map = get_env_specific_resource_profiles(source_env_dir, all_instances_dir,
                                                                            ENV_SPECIFIC_RESOURCE_PROFILE_SCHEMA)
     # building env
-    handle_parameter_container(env_name, cluster_name, templates_dir, all_instances_dir, getAbsPath(render_dir))
+    with span("handle_parameter_container"):
+        handle_parameter_container(env_name, cluster_name, templates_dir, all_instances_dir, getAbsPath(render_dir))
 
-    build_env(env_name, source_env_dir, render_parameters_dir, render_dir, render_profiles_dir,
-              env_specific_resource_profile_map, all_instances_dir)
-    resulting_dir = post_process_env_after_rendering(env_name, render_env_dir, source_env_dir, all_instances_dir,
-                                                     output_dir)
-    validate_appregdefs(render_dir, env_name)
+    with span("build_env"):
+        build_env(env_name, source_env_dir, render_parameters_dir, render_dir, render_profiles_dir,
+                  env_specific_resource_profile_map, all_instances_dir)
+    with span("post_process"):
+        resulting_dir = post_process_env_after_rendering(env_name, render_env_dir, source_env_dir, all_instances_dir,
+                                                         output_dir)
+        validate_appregdefs(render_dir, env_name)
 
     return resulting_dir
 
 
-def get_duplicate_names(param_files):
-    file_names = list(map(extractNameFromFile, param_files))
-    return set([x for x in file_names if file_names.count(x) > 1])
+def run_env_builder_playbook(env_name, ansible_vars):
+    # ansible is imported only when playbook is used
+    import ansible_runner
+    logger.info(
+        "Starting rendering environment %s with ansible. Input params are:\n%s", env_name, lazy_dump_as_yaml_format(ansible_vars))
+    with span("ansible"):
+        count_event(SUBPROCESSES)
+        r = ansible_runner.run(playbook=getAbsPath(ENV_BUILDER_PLAYBOOK), envvars=ansible_vars, verbosity=2)
+    # files written by the playbook are not known to directory indexes and document cache
+    invalidate_dir_index()
+    invalidate_document_cache()
+    if (r.rc != 0):
+        logger.error(f"Error during ansible execution. Result code is: {r.rc}. Status is: {r.status}")
+        raise ReferenceError(f"Error during ansible execution. See logs above.")
+    else:
+        logger.info(f"Ansible execution status is: {r.status}. Stats is: {r.stats}")
 
 
-def validate_parameters(templates_dir, all_instances_dir, cluster_name=None, env_name=None):
-    errors = []
-    logger.info(f'Validate {templates_dir}/parameters dir')
-    param_files = findAllYamlsInDir(f'{templates_dir}/parameters')
+def render_templates(env_name, ansible_vars):
+    if RENDER_ENGINE != "python":
+        run_env_builder_playbook(env_name, ansible_vars)
+        return
+    logger.info(
+        "Starting rendering environment %s in process. Input params are:\n%s", env_name, lazy_dump_as_yaml_format(ansible_vars))
+    try:
+        render_templates_in_scratch_dir(ansible_vars)
+    except UnsupportedFeatureError as e:
+        logger.warning(f"Environment {env_name} can't be rendered in process: {e}. Rendering with ansible.")
+        run_env_builder_playbook(env_name, ansible_vars)
+
+
+def render_templates_in_scratch_dir(ansible_vars):
+    # templates are rendered into copies of render dirs, which replace them only if rendering succeeds,
+    # so failed rendering doesn't leave partially rendered templates and removed paramset templates
+    render_dir = ansible_vars["render_dir"]
+    scratch_dir = tempfile.mkdtemp(prefix="render_", dir=os.path.dirname(render_dir))
+    try:
+        scratch_vars = dict(ansible_vars)
+        for key in RENDER_OUTPUT_VARS:
+            scratch_vars[key] = f"{scratch_dir}/{key}"
+            copy_path(ansible_vars[key], scratch_vars[key])
+        scratch_vars["env_instances_dir"] = os.path.join(scratch_vars["render_dir"],
+                                                         os.path.relpath(ansible_vars["env_instances_dir"], render_dir))
+        render_env_templates(scratch_vars, getAbsPath(ENV_CONFIG_TEMPLATE))
+        for key in RENDER_OUTPUT_VARS:
+            delete_dir(ansible_vars[key])
+            move_path(scratch_vars[key], ansible_vars[key])
+    finally:
+        delete_dir(scratch_dir)
 
-    names = get_duplicate_names(param_files)
 
-    if len(names) > 0:
-        errors.append(f'duplicate Paramset names {names}')
+def get_duplicate_names(param_files):
+    names_count = Counter(map(extractNameFromFile, param_files))
+    return set(name for name, count in names_count.items() if count > 1)
 
-    errors = errors + validate_parameter_files(param_files)
 
-    logger.info(f'Validate {all_instances_dir}/parameters dir')
-    param_files = findAllYamlsInDir(f'{all_instances_dir}/parameters')
-    # all_param_files = param_files
-    errors = errors + validate_parameter_files(param_files)
+def validate_parameters(templates_dir, all_instances_dir, cluster_name=None, env_name=None, validate_common=True):
+    param_dirs = []
+    if validate_common:
+        param_dirs = param_dirs + find_common_parameter_dirs(templates_dir, all_instances_dir)
 
     # Only validate the specific cluster if provided
     if cluster_name:
-        if os.path.exists(f'{all_instances_dir}/{cluster_name}/parameters'):
-            logger.info(f'Validate {all_instances_dir}/{cluster_name}/parameters')
-            param_files = findAllYamlsInDir(f'{all_instances_dir}/{cluster_name}/parameters')
-            errors = errors + validate_parameter_files(param_files)
-
-            # Only validate the specific environment if provided
-            if env_name:
-                env_base_path = f'{all_instances_dir}/{cluster_name}/{env_name}'
-                if os.path.exists(env_base_path):
-                    # Now traverse through all subdirectories to find other parameter directories
-                    for root, dirs, files in os.walk(env_base_path):
-                        for dir_name in dirs:
-                            if dir_name == "parameters":
-                                param_path = os.path.join(root, dir_name)
-                                logger.info(f'Validate {param_path}')
-                                param_files = findAllYamlsInDir(param_path)
-                                errors = errors + validate_parameter_files(param_files)
+        param_dirs = param_dirs + find_env_parameter_dirs(all_instances_dir, cluster_name, env_name)
     else:
         # If no specific cluster/env provided, validate all (original behavior)
-        sub_dirs = find_all_sub_dir(all_instances_dir)
-
-        for sub_dir in next(sub_dirs)[1]:
-            if sub_dir != "parameters":
-                logger.info(f'Validate {all_instances_dir}/{sub_dir}/parameters')
-                param_files = findAllYamlsInDir(f'{all_instances_dir}/{sub_dir}/parameters')
-                errors = errors + validate_parameter_files(param_files)
-
-                env_dirs = find_all_sub_dir(f'{all_instances_dir}/{sub_dir}')
-                for env_dir in next(env_dirs)[1]:
-                    if env_dir not in ["parameters", "cloud-passport"]:
-                        logger.info(f'Validate {all_instances_dir}/{sub_dir}/{env_dir}/Inventory/parameters')
-                        param_files = findAllYamlsInDir(f'{all_instances_dir}/{sub_dir}/{env_dir}/Inventory/parameters')
-                        errors = errors + validate_parameter_files(param_files)
+        param_dirs = param_dirs + find_all_env_parameter_dirs(all_instances_dir)
 
     # all_param_names = get_duplicate_names(all_param_files)
     # if len(all_param_names) > 0:
     #     errors.append(f'duplicate Env-specific Paramset names {all_param_names}')
+    errors = collect_parameters_errors(param_dirs, f'{templates_dir}/parameters' if validate_common else None)
     if len(errors) > 0:
         raise ReferenceError("\n" + "\n".join(errors))
 
 
+def collect_common_parameters_errors(templates_dir, all_instances_dir):
+    return collect_parameters_errors(find_common_parameter_dirs(templates_dir, all_instances_dir),
+                                     f'{templates_dir}/parameters')
+
+
+def find_common_parameter_dirs(templates_dir, all_instances_dir):
+    # paramsets shared by all environments: from templates and from the root of instances
+    return [f'{templates_dir}/parameters', f'{all_instances_dir}/parameters']
+
+
+def find_env_parameter_dirs(all_instances_dir, cluster_name, env_name=None):
+    param_dirs = []
+    if os.path.exists(f'{all_instances_dir}/{cluster_name}/parameters'):
+        param_dirs.append(f'{all_instances_dir}/{cluster_name}/parameters')
+
+        # Only validate the specific environment if provided
+        if env_name:
+            env_base_path = f'{all_instances_dir}/{cluster_name}/{env_name}'
+            if os.path.exists(env_base_path):
+                # Now traverse through all subdirectories to find other parameter directories
+                for root, dirs, files in os.walk(env_base_path):
+                    for dir_name in dirs:
+                        if dir_name == "parameters":
+                            param_dirs.append(os.path.join(root, dir_name))
+    return param_dirs
+
+
+def find_all_env_parameter_dirs(all_instances_dir):
+    param_dirs = []
+    sub_dirs = find_all_sub_dir(all_instances_dir)
+    for sub_dir in next(sub_dirs)[1]:
+        if sub_dir != "parameters":
+            param_dirs.append(f'{all_instances_dir}/{sub_dir}/parameters')
+
+            env_dirs = find_all_sub_dir(f'{all_instances_dir}/{sub_dir}')
+            for env_dir in next(env_dirs)[1]:
+                if env_dir not in ["parameters", "cloud-passport"]:
+                    param_dirs.append(f'{all_instances_dir}/{sub_dir}/{env_dir}/Inventory/parameters')
+    return param_dirs
+
+
+def collect_parameters_errors(param_dirs, unique_names_dir=None):
+    # paramsets of all dirs are validated in one pass, paramset names must be unique within unique_names_dir
+    dirs_param_files = [(param_dir, findAllYamlsInDir(param_dir)) for param_dir in param_dirs]
+    errors = []
+    if unique_names_dir:
+        names = get_duplicate_names(findAllYamlsInDir(unique_names_dir))
+        if len(names) > 0:
+            errors.append(f'duplicate Paramset names {names}')
+
+    results = validate_parameter_files([path for _, param_files in dirs_param_files for path in param_files])
+    # logs are emitted in order of dirs and files as if files were validated one by one
+    for param_dir, param_files in dirs_param_files:
+        logger.info(f'Validate {param_dir}')
+        for _ in param_files:
+            file_errors, records = next(results)
+            for record in records:
+                logger.handle(record)
+            errors = errors + file_errors
+    return errors
+
+
 def validate_parameter_files(param_files):
+    # yields errors and log records of every file in order of files
+    workers_count = min(os.cpu_count() or 1, len(param_files) // PARAMSETS_PER_VALIDATION_WORKER)
+    if workers_count <= 1:
+        return map(validate_parameter_file, param_files)
+    logger.info(f"Validating {len(param_files)} parameter files with {workers_count} workers")
+    # schema is compiled before the workers are started to be inherited by them
+    get_schema_validator(PARAMSET_SCHEMA)
+    with ProcessPoolExecutor(workers_count) as executor:
+        chunk_size = max(1, len(param_files) // (workers_count * 4))
+        return iter(list(executor.map(validate_parameter_file, param_files, chunksize=chunk_size)))
+
+
+def validate_parameter_file(param_file_path):
+    # file is read once both for validation by schema and for check of paramset name
     errors = []
-    for param_file_path in param_files:
+    with collect_log_records() as records:
         rel_param_file_path = os.path.relpath(param_file_path, os.getenv('CI_PROJECT_DIR'))
+        param_file = openYamlReadOnly(param_file_path)
         try:
-            validate_yaml_by_scheme_or_fail(param_file_path, PARAMSET_SCHEMA)
+            validate_yaml_by_scheme_or_fail(param_file_path, PARAMSET_SCHEMA, param_file)
         except ValueError:
             errors.append(f'Parameter file at {rel_param_file_path} is invalid, look for details above')
         file_name = extractNameFromFile(param_file_path)
-        param_file = openYaml(param_file_path)
 
-        name = param_file["name"]
+        name = param_file.get("name") if isinstance(param_file, dict) else None
         if file_name != name:
             errors.append(f'Parameter "name" must be equal to filename without extension in file {rel_param_file_path}')
-    return errors
+    return errors, records
 
 
 def handle_parameter_container(env_name, cluster_name, templates_dir, all_instances_dir, render_dir):
@@ -395,8 +496,10 @@ def validate_appregdefs(render_dir, env_name):
             validate_yaml_by_scheme_or_fail(file, "schemas/regdef.schema.json")
 
 
+@timed()
+@dir_index_scope()
 def render_environment(env_name, cluster_name, templates_dir, all_instances_dir, output_dir, g_template_version,
-                       work_dir):
+                       work_dir, validate_common_parameters=True):
     logger.info(f'env: {env_name}')
     logger.info(f'cluster_name: {cluster_name}')
     logger.info(f'templates_dir: {templates_dir}')
@@ -408,16 +511,67 @@ def render_environment(env_name, cluster_name, templates_dir, all_instances_dir,
     check_environment_is_valid_or_fail(env_name, cluster_name, all_instances_dir,
                                        validate_env_definition_by_schema=True)
     # searching for env directory in instances
-    validate_parameters(templates_dir, all_instances_dir, cluster_name, env_name)
+    with span("validate_parameters"):
+        validate_parameters(templates_dir, all_instances_dir, cluster_name, env_name, validate_common_parameters)
     env_dir = get_env_instances_dir(env_name, cluster_name, all_instances_dir)
     logger.info(f"Environment {env_name} directory is {env_dir}")
+    # skipping build if nothing is changed since the last build
+    if INCREMENTAL_BUILD:
+        with span("build_fingerprint"):
+            inputs_fingerprint = get_inputs_fingerprint(templates_dir, work_dir, g_template_version)
+            resulting_env_dir = get_resulting_env_dir(env_name, env_dir, all_instances_dir, output_dir)
+            if inputs_fingerprint is not None:
+                fingerprint = get_build_fingerprint(inputs_fingerprint, env_dir, resulting_env_dir, all_instances_dir)
+                if is_build_up_to_date(fingerprint, resulting_env_dir):
+                    logger.info(f"Environment {cluster_name}/{env_name} is not changed since the last build, "
+                                f"skipping build")
+                    return
     # build env
-    resulting_env_dir = build_environment(env_name, cluster_name, templates_dir, env_dir, all_instances_dir, output_dir,
-                                          g_template_version, work_dir)
+    with span("build_environment"):
+        resulting_env_dir = build_environment(env_name, cluster_name, templates_dir, env_dir, all_instances_dir,
+                                              output_dir, g_template_version, work_dir)
     # create credentials
-    create_credentials(resulting_env_dir, env_dir, all_instances_dir)
+    with span("create_credentials"):
+        create_credentials(resulting_env_dir, env_dir, all_instances_dir)
     # update versions
-    update_generated_versions(resulting_env_dir, BUILD_ENV_TAG, g_template_version)
+    with span("update_generated_versions"):
+        update_generated_versions(resulting_env_dir, BUILD_ENV_TAG, g_template_version)
+    # fingerprint of the build is calculated when environment is built, as the build changes it
+    if INCREMENTAL_BUILD and inputs_fingerprint is not None:
+        with span("build_fingerprint"):
+            fingerprint = get_build_fingerprint(inputs_fingerprint, env_dir, resulting_env_dir, all_instances_dir)
+            save_build_fingerprint(fingerprint, resulting_env_dir)
+
+
+def render_environments(env_names, templates_dir, all_instances_dir, output_dir, g_template_version, work_dir):
+    # Builds all environments in one process. Paramsets shared by all environments
+    # are validated once, failure of one environment doesn't stop the others.
+    environments = parse_env_names(env_names)
+    if not environments:
+        logger.error(f"No environments to render in environment names list: '{env_names}'")
+        raise ReferenceError(f"Environment names list is empty. See logs above.")
+    logger.info(f"Rendering {len(environments)} environments in batch mode")
+    with span("validate_common_parameters"):
+        common_errors = collect_common_parameters_errors(templates_dir, all_instances_dir)
+    if common_errors:
+        raise ReferenceError("\n" + "\n".join(common_errors))
+    failed = {}
+    for cluster_name, env_name in environments:
+        full_env_name = f"{cluster_name}/{env_name}"
+        # documents and paramset templates of previous environment can't be reused, rendering dirs are recreated.
+        # Directory indexes are dropped by scope of render_environment
+        invalidate_document_cache()
+        clear_paramset_jinja_envs()
+        try:
+            render_environment(env_name, cluster_name, templates_dir, all_instances_dir, output_dir,
+                               g_template_version, work_dir, validate_common_parameters=False)
+            logger.info(f"Environment {full_env_name} is rendered")
+        except Exception as e:
+            logger.error(f"Failed to render environment {full_env_name}: {e}")
+            failed[full_env_name] = e
+    if failed:
+        logger.error(f"Failed to render {len(failed)} of {len(environments)} environments: {', '.join(failed)}")
+        raise ReferenceError(f"Failed to render environments: {', '.join(failed)}. See logs above.")
 
 
 if __name__ == "__main__":
@@ -431,6 +585,8 @@ def render_environment(env_name, cluster_name, templates_dir, all_instances_dir,
     parser.add_argument("-i", "--instances_dir", help="Environment instances directory is not set with -i argument")
     parser.add_argument("-k", "--template_version", help="Artifact version is not set with -k argument")
     parser.add_argument("-o", "--output_dir", help="Output directory is not set with -o argument")
+    parser.add_argument("-n", "--env_names",
+                        help="List of <cluster-name>/<env-name> in ENV_NAMES format to render in one process, used instead of -e and -c")
     # Read arguments from command line
     args = parser.parse_args()
     g_input_env_name = args.env_name
@@ -441,7 +597,13 @@ def render_environment(env_name, cluster_name, templates_dir, all_instances_dir,
     g_output_dir = args.output_dir
     g_work_dir = get_parent_dir_for_dir(g_all_instances_dir)
 
-    decrypt_all_cred_files_for_env()
-    render_environment(g_input_env_name, g_input_cluster_name, g_templates_dir, g_all_instances_dir, g_output_dir,
-                       g_template_version, g_work_dir)
-    encrypt_all_cred_files_for_env()
+    # cred files of environments from -n list, otherwise of environments from ENV_NAMES
+    g_environments = parse_env_names(args.env_names) if args.env_names else None
+    decrypt_all_cred_files_for_env(environments=g_environments)
+    if args.env_names:
+        render_environments(args.env_names, g_templates_dir, g_all_instances_dir, g_output_dir, g_template_version,
+                            g_work_dir)
+    else:
+        render_environment(g_input_env_name, g_input_cluster_name, g_templates_dir, g_all_instances_dir, g_output_dir,
+                           g_template_version, g_work_dir)
+    encrypt_all_cred_files_for_env(environments=g_environments)
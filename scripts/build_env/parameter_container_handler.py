@@ -91,6 +91,8 @@ def download_source_files(artifact_definition, base_dir, parameter_set, template
 
                         logger.info(f"Starting download parameterContainer {source_name}")
                         r = ansible_runner.run(playbook='/module/ansible/download_parameters.yaml',envvars=ansible_vars, verbosity=2)
+                        invalidate_dir_index()
+                        invalidate_document_cache()
                         if (r.rc != 0):
                             logger.error(
                                 f"Error during ansible execution. Result code is: {r.rc}. Status is: {r.status}")
@@ -12,7 +12,7 @@ def get_env_specific_resource_profiles(env_dir, instances_dir, rp_schema):
         logger.info(f"No environment specific resource profiles are defined in {envDefinitionPath}")
         return result
     envSepcificResourceProfileNames = inventoryYaml["envTemplate"]["envSpecificResourceProfiles"]
-    logger.info(f"Environment specific resource profiles for '{envDefinitionPath}' are: \n{dump_as_yaml_format(envSepcificResourceProfileNames)}")
+    logger.info("Environment specific resource profiles for '%s' are: \n%s", envDefinitionPath, lazy_dump_as_yaml_format(envSepcificResourceProfileNames))
     for templateType in envSepcificResourceProfileNames:
         logger.debug(f"Searching for env specific resource profiles for template '{templateType}'")
         profileFileName = envSepcificResourceProfileNames[templateType]
@@ -28,7 +28,7 @@ def get_env_specific_resource_profiles(env_dir, instances_dir, rp_schema):
             raise ReferenceError(f"Duplicate resource profile files with key '{profileFileName}' found. See logs above.")
         else:
             raise ReferenceError(f"Resource profile file with key '{profileFileName}' not found in '{instances_dir}'")
-    logger.info(f"Env specific resource profiles are: \n{dump_as_yaml_format(result)}")
+    logger.info("Env specific resource profiles are: \n%s", lazy_dump_as_yaml_format(result))
     return result
 
 def getResourceProfilesFromDir(dir) :
@@ -36,7 +36,7 @@ def getResourceProfilesFromDir(dir) :
     rpYamls = findAllYamlsInDir(dir)
     for profileFile in rpYamls:
         result[extractNameFromFile(profileFile)] = profileFile
-    logger.info(f"Resource profiles in folder {dir}: \n{dump_as_yaml_format(result)}")
+    logger.info("Resource profiles in folder %s: \n%s", dir, lazy_dump_as_yaml_format(result))
     return result
 
 def get_app_from_resource_profile(appName, profile_yaml):
@@ -118,14 +118,14 @@ def validate_resource_profiles(needed_resource_profiles: dict[str, str], source_
     return profiles_map
 
 def processResourceProfiles(env_dir, resource_profiles_dir, profiles_schema, needed_resource_profiles_map, env_specific_resource_profile_map, header_text="") :
-    logger.info(f"Needed profiles map: \n{dump_as_yaml_format(needed_resource_profiles_map)}")
+    logger.info("Needed profiles map: \n%s", lazy_dump_as_yaml_format(needed_resource_profiles_map))
     # map for profiles from templates
     templateProfilesMap = getResourceProfilesFromDir(resource_profiles_dir)
     envRpDir = f"{env_dir}/Profiles"
     environmentDirProfilesMap = getResourceProfilesFromDir(envRpDir)
     # joining resource profiles with the result of Jinja generation
     sourceProfilesMap = templateProfilesMap | environmentDirProfilesMap
-    logger.info(f"All resource profiles map is: \n{dump_as_yaml_format(sourceProfilesMap)}")
+    logger.info("All resource profiles map is: \n%s", lazy_dump_as_yaml_format(sourceProfilesMap))
     # check that all required resource profiles exists and are valid
     profilesMap = validate_resource_profiles(needed_resource_profiles_map, sourceProfilesMap, profiles_schema)
     # iterate through env specific resource profiles and perform override
@@ -86,11 +86,11 @@ def checkEnvSpecificParametersBySchema(env_dir, env_specific_params_map, namespa
                 envSpecificParamsWhiteList = envSpecificSchemaYaml["envSpecific"]["whiteList"] if "whiteList" in envSpecificSchemaYaml["envSpecific"] else None
                 envSpecificParamsBlackList = envSpecificSchemaYaml["envSpecific"]["blackList"] if "blackList" in envSpecificSchemaYaml["envSpecific"] else None
                 envSpecificParamsMandatoryList = envSpecificSchemaYaml["envSpecific"].get("mandatoryList")
-                logger.debug(f"White list: \n{dump_as_yaml_format(envSpecificParamsWhiteList)}")
+                logger.debug("White list: \n%s", lazy_dump_as_yaml_format(envSpecificParamsWhiteList))
                 if envSpecificParamsWhiteList:
                     logger.info(f"Checking environment specific parameters by white list in schema {envSpecificSchemaPath} ...")
                     whiteList = normalize_env_specific_schema_white_list(envSpecificParamsWhiteList, namespace_names)
-                    logger.debug(f"White list after normalization: \n{dump_as_yaml_format(whiteList)}")
+                    logger.debug("White list after normalization: \n%s", lazy_dump_as_yaml_format(whiteList))
                     checkResult = checkByWhiteList(env_specific_params_map, whiteList, isComplex=True)
                     if checkSchemaValidationFailed(checkResult):
                         logger.error(f"Environment specific parameters validation by white list failed:" + getSchemaValidationErrorMessage("environment specific parameters", checkResult))
@@ -100,14 +100,14 @@ def checkEnvSpecificParametersBySchema(env_dir, env_specific_params_map, namespa
                 if envSpecificParamsMandatoryList:
                     logger.info(f"Checking environment specific parameters by mandatory list in schema {envSpecificSchemaPath} ...")
                     mandatoryList = normalize_env_specific_schema_white_list(envSpecificParamsMandatoryList, namespace_names)
-                    logger.debug(f"Mandatory list after normalization: \n{dump_as_yaml_format(mandatoryList)}")
+                    logger.debug("Mandatory list after normalization: \n%s", lazy_dump_as_yaml_format(mandatoryList))
                     checkResult, message = checkByMandatoryList(env_specific_params_map, mandatoryList)
                     if not checkResult:
                         logger.error(f"Environment specific parameters validation by mandatory list failed:\n{message}")
                         raise ReferenceError(f"Environment specific parameters validation by mandatory list failed. See logs above.")
                     else:
                         logger.info(f"Environment specific parameters validation by mandatory list successfully passed.")
-                logger.debug(f"Black list: \n{dump_as_yaml_format(envSpecificParamsBlackList)}")
+                logger.debug("Black list: \n%s", lazy_dump_as_yaml_format(envSpecificParamsBlackList))
             else:
                 logger.info(f"No env specific parameters schema found in {envSpecificSchemaPath}. Environment specific parameters validation by schema skipped...")
         else:
@@ -123,7 +123,7 @@ def checkCloudPassportBySchema(env_dir, cloudPassportFilePath):
         passportSchema = None
         passportMandatoryList = None
         if check_file_exists(envSpecificSchemaPath):
-            envSpecificSchemaYaml = openYaml(envSpecificSchemaPath)
+            envSpecificSchemaYaml = openYamlReadOnly(envSpecificSchemaPath)
             if "cloudPassport" in envSpecificSchemaYaml:
                 if "whiteList" in envSpecificSchemaYaml["cloudPassport"]:
                     logger.info(f"Cloud passport will be checked by schema {envSpecificSchemaPath} ...")
@@ -140,7 +140,7 @@ def checkCloudPassportBySchema(env_dir, cloudPassportFilePath):
 
         if passportSchema:
             if cloudPassportFilePath:
-                cloudPassportYaml = openYaml(cloudPassportFilePath)
+                cloudPassportYaml = openYamlReadOnly(cloudPassportFilePath)
                 checkResult = checkByWhiteList(cloudPassportYaml, passportSchema)
                 if checkSchemaValidationFailed(checkResult):
                     logger.error(f"Cloud passport '{cloudPassportFilePath}' validation failed:" + getSchemaValidationErrorMessage("CloudPassport", checkResult))
@@ -153,7 +153,7 @@ def checkCloudPassportBySchema(env_dir, cloudPassportFilePath):
 
         if passportMandatoryList:
             if cloudPassportFilePath:
-                cloudPassportYaml = openYaml(cloudPassportFilePath)
+                cloudPassportYaml = openYamlReadOnly(cloudPassportFilePath)
                 checkResult, message = checkByMandatoryList(cloudPassportYaml, passportMandatoryList)
                 if not checkResult:
                     logger.error(f"Cloud passport '{cloudPassportFilePath}' validation by mandatory list failed:\n{message}")
@@ -5,8 +5,9 @@
 import pytest
 import difflib
 
-from main import render_environment, cleanup_resulting_dir
+from main import render_environment, render_environments, parse_env_names, cleanup_resulting_dir
 from envgenehelper import *
+from envgenehelper.env_builder import UnsupportedFeatureError
 
 test_data = [
     # (cluster_name, environment_name, template)
@@ -31,10 +32,218 @@ def change_test_dir(request, monkeypatch):
     monkeypatch.chdir(request.fspath.dirname + "/../..")
 
 
+@pytest.mark.parametrize("render_engine", ["ansible", "python"])
 @pytest.mark.parametrize("cluster_name, env_name, version", test_data)
-def test_render_envs(cluster_name, env_name, version):
+def test_render_envs(cluster_name, env_name, version, render_engine, monkeypatch):
+    import main
+    monkeypatch.setattr(main, "RENDER_ENGINE", render_engine)
     environ['CI_PROJECT_DIR'] = g_base_dir
     render_environment(env_name, cluster_name, g_templates_dir, g_inventory_dir, g_output_dir, version, g_base_dir)
+    compare_with_etalon(cluster_name, env_name)
+
+
+def test_render_envs_in_batch():
+    environ['CI_PROJECT_DIR'] = g_base_dir
+    render_environments("cluster-01/env-02\ncluster-01/env-03", g_templates_dir, g_inventory_dir, g_output_dir,
+                        "composite-dev", g_base_dir)
+    compare_with_etalon("cluster-01", "env-02")
+    compare_with_etalon("cluster-01", "env-03")
+
+
+def test_render_envs_with_parallel_namespaces(monkeypatch):
+    import build_env
+    monkeypatch.setattr(build_env, "NAMESPACE_WORKERS", 4)
+    environ['CI_PROJECT_DIR'] = g_base_dir
+    render_environment("env-01", "cluster-01", g_templates_dir, g_inventory_dir, g_output_dir, "composite-prod",
+                       g_base_dir)
+    compare_with_etalon("cluster-01", "env-01")
+
+
+def test_render_templates_in_process(tmp_path, monkeypatch):
+    import main
+    monkeypatch.setattr(main, "RENDER_ENGINE", "python")
+    playbook_runs = []
+    monkeypatch.setattr(main, "run_env_builder_playbook", lambda env_name, ansible_vars: playbook_runs.append(env_name))
+    ansible_vars = {"render_dir": str(tmp_path / "render"), "render_parameters_dir": str(tmp_path / "parameters"),
+                    "env_instances_dir": str(tmp_path / "render/env-01")}
+    writeToFile(str(tmp_path / "render/env-01/Inventory/env_definition.yml"), "a: 1\n")
+    writeToFile(str(tmp_path / "parameters/paramset.yml.j2"), "a: 1\n")
+
+    def render_env_templates(render_vars, env_config_template, error=None):
+        assert openFileAsString(f"{render_vars['env_instances_dir']}/Inventory/env_definition.yml") == "a: 1\n"
+        writeToFile(f"{render_vars['env_instances_dir']}/tenant.yml", "tenant: 1\n")
+        deleteFile(f"{render_vars['render_parameters_dir']}/paramset.yml.j2")
+        if error:
+            raise error
+
+    # failed rendering leaves render dirs untouched
+    for error, expected_playbook_runs in [(ValueError("failure"), []), (UnsupportedFeatureError("lookup"), ["env-01"])]:
+        monkeypatch.setattr(main, "render_env_templates", lambda *args: render_env_templates(*args, error=error))
+        if expected_playbook_runs:
+            main.render_templates("env-01", ansible_vars)
+        else:
+            with pytest.raises(ValueError):
+                main.render_templates("env-01", ansible_vars)
+        assert playbook_runs == expected_playbook_runs
+        assert sorted(os.listdir(tmp_path)) == ["parameters", "render"]
+        assert os.listdir(tmp_path / "render/env-01") == ["Inventory"]
+        assert os.listdir(tmp_path / "parameters") == ["paramset.yml.j2"]
+    # successful rendering replaces render dirs
+    monkeypatch.setattr(main, "render_env_templates", render_env_templates)
+    main.render_templates("env-01", ansible_vars)
+    assert sorted(os.listdir(tmp_path)) == ["parameters", "render"]
+    assert sorted(os.listdir(tmp_path / "render/env-01")) == ["Inventory", "tenant.yml"]
+    assert os.listdir(tmp_path / "parameters") == []
+
+
+def test_namespace_workers_files_are_visible_after_rendering(monkeypatch):
+    import build_env
+    import envgenehelper.file_helper as file_helper
+    monkeypatch.setattr(build_env, "NAMESPACE_WORKERS", 4)
+    monkeypatch.setattr(file_helper, "document_cache_size", 100)
+    checked_dirs = []
+    process_namespace_templates = build_env.processNamespaceTemplates
+
+    def process_and_check(namespaceTemplates, env_instances_dir, *args):
+        # directories and documents are indexed and cached by this process before workers write them
+        namespace_dirs = [os.path.dirname(path) for path in namespaceTemplates]
+        for namespace_dir in namespace_dirs:
+            delete_dir(f"{namespace_dir}/Applications")
+            findAllYamlsInDir(namespace_dir)
+        for path in namespaceTemplates:
+            openYaml(path)
+        findAllYamlsInDir(env_instances_dir)
+        process_namespace_templates(namespaceTemplates, env_instances_dir, *args)
+        for namespace_dir in namespace_dirs + [env_instances_dir]:
+            found = findAllYamlsInDir(namespace_dir)
+            assert sorted(found) == sorted(str(path) for ext in ("*.yml", "*.yaml")
+                                           for path in Path(namespace_dir).rglob(ext))
+        for path in namespaceTemplates:
+            assert openYaml(path) == yaml.load(openFileAsString(path))
+        checked_dirs.extend(namespace_dirs)
+
+    monkeypatch.setattr(build_env, "processNamespaceTemplates", process_and_check)
+    environ['CI_PROJECT_DIR'] = g_base_dir
+    render_environment("env-01", "cluster-01", g_templates_dir, g_inventory_dir, g_output_dir, "composite-prod",
+                       g_base_dir)
+    assert any(check_dir_exists(f"{namespace_dir}/Applications") for namespace_dir in checked_dirs)
+    compare_with_etalon("cluster-01", "env-01")
+
+
+def test_render_envs_incrementally(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "INCREMENTAL_BUILD", True)
+    builds = []
+    build_environment = main.build_environment
+    monkeypatch.setattr(main, "build_environment", lambda *args: builds.append(args[0]) or build_environment(*args))
+    environ['CI_PROJECT_DIR'] = g_base_dir
+    generated_dir = f"{g_output_dir}/cluster-01/env-04"
+    if check_file_exists(f"{generated_dir}/.build-fingerprint.json"):
+        deleteFile(f"{generated_dir}/.build-fingerprint.json")
+    for i in range(2):
+        render_environment("env-04", "cluster-01", g_templates_dir, g_inventory_dir, g_output_dir, "simple", g_base_dir)
+    assert len(builds) == 1
+    # modified generated file is generated again
+    with open(f"{generated_dir}/tenant.yml", "a") as f:
+        f.write("\n")
+    render_environment("env-04", "cluster-01", g_templates_dir, g_inventory_dir, g_output_dir, "simple", g_base_dir)
+    assert len(builds) == 2
+    compare_with_etalon("cluster-01", "env-04")
+
+
+def test_build_fingerprint_inputs(tmp_path, monkeypatch):
+    import build_fingerprint
+    instances_dir = tmp_path / "environments"
+    for rel_path in ["parameters/shared.yml", "cluster-01/cloud-passport/cluster-01.yml",
+                     "cluster-01/env-01/Inventory/env_definition.yml", "cluster-01/env-02/Inventory/env_definition.yml",
+                     "cluster-02/env-01/Inventory/env_definition.yml", "cluster-02/cloud-passport/cluster-02.yml"]:
+        (instances_dir / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (instances_dir / rel_path).write_text("a: 1\n")
+    env_dir = str(instances_dir / "cluster-01" / "env-01")
+    inputs_fingerprint = build_fingerprint.get_inputs_fingerprint(str(tmp_path / "templates"), str(tmp_path), "1")
+    fingerprint = build_fingerprint.get_build_fingerprint(inputs_fingerprint, env_dir, env_dir, str(instances_dir))
+    # files of other environments and clusters are not part of fingerprint
+    for rel_path in ["cluster-01/env-02/Inventory/env_definition.yml", "cluster-02/cloud-passport/cluster-02.yml",
+                     "cluster-02/env-01/Inventory/env_definition.yml"]:
+        (instances_dir / rel_path).write_text("a: 2\n")
+    assert build_fingerprint.get_build_fingerprint(inputs_fingerprint, env_dir, env_dir,
+                                                   str(instances_dir)) == fingerprint
+    # shared files and files of the environment are
+    for rel_path in ["parameters/shared.yml", "cluster-01/cloud-passport/cluster-01.yml",
+                     "cluster-01/env-01/Inventory/env_definition.yml"]:
+        (instances_dir / rel_path).write_text("a: 2\n")
+        new_fingerprint = build_fingerprint.get_build_fingerprint(inputs_fingerprint, env_dir, env_dir,
+                                                                  str(instances_dir))
+        assert new_fingerprint["instances"] != fingerprint["instances"]
+        fingerprint = new_fingerprint
+    # fingerprint can't be calculated without generator dirs
+    monkeypatch.setattr(build_fingerprint, "GENERATOR_DIRS",
+                        build_fingerprint.GENERATOR_DIRS + [str(tmp_path / "env-builder")])
+    assert build_fingerprint.get_inputs_fingerprint(str(tmp_path / "templates"), str(tmp_path), "1") is None
+
+
+MULTI_PARAMSET_APPLICATION_ETALON = """\
+# header
+name: "app"
+deployParameters:
+  LONG_PARAMETER_NAME: # paramset: ps1
+    - "l1"
+    - "l2"
+  MIDDLE_KEY: # paramset: ps3
+    - "l1"
+    - "l2"
+  a: # paramset: ps2
+    m: "v"
+    n: 9
+  bb: 9                # paramset: ps1
+  x_y: # paramset: ps3
+    - "l1"
+    - "l2"
+technicalConfigurationParameters: {}
+"""
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_multi_paramset_application(tmp_path, batch):
+    import build_env
+    paramsets = [
+        ("ps1", [{"appName": "app", "parameters": {"LONG_PARAMETER_NAME": ["l1", "l2"]}},
+                 {"appName": "app", "parameters": {"MIDDLE_KEY": "str", "bb": 9}}]),
+        ("ps2", [{"appName": "app", "parameters": {"a": {"n": 9, "m": "v"}}}]),
+        ("ps3", [{"appName": "app", "parameters": {"x_y": ["l1", "l2"], "MIDDLE_KEY": ["l1", "l2"]}}]),
+    ]
+    # comments keep columns as when the file was written and read again for every paramset
+    app_documents = {} if batch else None
+    for name, app_params in paramsets:
+        build_env.convertParameterSetsToApplication(str(tmp_path / "namespace.yml"), f"paramset: {name}", app_params, name,
+                                                    "deployParameters", False, {}, "header", app_documents)
+    if batch:
+        build_env.flushApplicationDocuments(app_documents, "header")
+    assert openFileAsString(str(tmp_path / "Applications/app.yml")) == MULTI_PARAMSET_APPLICATION_ETALON
+
+
+def test_validate_parameters_in_parallel(monkeypatch, caplog):
+    import main
+    environ['CI_PROJECT_DIR'] = g_base_dir
+    param_dirs = main.find_common_parameter_dirs(g_templates_dir, g_inventory_dir) + \
+        main.find_all_env_parameter_dirs(g_inventory_dir)
+    sequential_errors = main.collect_parameters_errors(param_dirs)
+    sequential_logs = caplog.messages
+    caplog.clear()
+    monkeypatch.setattr(main, "PARAMSETS_PER_VALIDATION_WORKER", 1)
+    monkeypatch.setattr(main.os, "cpu_count", lambda: 2)
+    assert main.collect_parameters_errors(param_dirs) == sequential_errors
+    assert caplog.messages[1:] == sequential_logs
+
+
+def test_parse_env_names():
+    assert parse_env_names("cluster-01/env-01\n cluster-01/env-02 ,cluster02/env01\n") == [
+        ("cluster-01", "env-01"), ("cluster-01", "env-02"), ("cluster02", "env01")]
+    with pytest.raises(ReferenceError):
+        parse_env_names("env-01")
+
+
+def compare_with_etalon(cluster_name, env_name):
     source_dir = f"{g_inventory_dir}/{cluster_name}/{env_name}"
     generated_dir = f"{g_output_dir}/{cluster_name}/{env_name}"
     files_to_compare = get_all_files_in_dir(source_dir, source_dir + "/")
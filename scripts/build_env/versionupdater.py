@@ -1,5 +1,5 @@
 import argparse
-from envgenehelper import beautifyYaml, openYaml, writeYamlToFile, logger
+from envgenehelper import write_beautified_yaml, openYaml, logger
 
 def update_version(env_definition_path, version_to_add):
     logger.info(f"Started version update to {version_to_add} in {env_definition_path}.")
@@ -23,8 +23,7 @@ def update_version(env_definition_path, version_to_add):
         else:
             logger.error(f"Bad env_definition structure in file {env_definition_path}.")
             raise ReferenceError(f"Can't update version in {env_definition_path}. See logs above.")
-    writeYamlToFile(env_definition_path, data)
-    beautifyYaml(env_definition_path)
+    write_beautified_yaml(env_definition_path, data)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()